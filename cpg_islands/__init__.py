@@ -6,3 +6,21 @@ __version__ = metadata.version
 __author__ = metadata.authors[0]
 __license__ = metadata.license
 __copyright__ = metadata.copyright
+
+
+def find_islands(*args, **kwargs):
+    """Find CpG islands in a sequence. See
+    :func:`cpg_islands.islands.find_islands`.
+    """
+    # Imported here so that reading the metadata, e.g. from `setup.py',
+    # doesn't require the dependencies to be installed.
+    from cpg_islands.islands import find_islands
+    return find_islands(*args, **kwargs)
+
+
+def iter_islands(*args, **kwargs):
+    """Find CpG islands in a sequence, yielding each as it is found. See
+    :func:`cpg_islands.islands.iter_islands`.
+    """
+    from cpg_islands.islands import iter_islands
+    return iter_islands(*args, **kwargs)
@@ -3,11 +3,25 @@
 
 from __future__ import division
 from abc import ABCMeta, abstractmethod, abstractproperty
+from fractions import Fraction
+import math
+import re
 
 from Bio.SeqFeature import SeqFeature, FeatureLocation
+import numpy as np
+
+from cpg_islands.counts import PrefixCounts
+from cpg_islands.tasks import checkpoint
 
 # from cpg_islands.algorithms import sliding_window_cython
 
+_SOFT_MASKED_RE = re.compile('[a-z]+')
+
+# Scans check whether they have been cancelled whenever the index they
+# advance is a multiple of `_CHECKPOINT_MASK + 1'. Masking keeps the
+# test cheap enough for the inner loops.
+_CHECKPOINT_MASK = 0xffff
+
 
 class IslandMetadata(object):
     """Container class for island metadata."""
@@ -86,6 +100,39 @@ def _compute_counts(subseq):
     return (c_count, g_count, cpg_count)
 
 
+def _count_bases(subseq):
+    """Like :func:`_compute_counts`, but counting with the string
+    methods, which run at C speed.
+
+    :param subseq: the partial sequence
+    :type subseq: :class:`str`
+    :return: a tuple of ``(c_count, g_count, cpg_count)``
+    :rtype: :class:`tuple`
+    """
+    return (subseq.count('C'), subseq.count('G'), subseq.count('CG'))
+
+
+def _required_gc_count(island_size, min_gc_ratio):
+    """Find the fewest G's and C's a window may contain and still meet
+    the minimum GC ratio.
+
+    :param island_size: the number of bases in the window
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the minimum ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :return: the smallest count giving a ratio of at least the minimum
+    :rtype: :class:`int`
+    """
+    # Start from the exact answer and correct it for rounding, so that
+    # it agrees with the comparison made by `_is_island'.
+    count = int(math.ceil(min_gc_ratio * island_size))
+    while count > 0 and (count - 1) / island_size >= min_gc_ratio:
+        count -= 1
+    while count / island_size < min_gc_ratio:
+        count += 1
+    return count
+
+
 def _compute_ratios(c_count, g_count, cpg_count, subseq_len):
     """Compute ratios given counts.
 
@@ -138,9 +185,101 @@ def _make_feature(start, end):
     return SeqFeature(FeatureLocation(start, end))
 
 
+def make_results(seq_record, island_tuples):
+    """Annotate a record with islands.
+
+    :param seq_record: the sequence record to annotate
+    :type seq_record: :class:`SeqRecord`
+    :param island_tuples: ``(start, end, gc_ratio, obs_exp_cpg_ratio)``
+        tuple for each island
+    :type island_tuples: iterable of :class:`tuple`
+    :return: container class of algorithm results
+    :rtype: :class:`AlgoResults`
+    """
+    island_features = []
+    island_metadata_list = []
+    for start, end, gc_ratio, obs_exp_cpg_ratio in island_tuples:
+        island_features.append(_make_feature(start, end))
+        island_metadata_list.append(
+            IslandMetadata(gc_ratio, obs_exp_cpg_ratio))
+    seq_record.features = island_features
+    return AlgoResults(seq_record, island_metadata_list)
+
+
+def validate_parameters(seq_len, island_size, min_gc_ratio,
+                        min_obs_exp_cpg_ratio):
+    """Check that the parameters for an algorithm make sense.
+
+    :param seq_len: length of the sequence to scan
+    :type seq_len: :class:`int`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    if island_size <= 0:
+        raise ValueError(
+            'Invalid island size: {0}'.format(island_size))
+    if island_size > seq_len:
+        raise ValueError(
+            'Island size ({0}) must be less than or '
+            'equal to sequence length ({1})'.format(island_size, seq_len))
+    if not (0 <= min_gc_ratio <= 1):
+        raise ValueError(
+            'Invalid GC ratio for ratio between '
+            'zero and one: {0}'.format(min_gc_ratio))
+    if not (0 <= min_obs_exp_cpg_ratio):
+        raise ValueError(
+            'Invalid observed-to-expected CpG ratio for ratio greater '
+            'than or equal to zero: {0}'.format(min_obs_exp_cpg_ratio))
+
+
+def find_soft_masked_intervals(seq_str):
+    """Find the soft-masked regions of a sequence. Soft-masked
+    references mark repeats by writing them in lowercase.
+
+    :param seq_str: the mixed-case sequence
+    :type seq_str: :class:`str`
+    :return: ``(start, end)`` tuples of each lowercase run, with
+        exclusive end indices, in ascending order
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    return [match.span() for match in _SOFT_MASKED_RE.finditer(seq_str)]
+
+
+def _unmasked_intervals(masked_intervals, seq_len, min_len):
+    """Compute the regions of a sequence which are not masked.
+
+    :param masked_intervals: sorted, non-overlapping ``(start, end)``
+        tuples of masked regions
+    :type masked_intervals: :class:`list` of :class:`tuple`
+    :param seq_len: length of the sequence
+    :type seq_len: :class:`int`
+    :param min_len: minimum length of an unmasked region to report
+    :type min_len: :class:`int`
+    :return: ``(start, end)`` tuples of the unmasked regions
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    intervals = []
+    start = 0
+    for masked_start, masked_end in masked_intervals + [(seq_len, seq_len)]:
+        if masked_start - start >= min_len:
+            intervals.append((start, masked_start))
+        start = masked_end
+    return intervals
+
+
 class MetaAlgorithm(object):
     __metaclass__ = ABCMeta
 
+    exact = True
+    """Whether the algorithm finds exactly the islands of the sliding
+    window definition. Other algorithms call islands by their own
+    definitions, taking the same parameters."""
+
     @abstractproperty
     def name(self):
         """Return the nice name of this algorithm."""
@@ -155,6 +294,26 @@ class MetaAlgorithm(object):
                 replace(')', ''))
 
     @abstractmethod
+    def scan(self, seq_str, island_size, min_gc_ratio,
+             min_obs_exp_cpg_ratio):
+        """Find CpG islands in a sequence without building any
+        features. Parameters are assumed to have been checked with
+        :func:`validate_parameters`.
+
+        :param seq_str: the sequence
+        :type seq_str: :class:`str`
+        :param island_size: the number of bases which an island may contain
+        :type island_size: :class:`int`
+        :param min_gc_ratio: the ratio of GC to other bases
+        :type min_gc_ratio: :class:`float`
+        :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+        :type min_obs_exp_cpg_ratio: :class:`float`
+        :return: ``(start, end, gc_ratio, obs_exp_cpg_ratio)`` tuple for
+            each island, in order, with exclusive end indices
+        :rtype: iterable of :class:`tuple`
+        """
+        raise NotImplementedError()
+
     def algorithm(
             self, seq_record, island_size, min_gc_ratio,
             min_obs_exp_cpg_ratio):
@@ -172,23 +331,61 @@ class MetaAlgorithm(object):
         :rtype: :class:`AlgoResults`
         :raise: :exc:`ValueError` when parameters are invalid
         """
-        # This is helper code to validate parameters. Call with super.
-        if island_size <= 0:
-            raise ValueError(
-                'Invalid island size: {0}'.format(island_size))
-        seq_len = len(seq_record)
-        if island_size > seq_len:
-            raise ValueError(
-                'Island size ({0}) must be less than or '
-                'equal to sequence length ({1})'.format(island_size, seq_len))
-        if not (0 <= min_gc_ratio <= 1):
-            raise ValueError(
-                'Invalid GC ratio for ratio between '
-                'zero and one: {0}'.format(min_gc_ratio))
-        if not (0 <= min_obs_exp_cpg_ratio):
-            raise ValueError(
-                'Invalid observed-to-expected CpG ratio for ratio greater '
-                'than or equal to zero: {0}'.format(min_obs_exp_cpg_ratio))
+        validate_parameters(len(seq_record), island_size, min_gc_ratio,
+                            min_obs_exp_cpg_ratio)
+        return make_results(seq_record, self.scan(
+            str(seq_record.seq), island_size, min_gc_ratio,
+            min_obs_exp_cpg_ratio))
+
+    def masked_scan(self, seq_str, island_size, min_gc_ratio,
+                    min_obs_exp_cpg_ratio, masked_intervals):
+        """Like :meth:`scan`, but skipping masked regions entirely. Each
+        unmasked region is scanned on its own, so no island will
+        overlap a masked region.
+
+        :param masked_intervals: sorted, non-overlapping ``(start, end)``
+            tuples of regions to skip
+        :type masked_intervals: :class:`list` of :class:`tuple`
+        :return: ``(start, end, gc_ratio, obs_exp_cpg_ratio)`` tuple for
+            each island, in order, with exclusive end indices
+        :rtype: iterator of :class:`tuple`
+        """
+        for start, end in _unmasked_intervals(
+                masked_intervals, len(seq_str), island_size):
+            # Only slice the sequence; the rest is not needed by the
+            # algorithm.
+            for island_start, island_end, gc_ratio, obs_exp_cpg_ratio in \
+                    self.scan(seq_str[start:end], island_size,
+                              min_gc_ratio, min_obs_exp_cpg_ratio):
+                yield (start + island_start, start + island_end,
+                       gc_ratio, obs_exp_cpg_ratio)
+
+    def masked_algorithm(
+            self, seq_record, island_size, min_gc_ratio,
+            min_obs_exp_cpg_ratio, masked_intervals):
+        """Create a list of CpG island features in a sequence, skipping
+        masked regions entirely. See :meth:`masked_scan`.
+
+        :param seq_record: the sequence record to annotate
+        :type seq_record: :class:`SeqRecord`
+        :param island_size: the number of bases which an island may contain
+        :type island_size: :class:`int`
+        :param min_gc_ratio: the ratio of GC to other bases
+        :type min_gc_ratio: :class:`float`
+        :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+        :type min_obs_exp_cpg_ratio: :class:`float`
+        :param masked_intervals: sorted, non-overlapping ``(start, end)``
+            tuples of regions to skip
+        :type masked_intervals: :class:`list` of :class:`tuple`
+        :return: container class of algorithm results
+        :rtype: :class:`AlgoResults`
+        :raise: :exc:`ValueError` when parameters are invalid
+        """
+        validate_parameters(len(seq_record), island_size, min_gc_ratio,
+                            min_obs_exp_cpg_ratio)
+        return make_results(seq_record, self.masked_scan(
+            str(seq_record.seq), island_size, min_gc_ratio,
+            min_obs_exp_cpg_ratio, masked_intervals))
 
 
 class SlidingWindowPythonAlgorithm(MetaAlgorithm):
@@ -196,22 +393,17 @@ class SlidingWindowPythonAlgorithm(MetaAlgorithm):
     def name(self):
         return 'Sliding Window'
 
-    def algorithm(
-            self, seq_record, island_size, min_gc_ratio,
-            min_obs_exp_cpg_ratio):
-        super(SlidingWindowPythonAlgorithm, self).algorithm(
-            seq_record, island_size, min_gc_ratio, min_obs_exp_cpg_ratio)
-
-        seq_str = str(seq_record.seq)
+    def scan(self, seq_str, island_size, min_gc_ratio,
+             min_obs_exp_cpg_ratio):
         seq_len = len(seq_str)
-        island_features = []
-        island_metadata_list = []
         start_index = 0
         end_index = island_size
         gc_ratio = 0
         obs_exp_cpg_ratio = 0
 
         while end_index <= seq_len:
+            if not start_index & _CHECKPOINT_MASK:
+                checkpoint()
             # Keep adding bases to the end of the subsequence until
             # the subsequence no longer meets the criteria for being
             # an island.
@@ -234,18 +426,15 @@ class SlidingWindowPythonAlgorithm(MetaAlgorithm):
                 # This means that the true exclusive end index of the
                 # island is one less than `end_index'.
                 island_end_index = end_index - 1
-                island_features.append(
-                    _make_feature(start_index, island_end_index))
                 # If we ended by reaching the end of the sequence, the
                 # current ratios are the accurate ones. Otherwise, the
                 # last ratios computed will be accurate.
                 if end_index > seq_len:
-                    island_metadata = IslandMetadata(gc_ratio,
-                                                     obs_exp_cpg_ratio)
+                    yield (start_index, island_end_index,
+                           gc_ratio, obs_exp_cpg_ratio)
                 else:
-                    island_metadata = IslandMetadata(last_gc_ratio,
-                                                     last_obs_exp_cpg_ratio)
-                island_metadata_list.append(island_metadata)
+                    yield (start_index, island_end_index,
+                           last_gc_ratio, last_obs_exp_cpg_ratio)
                 # Reset the pointer to the start of the subsequence to
                 # the exclusive end of the island we just found.
                 start_index = island_end_index
@@ -257,11 +446,19 @@ class SlidingWindowPythonAlgorithm(MetaAlgorithm):
             # be reset to the start index plus the window size.
             end_index = start_index + island_size
 
-        seq_record.features = island_features
-        return AlgoResults(seq_record, island_metadata_list)
-
 
 class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
+    def __init__(self, skip_ahead=True):
+        """Constructor.
+
+        :param skip_ahead: whether to jump over windows which are too
+            short of G's and C's to become islands, rather than
+            sliding through them one base at a time. Results are the
+            same either way.
+        :type skip_ahead: :class:`bool`
+        """
+        self.skip_ahead = skip_ahead
+
     @property
     def name(self):
         return 'Accumulating Sliding Window'
@@ -269,15 +466,12 @@ class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
     # NOQA is here right now to stop flake8 from whining about the
     # cyclomatic complexity of this function, which it reports as
     # 13. This should be fixed.
-    def algorithm(  # NOQA
-            self, seq_record, island_size, min_gc_ratio,
-            min_obs_exp_cpg_ratio):
-        super(AccumulatingSlidingWindowPythonAlgorithm, self).algorithm(
-            seq_record, island_size, min_gc_ratio, min_obs_exp_cpg_ratio)
-
-        island_features = []
-        island_metadata_list = []
-        seq_str = str(seq_record.seq)
+    #
+    # Islands are yielded as soon as they end, and nothing is kept
+    # about them afterwards, so consumers may write them out while the
+    # rest of the sequence is still being scanned.
+    def scan(self, seq_str, island_size, min_gc_ratio,  # NOQA
+             min_obs_exp_cpg_ratio):
         seq_len = len(seq_str)
         start_index = 0
         end_index = island_size
@@ -287,6 +481,8 @@ class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
         is_island = False
         gc_ratio = 0
         obs_exp_cpg_ratio = 0
+        required_gc_count = (_required_gc_count(island_size, min_gc_ratio)
+                             if self.skip_ahead else 0)
 
         while True:
             was_island = is_island
@@ -310,22 +506,40 @@ class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
                     # The true exclusive end index of the island is
                     # one less than `end_index'.
                     island_end_index = end_index - 1
-                    island_features.append(
-                        _make_feature(start_index, island_end_index))
-                    island_metadata_list.append(
-                        IslandMetadata(last_gc_ratio, last_obs_exp_cpg_ratio))
+                    yield (start_index, island_end_index,
+                           last_gc_ratio, last_obs_exp_cpg_ratio)
                     # Reset the pointer to the start of the subsequence to
                     # the exclusive end of the island we just found.
                     start_index = island_end_index
                     # The pointer to the end of the subsequence should
                     # now be the minimal window.
                     end_index = start_index + island_size
+                    # If the window no longer fits, we have reached
+                    # the end. Exit.
+                    if end_index > seq_len:
+                        break
                     # Recalculate initial counts.
                     c_count, g_count, cpg_count = \
                         _compute_counts(seq_str[start_index:end_index])
                     is_island = False
                     # Start again looking again.
                     continue
+                deficit = required_gc_count - c_count - g_count
+                if deficit > 1:
+                    # Outside an island the window keeps its size, and
+                    # each slide gains at most one G or C. So the next
+                    # `deficit - 1' windows can't be islands either;
+                    # jump to the first which might be and recount.
+                    start_index += deficit
+                    end_index += deficit
+                    if end_index > seq_len:
+                        break
+                    if ((end_index - deficit) & ~_CHECKPOINT_MASK !=
+                            end_index & ~_CHECKPOINT_MASK):
+                        checkpoint()
+                    c_count, g_count, cpg_count = _count_bases(
+                        seq_str[start_index:end_index])
+                    continue
                 else:
                     # We are not in and island and we weren't in an
                     # island. First calculate what we are going to
@@ -333,7 +547,10 @@ class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
                     # appropriately.
                     if seq_str[start_index] == 'C':
                         c_count -= 1
-                        if seq_str[start_index + 1] == 'G':
+                        # The CpG starting here was only counted if
+                        # its G is in the window too.
+                        if (start_index + 1 < end_index and
+                                seq_str[start_index + 1] == 'G'):
                             cpg_count -= 1
                     elif seq_str[start_index] == 'G':
                         g_count -= 1
@@ -341,6 +558,8 @@ class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
                     start_index += 1
             # Increment `end_index'.
             end_index += 1
+            if not end_index & _CHECKPOINT_MASK:
+                checkpoint()
             # If `end_index' is greater than length of the sequence,
             # we have reached the end. Exit.
             if end_index > seq_len:
@@ -359,12 +578,331 @@ class AccumulatingSlidingWindowPythonAlgorithm(MetaAlgorithm):
         # loop. Record it now. We also use the current ratios, since
         # the loop exited due to bounds checking.
         if is_island:
-            island_features.append(_make_feature(start_index, seq_len))
-            island_metadata_list.append(
-                IslandMetadata(gc_ratio, obs_exp_cpg_ratio))
+            yield (start_index, seq_len, gc_ratio, obs_exp_cpg_ratio)
+
+
+class MaximalScoringSegmentsAlgorithm(MetaAlgorithm):
+    """Calls islands as the maximal scoring segments of the sequence,
+    found with the linear-time algorithm of Ruzzo and Tompa (1999).
+
+    Each G or C scores ``1 - min_gc_ratio`` and every other base
+    ``-min_gc_ratio``, so a segment scores above zero exactly when its
+    GC ratio exceeds the minimum. Maximal segments at least
+    ``island_size`` long which meet the observed/expected CpG minimum
+    are islands. There is no window, so the cost doesn't depend on the
+    island size.
+    """
+    exact = False
+
+    @property
+    def name(self):
+        return 'Maximal Scoring Segments'
+
+    def scan(self, seq_str, island_size, min_gc_ratio,
+             min_obs_exp_cpg_ratio):
+        counts = PrefixCounts.from_seq(seq_str)
+        for start, end in _maximal_segments(
+                *_gc_excess_runs(seq_str, min_gc_ratio)):
+            if end - start < island_size:
+                continue
+            c_count, g_count, cpg_count = counts.counts(start, end)
+            if c_count == 0 or g_count == 0:
+                continue
+            gc_ratio, obs_exp_cpg_ratio = _compute_ratios(
+                c_count, g_count, cpg_count, end - start)
+            if _is_island(gc_ratio, obs_exp_cpg_ratio, min_gc_ratio,
+                          min_obs_exp_cpg_ratio):
+                yield start, end, gc_ratio, obs_exp_cpg_ratio
+
+
+def _gc_excess_runs(seq_str, min_gc_ratio):
+    """Score a sequence by its excess of GC over a minimum ratio,
+    merging each run of GC or non-GC bases into one element so that
+    there are fewer elements to examine.
+
+    Scores are scaled to integers so that sums are exact.
+
+    :param seq_str: the sequence
+    :type seq_str: :class:`str`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :return: arrays of run start indices, run end indices, and run
+        scores
+    :rtype: :class:`tuple` of :class:`numpy.ndarray`
+    """
+    ratio = Fraction(min_gc_ratio).limit_denominator(1 << 20)
+    bases = np.frombuffer(seq_str, np.uint8)
+    is_gc = (bases == ord('C')) | (bases == ord('G'))
+    boundaries = np.flatnonzero(is_gc[1:] != is_gc[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    ends = np.concatenate((boundaries, [len(bases)]))
+    scores = np.where(
+        is_gc[starts], ratio.denominator - ratio.numerator,
+        -ratio.numerator) * (ends - starts)
+    return starts, ends, scores
+
+
+def _maximal_segments(starts, ends, scores):
+    """Find all maximal scoring segments of a sequence of scored
+    elements, in linear time (Ruzzo and Tompa, 1999).
+
+    :param starts: start index of each element
+    :type starts: :class:`numpy.ndarray`
+    :param ends: exclusive end index of each element
+    :type ends: :class:`numpy.ndarray`
+    :param scores: score of each element
+    :type scores: :class:`numpy.ndarray`
+    :return: ``(start, end)`` tuple for each segment, in order
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    # Each segment is [start, end, score before it, score at its end,
+    # index of the nearest segment to its left with a lower score
+    # before it].
+    segments = []
+    total = 0
+    for index, (start, end, score) in enumerate(zip(
+            starts.tolist(), ends.tolist(), scores.tolist())):
+        if not index & _CHECKPOINT_MASK:
+            checkpoint()
+        before = total
+        total += score
+        if score <= 0:
+            continue
+        segment = [start, end, before, total, -1]
+        while True:
+            left = len(segments) - 1
+            while left >= 0 and segments[left][2] >= segment[2]:
+                left = segments[left][4]
+            if left >= 0 and segments[left][3] < segment[3]:
+                # Extend the segment leftwards over everything since
+                # that segment, and look again.
+                segment[0] = segments[left][0]
+                segment[2] = segments[left][2]
+                del segments[left:]
+                continue
+            segment[4] = left
+            segments.append(segment)
+            break
+    return [(start, end) for start, end, _, _, _ in segments]
+
+
+class CpGClusterAlgorithm(MetaAlgorithm):
+    """Calls islands as clusters of CpGs, in the manner of CpGcluster
+    (Hackenberg et al., 2006). Consecutive CpGs no further apart than
+    a maximum gap are joined into a cluster spanning from the first
+    CpG to the last. Clusters at least ``island_size`` long which meet
+    both ratio minimums are islands.
+
+    Only the positions of the CpGs are examined, about one percent of
+    the bases of a typical genome, and all of the work is vectorized.
+    """
+    exact = False
+
+    def __init__(self, max_gap=None):
+        """Constructor.
+
+        :param max_gap: largest distance between the starts of
+            consecutive CpGs in a cluster, or :data:`None` to use the
+            median distance in each sequence, as CpGcluster does by
+            default
+        :type max_gap: :class:`int`
+        """
+        self.max_gap = max_gap
+
+    @property
+    def name(self):
+        return 'CpG Clusters'
+
+    def scan(self, seq_str, island_size, min_gc_ratio,
+             min_obs_exp_cpg_ratio):
+        checkpoint()
+        bases = np.frombuffer(seq_str, np.uint8)
+        positions = np.flatnonzero(
+            (bases[:-1] == ord('C')) & (bases[1:] == ord('G')))
+        if not len(positions):
+            return
+        gaps = np.diff(positions)
+        max_gap = self.max_gap
+        if max_gap is None:
+            max_gap = np.median(gaps) if len(gaps) else 0
+        # Clusters break wherever the gap is too large.
+        breaks = np.flatnonzero(gaps > max_gap)
+        starts = positions[np.concatenate(([0], breaks + 1))]
+        ends = positions[np.concatenate((breaks, [len(positions) - 1]))] + 2
+        long_enough = ends - starts >= island_size
+        starts = starts[long_enough]
+        ends = ends[long_enough]
+        gc_ratios, obs_exp_cpg_ratios = PrefixCounts.from_seq(
+            seq_str).ratios(starts, ends)
+        # A cluster has a CpG, so neither count can be zero.
+        is_island = ((gc_ratios >= min_gc_ratio) &
+                     (obs_exp_cpg_ratios >= min_obs_exp_cpg_ratio))
+        for island in zip(starts[is_island].tolist(),
+                          ends[is_island].tolist(),
+                          gc_ratios[is_island].tolist(),
+                          obs_exp_cpg_ratios[is_island].tolist()):
+            yield island
+
+
+def _block_window_sums(block_sums, span):
+    """Sum each run of consecutive blocks.
+
+    :param block_sums: a count for each block
+    :type block_sums: :class:`numpy.ndarray`
+    :param span: number of blocks in a run
+    :type span: :class:`int`
+    :return: the sum of the run starting at each block, truncated at
+        the last block
+    :rtype: :class:`numpy.ndarray`
+    """
+    block_count = len(block_sums)
+    sums = np.zeros(block_count + 1, np.int64)
+    np.cumsum(block_sums, out=sums[1:])
+    indices = np.arange(block_count)
+    return sums[np.minimum(indices + span, block_count)] - sums[indices]
+
+
+def _block_sums(mask, block_size):
+    """Count the true entries in each block of a mask.
+
+    :param mask: the mask
+    :type mask: :class:`numpy.ndarray` of :class:`bool`
+    :param block_size: number of entries in a block
+    :type block_size: :class:`int`
+    :return: a count for each block; the last block may be short
+    :rtype: :class:`numpy.ndarray`
+    """
+    block_count = -(-len(mask) // block_size)
+    padded = np.zeros(block_count * block_size, bool)
+    padded[:len(mask)] = mask
+    return padded.reshape(block_count, block_size).sum(1)
+
+
+def _candidate_ranges(seq_str, island_size, min_gc_ratio,
+                      min_obs_exp_cpg_ratio, block_size):
+    """Find where islands might start, by bounding the counts of every
+    window from the counts of the blocks it overlaps.
+
+    :param seq_str: the sequence
+    :type seq_str: :class:`str`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param block_size: number of bases in a block
+    :type block_size: :class:`int`
+    :return: ``(start, end)`` tuples of the ranges of window starts
+        which might be islands, in order; no window starting outside
+        them is an island
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    bases = np.frombuffer(seq_str, np.uint8)
+    is_c = bases == ord('C')
+    is_g = bases == ord('G')
+    # Each window starting in a block lies within this many blocks.
+    span = (block_size + island_size - 2) // block_size + 1
+    # An island needs both a C and a G.
+    candidates = (
+        _block_window_sums(_block_sums(is_c | is_g, block_size), span) >=
+        max(_required_gc_count(island_size, min_gc_ratio), 2))
+    if min_obs_exp_cpg_ratio > 0:
+        # Count each CpG in the block of its C, so that a window's
+        # CpGs are all within the blocks it overlaps.
+        is_cpg = np.zeros(len(bases), bool)
+        np.logical_and(is_c[:-1], is_g[1:], out=is_cpg[:-1])
+        candidates &= _block_window_sums(
+            _block_sums(is_cpg, block_size), span) > 0
+    last_start = len(seq_str) - island_size
+    candidates = candidates[:last_start // block_size + 1]
+    edges = np.flatnonzero(np.diff(np.concatenate(
+        ([False], candidates, [False])).astype(np.int8)))
+    starts = edges[::2] * block_size
+    ends = np.minimum(edges[1::2] * block_size, last_start + 1)
+    return zip(starts.tolist(), ends.tolist())
+
+
+class CoarseToFineAlgorithm(MetaAlgorithm):
+    """Finds exactly the islands of another algorithm, but only scans
+    the parts of the sequence which might contain them.
+
+    The sequence is first divided into blocks and the C's, G's and
+    CpG's of every block are counted at once. A window can hold no
+    more of each than the blocks it overlaps, so ranges of blocks too
+    poor in them to start an island are discarded. Islands typically
+    cover only a percent or two of a genome, so little is left to scan.
+    """
+    def __init__(self, fine_algorithm=None, block_size=50):
+        """Constructor.
+
+        :param fine_algorithm: exact algorithm to scan the candidate
+            ranges with; defaults to the accumulating sliding window
+        :type fine_algorithm: :class:`MetaAlgorithm`
+        :param block_size: number of bases in a block
+        :type block_size: :class:`int`
+        """
+        if fine_algorithm is None:
+            fine_algorithm = AccumulatingSlidingWindowPythonAlgorithm()
+        self.fine_algorithm = fine_algorithm
+        self.block_size = block_size
 
-        seq_record.features = island_features
-        return AlgoResults(seq_record, island_metadata_list)
+    @property
+    def name(self):
+        return 'Coarse to Fine'
+
+    def scan(self, seq_str, island_size, min_gc_ratio,
+             min_obs_exp_cpg_ratio):
+        checkpoint()
+        # Outside an island the scan holds no state but its position,
+        # so it may be started afresh at any window which is not part
+        # of an island already found.
+        resume_index = 0
+        for start, end in _candidate_ranges(
+                seq_str, island_size, min_gc_ratio, min_obs_exp_cpg_ratio,
+                self.block_size):
+            start = max(start, resume_index)
+            if start >= end:
+                continue
+            checkpoint()
+            for island in self._scan_range(
+                    seq_str, start, end, island_size, min_gc_ratio,
+                    min_obs_exp_cpg_ratio):
+                yield island
+                resume_index = island[1]
+
+    def _scan_range(self, seq_str, start, end, island_size, min_gc_ratio,
+                    min_obs_exp_cpg_ratio):
+        """Find the islands starting in a range of a sequence.
+
+        :param start: inclusive start of the range of window starts
+        :type start: :class:`int`
+        :param end: exclusive end of the range of window starts
+        :type end: :class:`int`
+        :return: ``(start, end, gc_ratio, obs_exp_cpg_ratio)`` tuple for
+            each island, in order, with exclusive end indices
+        :rtype: iterator of :class:`tuple`
+        """
+        seq_len = len(seq_str)
+        # Give the last window in the range room to fit.
+        limit = min(end + island_size - 1, seq_len)
+        while True:
+            truncated_start = None
+            for island_start, island_end, gc_ratio, obs_exp_cpg_ratio in \
+                    self.fine_algorithm.scan(
+                        seq_str[start:limit], island_size, min_gc_ratio,
+                        min_obs_exp_cpg_ratio):
+                if start + island_end == limit < seq_len:
+                    truncated_start = start + island_start
+                    break
+                yield (start + island_start, start + island_end,
+                       gc_ratio, obs_exp_cpg_ratio)
+            if truncated_start is None:
+                return
+            # The island might carry on past the end of the slice, so
+            # scan it again with twice the room to grow.
+            start = truncated_start
+            limit = min(limit + max(limit - start, island_size), seq_len)
 
 # class AccumulatingSlidingWindowCythonAlgorithm(MetaAlgorithm):
 #     @property
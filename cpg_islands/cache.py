@@ -0,0 +1,171 @@
+""":mod:`cpg_islands.cache` --- Persistent sequence record cache
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import zlib
+
+from cpg_islands import metadata
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+"""Default limit on the total compressed size of the cache, in bytes."""
+
+
+def default_cache_dir():
+    """Return the platform's conventional directory for the cache.
+
+    :return: path to the cache directory
+    :rtype: :class:`str`
+    """
+    if sys.platform == 'darwin':
+        base_dir = os.path.expanduser(os.path.join('~', 'Library', 'Caches'))
+    elif sys.platform == 'win32':
+        base_dir = os.environ.get('LOCALAPPDATA', os.path.expanduser('~'))
+    else:
+        base_dir = os.environ.get(
+            'XDG_CACHE_HOME', os.path.expanduser(os.path.join('~', '.cache')))
+    return os.path.join(base_dir, metadata.title)
+
+
+class RecordCache(object):
+    """Size-bounded, least-recently-used cache of sequence record text,
+    kept in an SQLite database so that it survives across sessions.
+
+    Records are keyed by their accession and version,
+    e.g. ``JX500709.1``. The text is stored compressed. Instances may
+    be shared between threads.
+    """
+    def __init__(self, path=None, max_size=DEFAULT_MAX_SIZE):
+        """Constructor.
+
+        :param path: path to the database file, or :data:`None` to use
+            a file in :func:`default_cache_dir`
+        :type path: :class:`str`
+        :param max_size: limit on the total compressed size of all
+            records, in bytes
+        :type max_size: :class:`int`
+        """
+        if path is None:
+            cache_dir = default_cache_dir()
+            if not os.path.isdir(cache_dir):
+                os.makedirs(cache_dir)
+            path = os.path.join(cache_dir, 'records.sqlite')
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS records ('
+                'accession TEXT PRIMARY KEY, '
+                'data BLOB NOT NULL, '
+                'size INTEGER NOT NULL, '
+                'last_used INTEGER NOT NULL)')
+        # Recency is tracked with a counter rather than timestamps so
+        # that accesses within the same clock tick stay ordered.
+        self._clock = self._connection.execute(
+            'SELECT COALESCE(MAX(last_used), 0) FROM records').fetchone()[0]
+
+    def _tick(self):
+        """Advance the recency counter.
+
+        :return: the new counter value
+        :rtype: :class:`int`
+        """
+        self._clock += 1
+        return self._clock
+
+    def get(self, accession):
+        """Retrieve a record's text, marking it as recently used.
+
+        :param accession: the record's accession and version
+        :type accession: :class:`str`
+        :return: the record text, or :data:`None` if it is not cached
+        :rtype: :class:`str`
+        """
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT data FROM records WHERE accession = ?',
+                (accession,)).fetchone()
+            if row is None:
+                return None
+            with self._connection:
+                self._connection.execute(
+                    'UPDATE records SET last_used = ? WHERE accession = ?',
+                    (self._tick(), accession))
+        return zlib.decompress(row[0])
+
+    def put(self, accession, text):
+        """Store a record's text, evicting the least recently used
+        records if the cache grows past its size limit.
+
+        :param accession: the record's accession and version
+        :type accession: :class:`str`
+        :param text: the record text
+        :type text: :class:`str`
+        """
+        data = zlib.compress(text)
+        with self._lock:
+            with self._connection:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO records '
+                    '(accession, data, size, last_used) VALUES (?, ?, ?, ?)',
+                    (accession, sqlite3.Binary(data), len(data),
+                     self._tick()))
+                self._evict()
+
+    def _evict(self):
+        """Delete least recently used records until the cache fits
+        within its size limit. Must be called with the lock held.
+        """
+        excess = self._size() - self.max_size
+        if excess <= 0:
+            return
+        rows = self._connection.execute(
+            'SELECT accession, size FROM records '
+            'ORDER BY last_used').fetchall()
+        for accession, size in rows:
+            if excess <= 0:
+                break
+            self._connection.execute(
+                'DELETE FROM records WHERE accession = ?', (accession,))
+            excess -= size
+
+    def _size(self):
+        """Return the total compressed size of all records.
+
+        :return: size in bytes
+        :rtype: :class:`int`
+        """
+        return self._connection.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM records').fetchone()[0]
+
+    @property
+    def size(self):
+        """Total compressed size of all cached records, in bytes."""
+        with self._lock:
+            return self._size()
+
+    def __contains__(self, accession):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT 1 FROM records WHERE accession = ?',
+                (accession,)).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                'SELECT COUNT(*) FROM records').fetchone()[0]
+
+    def clear(self):
+        """Remove all records from the cache."""
+        with self._lock:
+            with self._connection:
+                self._connection.execute('DELETE FROM records')
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._connection.close()
@@ -0,0 +1,72 @@
+""":mod:`cpg_islands.cli` --- Command-line interface
+
+Commands for using the island finder without the graphical interface.
+"""
+
+import argparse
+import sys
+
+from cpg_islands import metadata
+from cpg_islands.islands import warm_up
+from cpg_islands.server import IslandServer
+from cpg_islands.tasks import ProcessExecutor
+
+
+def serve(args):
+    """Run the local island-finding service until interrupted.
+
+    :param args: parsed command-line arguments
+    :type args: :class:`argparse.Namespace`
+    """
+    executor = ProcessExecutor(args.jobs, initializer=warm_up)
+    server = IslandServer((args.host, args.port), executor,
+                          verbose=args.verbose)
+    print >> sys.stderr, 'Serving on {0}'.format(server.url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        executor.shutdown()
+
+
+def create_parser():
+    """Create the command-line argument parser.
+
+    :return: the parser
+    :rtype: :class:`argparse.ArgumentParser`
+    """
+    parser = argparse.ArgumentParser(
+        prog='cpg-islands', description=metadata.description)
+    parser.add_argument('--version', '-V', action='version',
+                        version='{0} {1}'.format(metadata.nice_title,
+                                                 metadata.version))
+    subparsers = parser.add_subparsers(title='commands')
+
+    serve_parser = subparsers.add_parser(
+        'serve', help='run a local HTTP/JSON island-finding service')
+    serve_parser.add_argument(
+        '--host', default='127.0.0.1',
+        help='address to listen on (default: %(default)s)')
+    serve_parser.add_argument('--port', '-p', type=int, default=8080,
+                              help='port to listen on (default: %(default)s)')
+    serve_parser.add_argument('--jobs', '-j', type=int, default=None,
+                              help='number of worker processes '
+                              '(default: number of CPUs)')
+    serve_parser.add_argument('--verbose', '-v', action='store_true',
+                              help='log each request')
+    serve_parser.set_defaults(command=serve)
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+    args = create_parser().parse_args(argv[1:])
+    args.command(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+""":mod:`cpg_islands.counts` --- Prefix counts of bases
+
+Entry ``i`` of a prefix count array is the number of matching bases
+before index ``i``, so the number in any window ``[start, end)`` is the
+difference of two entries. Algorithms can then evaluate a window in
+constant time instead of rescanning it.
+"""
+
+from __future__ import division
+
+import numpy as np
+
+COUNT_DTYPE = np.dtype(np.uint32)
+"""Type of the entries of prefix count arrays."""
+
+MAX_SEQ_LEN = np.iinfo(COUNT_DTYPE).max
+"""Length of the longest sequence which can be counted."""
+
+
+def _prefix_sum(mask):
+    """Count the true entries before each index of a mask.
+
+    :param mask: the mask
+    :type mask: :class:`numpy.ndarray` of :class:`bool`
+    :return: array one longer than the mask, starting at zero
+    :rtype: :class:`numpy.ndarray`
+    """
+    sums = np.zeros(len(mask) + 1, COUNT_DTYPE)
+    np.cumsum(mask, dtype=COUNT_DTYPE, out=sums[1:])
+    return sums
+
+
+class PrefixCounts(object):
+    """Prefix counts of the C's, G's and CpG's in a sequence."""
+    def __init__(self, c_counts, g_counts, cpg_counts):
+        """Constructor.
+
+        :param c_counts: number of C's before each index
+        :type c_counts: :class:`numpy.ndarray`
+        :param g_counts: number of G's before each index
+        :type g_counts: :class:`numpy.ndarray`
+        :param cpg_counts: number of CpG's starting before each index
+        :type cpg_counts: :class:`numpy.ndarray`
+        """
+        self.c_counts = c_counts
+        self.g_counts = g_counts
+        self.cpg_counts = cpg_counts
+
+    @classmethod
+    def from_seq(cls, seq_str):
+        """Count the bases of a sequence.
+
+        :param seq_str: the encoded sequence
+        :type seq_str: :class:`str`, :class:`bytearray` or
+            :class:`buffer`
+        :return: the counts
+        :rtype: :class:`PrefixCounts`
+        :raise: :exc:`ValueError` if the sequence is too long
+        """
+        if len(seq_str) > MAX_SEQ_LEN:
+            raise ValueError('Sequence too long to count: {0}'.format(
+                len(seq_str)))
+        bases = np.frombuffer(seq_str, np.uint8)
+        is_c = bases == ord('C')
+        is_g = bases == ord('G')
+        is_cpg = np.zeros(len(bases), bool)
+        np.logical_and(is_c[:-1], is_g[1:], out=is_cpg[:-1])
+        return cls(_prefix_sum(is_c), _prefix_sum(is_g), _prefix_sum(is_cpg))
+
+    def __len__(self):
+        """Return the length of the counted sequence."""
+        return len(self.c_counts) - 1
+
+    def counts(self, start, end):
+        """Count the bases in a window.
+
+        :param start: inclusive start index
+        :type start: :class:`int`
+        :param end: exclusive end index
+        :type end: :class:`int`
+        :return: a tuple of ``(c_count, g_count, cpg_count)``
+        :rtype: :class:`tuple`
+        """
+        # A CpG is in the window only if its G is too.
+        cpg_end = max(start, end - 1)
+        return (int(self.c_counts[end] - self.c_counts[start]),
+                int(self.g_counts[end] - self.g_counts[start]),
+                int(self.cpg_counts[cpg_end] - self.cpg_counts[start]))
+
+    def ratios(self, starts, ends):
+        """Compute the ratios of many windows at once. Windows lacking
+        either C's or G's have an observed/expected CpG ratio of zero,
+        so they never qualify as islands.
+
+        :param starts: inclusive start indices
+        :type starts: :class:`numpy.ndarray` of :class:`int`
+        :param ends: exclusive end indices
+        :type ends: :class:`numpy.ndarray` of :class:`int`
+        :return: GC ratios and observed/expected CpG ratios
+        :rtype: :class:`tuple` of :class:`numpy.ndarray`
+        """
+        gc_ratios, obs_exp_cpg_ratios, _ = self._ratios(starts, ends)
+        return gc_ratios, obs_exp_cpg_ratios
+
+    def is_island(self, starts, ends, min_gc_ratio, min_obs_exp_cpg_ratio):
+        """Decide whether many windows are islands at once, exactly as
+        the scans would. Windows lacking either C's or G's never are,
+        whatever the minimums.
+
+        :param starts: inclusive start indices
+        :type starts: :class:`numpy.ndarray` of :class:`int`
+        :param ends: exclusive end indices
+        :type ends: :class:`numpy.ndarray` of :class:`int`
+        :param min_gc_ratio: the ratio of GC to other bases
+        :type min_gc_ratio: :class:`float`
+        :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+        :type min_obs_exp_cpg_ratio: :class:`float`
+        :return: whether each window is an island
+        :rtype: :class:`numpy.ndarray` of :class:`bool`
+        """
+        gc_ratios, obs_exp_cpg_ratios, expected = self._ratios(starts, ends)
+        return ((expected > 0) & (gc_ratios >= min_gc_ratio) &
+                (obs_exp_cpg_ratios >= min_obs_exp_cpg_ratio))
+
+    def _ratios(self, starts, ends):
+        """Compute the ratios of many windows, and the expected number
+        of CpG's in each.
+
+        :return: GC ratios, observed/expected CpG ratios and expected
+            CpG counts
+        :rtype: :class:`tuple` of :class:`numpy.ndarray`
+        """
+        starts = np.asarray(starts, np.intp)
+        ends = np.asarray(ends, np.intp)
+        lengths = (ends - starts).astype(float)
+        c_counts = (self.c_counts[ends] -
+                    self.c_counts[starts]).astype(float)
+        g_counts = (self.g_counts[ends] -
+                    self.g_counts[starts]).astype(float)
+        cpg_counts = (self.cpg_counts[np.maximum(starts, ends - 1)] -
+                      self.cpg_counts[starts]).astype(float)
+        gc_ratios = (c_counts + g_counts) / lengths
+        # Same order of operations as the scans, so that ratios agree
+        # to the last bit.
+        expected = (c_counts * g_counts) / lengths
+        obs_exp_cpg_ratios = np.zeros(len(lengths))
+        np.divide(cpg_counts, expected, out=obs_exp_cpg_ratios,
+                  where=expected > 0)
+        return gc_ratios, obs_exp_cpg_ratios, expected
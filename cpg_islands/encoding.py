@@ -0,0 +1,345 @@
+""":mod:`cpg_islands.encoding` --- Compact sequence representation
+
+The algorithms only need the bases of a sequence, so sequences are
+kept in an *encoded* form: a buffer of uppercase ASCII letters with
+line breaks and other formatting removed.
+"""
+
+from cStringIO import StringIO
+import re
+import string
+
+from Bio import SeqIO
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+from Bio.Alphabet import IUPAC
+
+CHUNK_SIZE = 64 * 1024
+"""Number of bytes to read from a handle at a time when streaming."""
+
+_UPPERCASE_TABLE = string.maketrans(string.ascii_lowercase,
+                                    string.ascii_uppercase)
+_FORMATTING_CHARS = string.whitespace + string.digits
+
+_GENBANK_ID_RES = [re.compile(r'^{0} +(\S+)'.format(keyword), re.MULTILINE)
+                   for keyword in ['VERSION', 'ACCESSION', 'LOCUS']]
+
+
+def encode_chunk(chunk):
+    """Encode part of a sequence's text.
+
+    :param chunk: raw sequence text, possibly containing line breaks,
+        spaces, and position numbers
+    :type chunk: :class:`str`
+    :return: the encoded bases
+    :rtype: :class:`str`
+    """
+    return chunk.translate(_UPPERCASE_TABLE, _FORMATTING_CHARS)
+
+
+class FastaRecord(object):
+    """A record streamed from FASTA text."""
+    def __init__(self, title, bases):
+        """Constructor.
+
+        :param title: the header line, without the leading ``>``
+        :type title: :class:`str`
+        :param bases: the encoded sequence
+        :type bases: :class:`bytearray`
+        """
+        self.title = title
+        self.bases = bases
+
+    @property
+    def id(self):
+        """The record's identifier, i.e., the first word of its title.
+
+        :rtype: :class:`str`
+        """
+        fields = self.title.split(None, 1)
+        return fields[0] if fields else ''
+
+    def to_fasta(self):
+        """Format the record as FASTA text.
+
+        :return: the FASTA text
+        :rtype: :class:`str`
+        """
+        return '>{0}\n{1}\n'.format(self.title, self.bases)
+
+    def to_seq_record(self):
+        """Convert to a Biopython record.
+
+        :return: the record
+        :rtype: :class:`SeqRecord`
+        """
+        return SeqRecord(Seq(str(self.bases), IUPAC.unambiguous_dna),
+                         id=self.id, name=self.id,
+                         description=self.title)
+
+
+def iter_fasta(handle, chunk_size=CHUNK_SIZE):
+    """Stream records from a FASTA handle, encoding each sequence as
+    it is read rather than building per-line strings.
+
+    :param handle: the FASTA text
+    :type handle: file-like object
+    :param chunk_size: number of bytes to read at a time
+    :type chunk_size: :class:`int`
+    :return: the records
+    :rtype: iterator of :class:`FastaRecord`
+    :raise: :exc:`ValueError` if the text is not FASTA
+    """
+    record = None
+    pending = ''
+    while True:
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            break
+        text = pending + chunk
+        pending = ''
+        start = 0
+        while True:
+            header_start = text.find('>', start)
+            if header_start == -1:
+                _extend(record, text[start:])
+                break
+            _extend(record, text[start:header_start])
+            header_end = text.find('\n', header_start)
+            if header_end == -1:
+                # The header continues in the next chunk.
+                pending = text[header_start:]
+                break
+            if record is not None:
+                yield record
+            record = FastaRecord(
+                text[header_start + 1:header_end].rstrip('\r'), bytearray())
+            start = header_end + 1
+    if pending:
+        if record is not None:
+            yield record
+        record = FastaRecord(pending[1:].rstrip('\r\n'), bytearray())
+    if record is not None:
+        yield record
+
+
+def _extend(record, text):
+    """Append sequence text to a record's encoded bases.
+
+    :param record: the record being read, or :data:`None` if no header
+        has been seen yet
+    :type record: :class:`FastaRecord`
+    :param text: raw sequence text
+    :type text: :class:`str`
+    :raise: :exc:`ValueError` if there is sequence text before the
+        first header
+    """
+    bases = encode_chunk(text)
+    if not bases:
+        return
+    if record is None:
+        raise ValueError('FASTA text must begin with a header line')
+    record.bases.extend(bases)
+
+
+def read_fasta(handle, chunk_size=CHUNK_SIZE):
+    """Stream exactly one record from a FASTA handle.
+
+    :param handle: the FASTA text
+    :type handle: file-like object
+    :param chunk_size: number of bytes to read at a time
+    :type chunk_size: :class:`int`
+    :return: the record
+    :rtype: :class:`FastaRecord`
+    :raise: :exc:`ValueError` if there is not exactly one record
+    """
+    records = iter_fasta(handle, chunk_size)
+    try:
+        record = next(records)
+    except StopIteration:
+        raise ValueError('No records found in handle')
+    for _ in records:
+        raise ValueError('More than one record found in handle')
+    return record
+
+
+class GenBankRecord(object):
+    """A record read from GenBank text. Only the sequence is decoded
+    when the record is read; the header, with its references and
+    features, is parsed when first asked for.
+    """
+    def __init__(self, header_text, bases):
+        """Constructor.
+
+        :param header_text: the record's text before its ``ORIGIN``
+            line
+        :type header_text: :class:`str`
+        :param bases: the encoded sequence
+        :type bases: :class:`bytearray`
+        """
+        self.header_text = header_text
+        self.bases = bases
+        self._header = None
+
+    @property
+    def id(self):
+        """The record's identifier, taken from its ``VERSION``,
+        ``ACCESSION`` or ``LOCUS`` line in that order of preference, as
+        Biopython takes it, but without parsing the header.
+
+        :rtype: :class:`str`
+        """
+        for id_re in _GENBANK_ID_RES:
+            match = id_re.search(self.header_text)
+            if match:
+                return match.group(1)
+        return ''
+
+    @property
+    def header(self):
+        """The record parsed from its header, without its sequence.
+
+        :rtype: :class:`SeqRecord`
+        :raise: :exc:`ValueError` if the header cannot be parsed
+        """
+        if self._header is None:
+            self._header = SeqIO.read(
+                StringIO(self.header_text + 'ORIGIN\n//\n'), 'genbank')
+        return self._header
+
+    def to_seq_record(self):
+        """Convert to a Biopython record, parsing the header.
+
+        :return: the record
+        :rtype: :class:`SeqRecord`
+        :raise: :exc:`ValueError` if the header cannot be parsed
+        """
+        header = self.header
+        return SeqRecord(Seq(str(self.bases), IUPAC.unambiguous_dna),
+                         id=header.id, name=header.name,
+                         description=header.description,
+                         dbxrefs=header.dbxrefs[:],
+                         features=header.features[:],
+                         annotations=header.annotations.copy())
+
+
+def read_genbank(handle, chunk_size=CHUNK_SIZE):
+    """Read exactly one record from a GenBank handle. Lines are only
+    split up to the ``ORIGIN`` line; the sequence after it is read in
+    chunks and encoded straight into a buffer.
+
+    :param handle: the GenBank text
+    :type handle: file-like object
+    :param chunk_size: number of bytes of sequence to read at a time
+    :type chunk_size: :class:`int`
+    :return: the record
+    :rtype: :class:`GenBankRecord`
+    :raise: :exc:`ValueError` if there is not exactly one record
+    """
+    header_text, has_origin = _read_genbank_header(handle)
+    record = GenBankRecord(header_text, bytearray())
+    if has_origin:
+        rest = _read_genbank_bases(handle, chunk_size, record.bases)
+    else:
+        # The record has no sequence of its own, e.g. it is assembled
+        # from others; Biopython knows what to make of it.
+        record.bases.extend(encode_chunk(str(record.header.seq)))
+        rest = ''
+    # Anything but blank lines after the terminator is another record.
+    while True:
+        if rest.strip():
+            raise ValueError('More than one record found in handle')
+        rest = handle.read(chunk_size)
+        if not rest:
+            return record
+
+
+def iter_genbank_record_ends(text):
+    """Find the end of each record in concatenated GenBank text, i.e.,
+    the end of its ``//`` terminator line plus any blank lines which
+    follow. Only the terminators are searched for, so records can be
+    split without being parsed.
+
+    :param text: the concatenated records
+    :type text: :class:`str` or :class:`mmap.mmap`
+    :return: indices just past the end of each record
+    :rtype: iterator of :class:`int`
+    """
+    index = 0
+    while True:
+        index = text.find('//', index)
+        if index == -1:
+            return
+        # Terminators are the only lines consisting of `//'.
+        line_end = text.find('\n', index)
+        line_end = len(text) if line_end == -1 else line_end + 1
+        if ((index == 0 or text[index - 1] == '\n') and
+                not text[index + 2:line_end].strip()):
+            # The blank gap between records belongs to the record
+            # before it, so that every record begins with `LOCUS'.
+            while line_end < len(text) and text[line_end] in ' \t\r\n':
+                line_end += 1
+            yield line_end
+            index = line_end
+        else:
+            index += 2
+
+
+def _read_genbank_header(handle):
+    """Read the lines of a GenBank record up to its sequence, skipping
+    anything before its ``LOCUS`` line.
+
+    :param handle: the GenBank text
+    :type handle: file-like object
+    :return: the header text, and whether the record has an ``ORIGIN``
+        line rather than ending straight after its header
+    :rtype: :class:`tuple`
+    :raise: :exc:`ValueError` if the text ends before the sequence
+    """
+    lines = []
+    while True:
+        line = handle.readline()
+        if not line:
+            if not lines:
+                raise ValueError('No records found in handle')
+            raise ValueError('Premature end of line during sequence data')
+        if not lines and not line.startswith('LOCUS'):
+            continue
+        if line.startswith('ORIGIN'):
+            return ''.join(lines), True
+        lines.append(line)
+        if line.startswith('//'):
+            return ''.join(lines[:-1]), False
+
+
+def _read_genbank_bases(handle, chunk_size, bases):
+    """Encode the sequence of a GenBank record, up to its ``//``
+    terminator.
+
+    :param handle: the GenBank text, just after the ``ORIGIN`` line
+    :type handle: file-like object
+    :param chunk_size: number of bytes to read at a time
+    :type chunk_size: :class:`int`
+    :param bases: buffer to append the encoded bases to
+    :type bases: :class:`bytearray`
+    :return: the text read beyond the terminator line
+    :rtype: :class:`str`
+    :raise: :exc:`ValueError` if the text ends before the terminator
+    """
+    while True:
+        chunk = handle.read(chunk_size)
+        if not chunk:
+            raise ValueError('Premature end of file in sequence data')
+        # Slashes never appear in sequence data, so the terminator
+        # can't be split between chunks without its first slash
+        # showing.
+        end = chunk.find('/')
+        if end == -1:
+            bases.extend(encode_chunk(chunk))
+            continue
+        bases.extend(encode_chunk(chunk[:end]))
+        line_end = chunk.find('\n', end)
+        if line_end == -1:
+            handle.readline()
+            return ''
+        return chunk[line_end + 1:]
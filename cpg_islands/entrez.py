@@ -0,0 +1,400 @@
+""":mod:`cpg_islands.entrez` --- Helpers for talking to NCBI Entrez
+"""
+
+import httplib
+import os
+import socket
+import sys
+import threading
+import time
+import urllib
+import urlparse
+
+from cpg_islands import metadata
+from cpg_islands.encoding import iter_genbank_record_ends
+
+NCBI_REQUESTS_PER_SECOND = 3
+"""The number of requests per second NCBI allows without an API key."""
+
+NCBI_API_KEY_REQUESTS_PER_SECOND = 10
+"""The number of requests per second NCBI allows with an API key."""
+
+EUTILS_URL = 'https://eutils.ncbi.nlm.nih.gov/entrez/eutils/'
+"""Base URL of the Entrez Programming Utilities."""
+
+API_KEY_VARIABLE = 'NCBI_API_KEY'
+"""Environment variable holding the user's NCBI API key, if any."""
+
+
+class RateLimiter(object):
+    """Token bucket limiting how often requests may be made. Instances
+    may be shared between threads.
+    """
+    def __init__(self, rate, capacity=None,
+                 clock=time.time, sleep=time.sleep):
+        """Constructor.
+
+        :param rate: tokens added to the bucket per second
+        :type rate: :class:`float`
+        :param capacity: maximum number of tokens in the bucket, i.e.,
+            the largest burst allowed; defaults to ``rate``
+        :type capacity: :class:`float`
+        :param clock: function returning the current time in seconds
+        :type clock: callable
+        :param sleep: function sleeping for a number of seconds
+        :type sleep: callable
+        """
+        if rate <= 0:
+            raise ValueError('Invalid rate: {0}'.format(rate))
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token from the bucket, going into debt if it is
+        empty.
+
+        :return: seconds to wait before the token may be used
+        :rtype: :class:`float`
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request may be made."""
+        delay = self._reserve()
+        if delay > 0:
+            self._sleep(delay)
+
+
+def split_genbank(text):
+    """Split the text of several concatenated GenBank records, as
+    returned by a batched ``efetch``, into the text of each record.
+
+    :param text: the concatenated records
+    :type text: :class:`str`
+    :return: the text of each record, including its ``//`` terminator
+        and any blank lines following it
+    :rtype: :class:`list` of :class:`str`
+    """
+    records = []
+    start = 0
+    for record_end in iter_genbank_record_ends(text):
+        records.append(text[start:record_end])
+        start = record_end
+    return records
+
+
+class EntrezError(Exception):
+    """Raised when Entrez responds with an error."""
+    def __init__(self, status, reason, retry_after=None):
+        """Constructor.
+
+        :param status: the HTTP status code
+        :type status: :class:`int`
+        :param reason: the HTTP reason phrase
+        :type reason: :class:`str`
+        :param retry_after: seconds Entrez asked to wait before
+            retrying, if it said
+        :type retry_after: :class:`float`
+        """
+        super(EntrezError, self).__init__(
+            'Entrez error {0}: {1}'.format(status, reason))
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value):
+    """Read the delay from a ``Retry-After`` header. Only the form
+    giving a number of seconds is understood.
+
+    :param value: the header's value, or :data:`None` if it was absent
+    :type value: :class:`str`
+    :return: seconds to wait, or :data:`None` if not given as such
+    :rtype: :class:`float`
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResponseHandle(object):
+    """Handle to the body of a response, read from the connection as
+    it is needed. The connection goes back to its client's pool once
+    the body has been read to the end, or is closed if the handle is
+    closed before then.
+    """
+    def __init__(self, client, connection, response):
+        """Constructor.
+
+        :param client: the client which made the request
+        :type client: :class:`EntrezClient`
+        :param connection: the connection the response arrives on
+        :type connection: :class:`httplib.HTTPConnection`
+        :param response: the response, whose headers have been read
+        :type response: :class:`httplib.HTTPResponse`
+        """
+        self._client = client
+        self._connection = connection
+        self._response = response
+
+    @property
+    def closed(self):
+        """Whether the handle has been closed or read to the end."""
+        return self._response is None
+
+    def read(self, size=-1):
+        """Read from the body.
+
+        :param size: maximum number of bytes to read, or a negative
+            number to read the rest of the body
+        :type size: :class:`int`
+        :return: the bytes, or an empty string at the end of the body
+        :rtype: :class:`str`
+        """
+        if self.closed:
+            return ''
+        data = self._response.read() if size < 0 else self._response.read(size)
+        if size < 0 or not data:
+            self._release(True)
+        return data
+
+    def close(self):
+        """Stop reading the body."""
+        if not self.closed:
+            # A connection can't be reused until its response is read.
+            self._release(False)
+
+    def _release(self, finished):
+        """Return the connection to the pool, or close it.
+
+        :param finished: whether the body has been read to the end
+        :type finished: :class:`bool`
+        """
+        if finished and not self._response.will_close:
+            self._client._checkin(self._connection)
+        else:
+            self._connection.close()
+        self._response = None
+        self._connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class EntrezClient(object):
+    """Client for the Entrez utilities which keeps connections alive
+    between requests, stays within NCBI's rate limit, and retries
+    requests which fail for transient reasons. Instances may be shared
+    between threads.
+
+    Each utility is a method taking the utility's parameters as
+    keyword arguments and returning a :class:`ResponseHandle`, which
+    streams the response body, e.g.::
+
+        handle = client.esearch(db='nucleotide', term='human')
+        results = Bio.Entrez.read(handle)
+    """
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+    """HTTP statuses for which a request is retried."""
+
+    def __init__(self, base_url=EUTILS_URL, email=None, tool=None,
+                 api_key=None, rate_limiter=None, max_connections=4,
+                 max_retries=3, backoff=0.5, timeout=60, sleep=time.sleep):
+        """Constructor.
+
+        :param base_url: URL of the directory containing the utilities
+        :type base_url: :class:`str`
+        :param email: contact address sent with each request
+        :type email: :class:`str`
+        :param tool: name of the application sent with each request
+        :type tool: :class:`str`
+        :param api_key: NCBI API key, which raises the rate limit
+        :type api_key: :class:`str`
+        :param rate_limiter: limiter for all requests; defaults to
+            NCBI's limit with or without an API key
+        :type rate_limiter: :class:`RateLimiter`
+        :param max_connections: number of idle connections to keep open
+        :type max_connections: :class:`int`
+        :param max_retries: number of times to retry a failed request
+        :type max_retries: :class:`int`
+        :param backoff: seconds to wait before the first retry; the wait
+            doubles with each retry, unless Entrez says how long to wait
+        :type backoff: :class:`float`
+        :param timeout: socket timeout in seconds
+        :type timeout: :class:`float`
+        :param sleep: function sleeping for a number of seconds
+        :type sleep: callable
+        """
+        parts = urlparse.urlsplit(base_url)
+        self._connection_class = (httplib.HTTPSConnection
+                                  if parts.scheme == 'https'
+                                  else httplib.HTTPConnection)
+        self._host = parts.netloc
+        self._path = parts.path.rstrip('/') + '/'
+        self._common_params = dict(
+            (key, value) for key, value in [
+                ('email', email), ('tool', tool), ('api_key', api_key)]
+            if value is not None)
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(
+                NCBI_REQUESTS_PER_SECOND if api_key is None
+                else NCBI_API_KEY_REQUESTS_PER_SECOND)
+        self.rate_limiter = rate_limiter
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._sleep = sleep
+        self._idle_connections = []
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        """Number of connections opened so far, for measuring how well
+        connections are being reused."""
+
+    def esearch(self, **params):
+        """Search a database. See :meth:`request`."""
+        return self.request('esearch', **params)
+
+    def esummary(self, **params):
+        """Retrieve document summaries. See :meth:`request`."""
+        return self.request('esummary', **params)
+
+    def efetch(self, **params):
+        """Retrieve records. See :meth:`request`."""
+        return self.request('efetch', **params)
+
+    def espell(self, **params):
+        """Retrieve spelling suggestions. See :meth:`request`."""
+        return self.request('espell', **params)
+
+    def request(self, utility, **params):
+        """Make a request, retrying with exponential backoff if it
+        fails for a transient reason. Entrez's ``Retry-After`` header,
+        if sent, is waited for instead.
+
+        :param utility: name of the utility, e.g. ``esearch``
+        :type utility: :class:`str`
+        :param params: the utility's parameters
+        :return: handle to the response body, which should be read to
+            the end or closed so that its connection may be reused
+        :rtype: :class:`ResponseHandle`
+        :raise: :exc:`EntrezError` if Entrez responds with an error
+        :raise: :exc:`IOError` if Entrez cannot be reached
+        """
+        params.update(self._common_params)
+        # POST so that long id lists don't overflow the URL.
+        body = urllib.urlencode(params)
+        delay = self.backoff
+        retry_after = None
+        for attempt in xrange(self.max_retries + 1):
+            if attempt:
+                self._sleep(delay if retry_after is None else retry_after)
+                delay *= 2
+            self.rate_limiter.acquire()
+            try:
+                return self._post(utility, body)
+            except EntrezError as error:
+                if error.status not in self.RETRY_STATUSES:
+                    raise
+                retry_after = error.retry_after
+                exc_info = sys.exc_info()
+            except (socket.error, httplib.HTTPException):
+                retry_after = None
+                exc_info = sys.exc_info()
+        raise exc_info[0], exc_info[1], exc_info[2]
+
+    def _post(self, utility, body):
+        """Make a single request on a pooled connection.
+
+        :param utility: name of the utility
+        :type utility: :class:`str`
+        :param body: the encoded parameters
+        :type body: :class:`str`
+        :return: handle to the response body
+        :rtype: :class:`ResponseHandle`
+        :raise: :exc:`EntrezError` if Entrez responds with an error
+        """
+        connection, reused = self._checkout()
+        try:
+            connection.request(
+                'POST', '{0}{1}.fcgi'.format(self._path, utility), body,
+                {'Content-Type': 'application/x-www-form-urlencoded'})
+            response = connection.getresponse()
+        except (socket.error, httplib.HTTPException):
+            connection.close()
+            if not reused:
+                raise
+            # The server may have closed the connection while it sat
+            # idle, which is no reason to back off.
+            return self._post(utility, body)
+        handle = ResponseHandle(self, connection, response)
+        if response.status != httplib.OK:
+            # Error bodies are short; reading them frees the connection.
+            handle.read()
+            raise EntrezError(
+                response.status, response.reason,
+                _parse_retry_after(response.getheader('Retry-After')))
+        return handle
+
+    def _checkout(self):
+        """Take an idle connection from the pool, or open a new one.
+
+        :return: the connection, and whether it has been used before
+        :rtype: :class:`tuple`
+        """
+        with self._lock:
+            if self._idle_connections:
+                return self._idle_connections.pop(), True
+            self.connections_opened += 1
+        return (self._connection_class(self._host, timeout=self.timeout),
+                False)
+
+    def _checkin(self, connection):
+        """Return a connection to the pool, closing it if the pool is
+        full.
+
+        :param connection: the connection
+        :type connection: :class:`httplib.HTTPConnection`
+        """
+        with self._lock:
+            if len(self._idle_connections) < self.max_connections:
+                self._idle_connections.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        """Close all idle connections."""
+        with self._lock:
+            connections = self._idle_connections
+            self._idle_connections = []
+        for connection in connections:
+            connection.close()
+
+
+def create_client():
+    """Create a client identifying this application to NCBI, using the
+    API key in the :data:`API_KEY_VARIABLE` environment variable if it
+    is set.
+
+    :return: the client
+    :rtype: :class:`EntrezClient`
+    """
+    return EntrezClient(email=metadata.emails[0], tool=metadata.title,
+                        api_key=os.environ.get(API_KEY_VARIABLE) or None)
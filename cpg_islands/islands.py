@@ -0,0 +1,808 @@
+""":mod:`cpg_islands.islands` --- Finding islands without the GUI
+
+Functions for using the algorithms directly, e.g., from a pipeline.
+Nothing here builds :class:`SeqRecord` or :class:`SeqFeature` objects
+or fires events, so calls on short sequences stay cheap.
+"""
+
+from Bio.Seq import Seq, MutableSeq
+import numpy as np
+
+from cpg_islands.algorithms import registry, validate_parameters
+from cpg_islands.counts import PrefixCounts
+from cpg_islands.shared import SharedSequence, MIN_SHARED_LEN
+from cpg_islands.tasks import ProcessExecutor, checkpoint
+
+DEFAULT_ENGINE = 'accumulating_sliding_window'
+"""Identifier of the algorithm used when none is given."""
+
+DEFAULT_ISLAND_SIZE = 200
+"""Default number of bases which an island may contain."""
+
+DEFAULT_MIN_GC_RATIO = 0.5
+"""Default minimum ratio of GC to other bases."""
+
+DEFAULT_MIN_OBS_EXP_CPG_RATIO = 0.6
+"""Default minimum observed-to-expected CpG ratio."""
+
+MAX_CACHED_LEN = 10 ** 7
+"""Longest sequence for which :class:`CachedIslandFinder` should be
+used. The finder keeps about 17 bytes per base, so longer sequences
+are better scanned afresh by worker processes."""
+
+_MULTISCALE_CHUNK_LEN = 1 << 20
+"""Number of window starts evaluated at once by
+:func:`find_islands_multiscale`, bounding its memory use."""
+
+_ENGINES = dict((algo.id, algo) for algo in registry)
+
+
+class IslandArrays(object):
+    """Container class for islands, stored as one array per field."""
+    def __init__(self, starts, ends, gc_ratios, obs_exp_cpg_ratios):
+        """Constructor.
+
+        :param starts: island start indices
+        :type starts: :class:`numpy.ndarray` of :class:`int`
+        :param ends: exclusive island end indices
+        :type ends: :class:`numpy.ndarray` of :class:`int`
+        :param gc_ratios: island GC ratios
+        :type gc_ratios: :class:`numpy.ndarray` of :class:`float`
+        :param obs_exp_cpg_ratios: island observed/expected CpG ratios
+        :type obs_exp_cpg_ratios: :class:`numpy.ndarray` of :class:`float`
+        """
+        self.starts = starts
+        self.ends = ends
+        self.gc_ratios = gc_ratios
+        self.obs_exp_cpg_ratios = obs_exp_cpg_ratios
+
+    @classmethod
+    def from_tuples(cls, island_tuples):
+        """Collect islands into arrays.
+
+        :param island_tuples: ``(start, end, gc_ratio,
+            obs_exp_cpg_ratio)`` tuple for each island
+        :type island_tuples: iterable of :class:`tuple`
+        :return: the islands
+        :rtype: :class:`IslandArrays`
+        """
+        island_tuples = list(island_tuples)
+        if not island_tuples:
+            return cls(np.empty(0, np.intp), np.empty(0, np.intp),
+                       np.empty(0), np.empty(0))
+        starts, ends, gc_ratios, obs_exp_cpg_ratios = zip(*island_tuples)
+        return cls(np.array(starts, np.intp), np.array(ends, np.intp),
+                   np.array(gc_ratios, float),
+                   np.array(obs_exp_cpg_ratios, float))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        """Iterate over ``(start, end, gc_ratio, obs_exp_cpg_ratio)``
+        tuples for each island.
+        """
+        return iter(zip(self.starts.tolist(), self.ends.tolist(),
+                        self.gc_ratios.tolist(),
+                        self.obs_exp_cpg_ratios.tolist()))
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+def as_seq_str(seq):
+    """Convert a sequence to the string the algorithms scan, copying it
+    only if necessary.
+
+    :param seq: the sequence
+    :type seq: :class:`str`, :class:`bytearray`, :class:`memoryview`,
+        :class:`unicode`, :class:`Bio.Seq.Seq`, or
+        :class:`cpg_islands.shared.SharedSequence`
+    :return: the sequence as a string, or a view of a shared sequence
+        which may be used like one
+    :rtype: :class:`str` or :class:`buffer`
+    :raise: :exc:`TypeError` if the sequence is not of a supported type
+    """
+    if isinstance(seq, str):
+        return seq
+    if isinstance(seq, SharedSequence):
+        return seq.bases
+    if isinstance(seq, memoryview):
+        return seq.tobytes()
+    if isinstance(seq, unicode):
+        return seq.encode('ascii')
+    if isinstance(seq, (bytearray, Seq, MutableSeq)):
+        return str(seq)
+    raise TypeError('Unsupported sequence type: {0}'.format(
+        type(seq).__name__))
+
+
+def get_engine(engine):
+    """Look up an algorithm.
+
+    :param engine: the algorithm's identifier, or the algorithm itself
+    :type engine: :class:`str` or
+        :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :return: the algorithm
+    :rtype: :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :raise: :exc:`ValueError` if there is no such algorithm
+    """
+    if not isinstance(engine, basestring):
+        return engine
+    try:
+        return _ENGINES[engine]
+    except KeyError:
+        raise ValueError('Unknown engine: {0}'.format(engine))
+
+
+def iter_islands(seq, island_size, min_gc_ratio, min_obs_exp_cpg_ratio,
+                 engine=DEFAULT_ENGINE, masked_intervals=None):
+    """Find CpG islands in a sequence, yielding each one as soon as the
+    scan moves past its end. Parameters are checked right away rather
+    than on the first iteration.
+
+    :param seq: the sequence; only uppercase bases are counted, so
+        encode it with :func:`cpg_islands.encoding.encode_chunk` first
+    :type seq: see :func:`as_seq_str`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param engine: the algorithm to use; see :func:`get_engine`
+    :type engine: :class:`str` or
+        :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :param masked_intervals: ``(start, end)`` tuples of regions to
+        exclude from the scan, or :data:`None` to scan everything
+    :type masked_intervals: :class:`list` of :class:`tuple`
+    :return: ``(start, end, gc_ratio, obs_exp_cpg_ratio)`` tuple for
+        each island, with exclusive end indices
+    :rtype: iterator of :class:`tuple`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    seq_str = as_seq_str(seq)
+    algo = get_engine(engine)
+    validate_parameters(len(seq_str), island_size, min_gc_ratio,
+                        min_obs_exp_cpg_ratio)
+    if masked_intervals is not None:
+        return iter(algo.masked_scan(seq_str, island_size, min_gc_ratio,
+                                     min_obs_exp_cpg_ratio, masked_intervals))
+    return iter(algo.scan(seq_str, island_size, min_gc_ratio,
+                          min_obs_exp_cpg_ratio))
+
+
+def validate_merging(merge_gap, min_length):
+    """Check that the parameters for :func:`merge_islands` make sense.
+
+    :param merge_gap: see :func:`merge_islands`
+    :type merge_gap: :class:`int`
+    :param min_length: see :func:`merge_islands`
+    :type min_length: :class:`int`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    if merge_gap < 0:
+        raise ValueError('Invalid merge gap: {0}'.format(merge_gap))
+    if min_length < 0:
+        raise ValueError('Invalid minimum length: {0}'.format(min_length))
+
+
+def merge_islands(islands, counts, min_gc_ratio, min_obs_exp_cpg_ratio,
+                  merge_gap, min_length=0):
+    """Merge islands separated by fewer than ``merge_gap`` bases, as
+    Takai and Jones (2002) do, then drop islands shorter than
+    ``min_length``. Scans resume at the end of each island, so
+    ``merge_gap=1`` joins islands which abut.
+
+    The ratios of merged islands are recomputed from prefix counts and
+    tested against the island definition again; merged islands which
+    no longer meet it are dropped. All of the work is vectorized, so
+    millions of islands may be merged at once.
+
+    :param islands: the islands, in order
+    :type islands: :class:`IslandArrays`
+    :param counts: prefix counts of the sequence the islands are in
+    :type counts: :class:`cpg_islands.counts.PrefixCounts`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param merge_gap: islands with fewer bases than this between them
+        are merged
+    :type merge_gap: :class:`int`
+    :param min_length: minimum length of an island after merging
+    :type min_length: :class:`int`
+    :return: the merged islands
+    :rtype: :class:`IslandArrays`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    validate_merging(merge_gap, min_length)
+    if not len(islands):
+        return islands
+    separate = islands.starts[1:] - islands.ends[:-1] >= merge_gap
+    # Indices of the first and last island of each merged island.
+    firsts = np.concatenate(([0], np.flatnonzero(separate) + 1))
+    lasts = np.concatenate((np.flatnonzero(separate), [len(islands) - 1]))
+    starts = islands.starts[firsts]
+    ends = islands.ends[lasts]
+    gc_ratios = islands.gc_ratios[firsts]
+    obs_exp_cpg_ratios = islands.obs_exp_cpg_ratios[firsts]
+    merged = lasts > firsts
+    keep = ends - starts >= min_length
+    if merged.any():
+        gc_ratios[merged], obs_exp_cpg_ratios[merged] = counts.ratios(
+            starts[merged], ends[merged])
+        keep[merged] &= counts.is_island(
+            starts[merged], ends[merged], min_gc_ratio,
+            min_obs_exp_cpg_ratio)
+    return IslandArrays(starts[keep], ends[keep], gc_ratios[keep],
+                        obs_exp_cpg_ratios[keep])
+
+
+def find_islands(seq, island_size, min_gc_ratio, min_obs_exp_cpg_ratio,
+                 engine=DEFAULT_ENGINE, masked_intervals=None, merge_gap=0,
+                 min_length=0):
+    """Find CpG islands in a sequence, optionally merging them with
+    :func:`merge_islands`.
+
+    :param seq: the sequence; only uppercase bases are counted, so
+        encode it with :func:`cpg_islands.encoding.encode_chunk` first
+    :type seq: see :func:`as_seq_str`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param engine: the algorithm to use; see :func:`get_engine`
+    :type engine: :class:`str` or
+        :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :param masked_intervals: see :func:`iter_islands`
+    :type masked_intervals: :class:`list` of :class:`tuple`
+    :param merge_gap: see :func:`merge_islands`; zero merges nothing
+    :type merge_gap: :class:`int`
+    :param min_length: see :func:`merge_islands`
+    :type min_length: :class:`int`
+    :return: the islands
+    :rtype: :class:`IslandArrays`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    validate_merging(merge_gap, min_length)
+    islands = IslandArrays.from_tuples(iter_islands(
+        seq, island_size, min_gc_ratio, min_obs_exp_cpg_ratio, engine,
+        masked_intervals))
+    if not (merge_gap or min_length):
+        return islands
+    counts = (seq.counts if isinstance(seq, SharedSequence)
+              else PrefixCounts.from_seq(as_seq_str(seq)))
+    return merge_islands(islands, counts, min_gc_ratio,
+                         min_obs_exp_cpg_ratio, merge_gap, min_length)
+
+
+def update_islands(old_seq, old_islands, seq, island_size, min_gc_ratio,
+                   min_obs_exp_cpg_ratio, engine=DEFAULT_ENGINE):
+    """Find CpG islands in an edited sequence, given the islands found
+    in it before the edit with the same parameters.
+
+    Outside an island an exact scan holds no state but its position.
+    Islands ending before the edit are kept, and the scan restarts at
+    the last such position before it. It then runs only until it
+    reaches a position after the edit at which neither it nor the
+    original scan was inside an island. From there both scans see the
+    same bases, so the rest of the islands are the original ones,
+    shifted by the change in length. The work done is bounded by the
+    edit and the islands it affects, not the length of the sequence.
+
+    Engines which are not exact are simply run again.
+
+    :param old_seq: the sequence before the edit
+    :type old_seq: see :func:`as_seq_str`
+    :param old_islands: islands found in ``old_seq`` with the same
+        parameters and engine
+    :type old_islands: :class:`IslandArrays`
+    :param seq: the edited sequence
+    :type seq: see :func:`as_seq_str`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param engine: the algorithm to use; see :func:`get_engine`
+    :type engine: :class:`str` or
+        :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :return: the islands in ``seq``
+    :rtype: :class:`IslandArrays`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    old_str = as_seq_str(old_seq)
+    seq_str = as_seq_str(seq)
+    algo = get_engine(engine)
+    validate_parameters(len(seq_str), island_size, min_gc_ratio,
+                        min_obs_exp_cpg_ratio)
+    if not algo.exact:
+        return find_islands(seq_str, island_size, min_gc_ratio,
+                            min_obs_exp_cpg_ratio, algo)
+    prefix_len, suffix_len = _common_affix_lens(old_str, seq_str)
+    return _splice_islands(seq, old_islands, len(old_str), prefix_len,
+                           suffix_len, island_size, min_gc_ratio,
+                           min_obs_exp_cpg_ratio, algo)
+
+
+def _splice_islands(seq, old_islands, old_len, prefix_len, suffix_len,
+                    island_size, min_gc_ratio, min_obs_exp_cpg_ratio,
+                    engine):
+    """Find the islands of an edited sequence once the edit has been
+    located; see :func:`update_islands`. The original sequence isn't
+    needed, so this may run in a worker process which wasn't sent it.
+
+    :param seq: the edited sequence
+    :type seq: see :func:`as_seq_str`
+    :param old_islands: islands found before the edit
+    :type old_islands: :class:`IslandArrays`
+    :param old_len: length of the sequence before the edit
+    :type old_len: :class:`int`
+    :param prefix_len: length of the part before the edit, which both
+        sequences share
+    :type prefix_len: :class:`int`
+    :param suffix_len: length of the shared part after the edit
+    :type suffix_len: :class:`int`
+    :param engine: the exact algorithm to use; see :func:`get_engine`
+    :type engine: :class:`str` or
+        :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :return: the islands in ``seq``
+    :rtype: :class:`IslandArrays`
+    """
+    seq_str = as_seq_str(seq)
+    algo = get_engine(engine)
+    if prefix_len == old_len == len(seq_str):
+        return old_islands
+    # Scans look one base past the end of an island to find it, so
+    # only islands ending before the edit are certainly unchanged.
+    kept = np.searchsorted(old_islands.ends, prefix_len)
+    scan_start = int(old_islands.ends[kept - 1]) if kept else 0
+    # Windows clear of the edit which weren't islands still aren't.
+    next_start = (int(old_islands.starts[kept]) if kept < len(old_islands)
+                  else len(seq_str))
+    scan_start = max(scan_start,
+                     min(next_start, prefix_len - island_size + 1))
+    shift = len(seq_str) - old_len
+    splice_index, found = _scan_to_splice(
+        algo, seq_str, scan_start, len(seq_str) - suffix_len,
+        old_islands.starts + shift, old_islands.ends + shift, island_size,
+        min_gc_ratio, min_obs_exp_cpg_ratio)
+    found = IslandArrays.from_tuples(found)
+    reused = np.searchsorted(old_islands.starts + shift, splice_index)
+    return IslandArrays(*[
+        np.concatenate((old_field[:kept], found_field,
+                        old_field[reused:] + field_shift))
+        for old_field, found_field, field_shift in [
+            (old_islands.starts, found.starts, shift),
+            (old_islands.ends, found.ends, shift),
+            (old_islands.gc_ratios, found.gc_ratios, 0),
+            (old_islands.obs_exp_cpg_ratios, found.obs_exp_cpg_ratios, 0)]])
+
+
+def _common_affix_lens(old_str, seq_str):
+    """Measure how much two sequences have in common at each end.
+
+    :param old_str: one sequence
+    :type old_str: :class:`str`
+    :param seq_str: the other sequence
+    :type seq_str: :class:`str`
+    :return: lengths of the common prefix and suffix, which don't
+        overlap in either sequence
+    :rtype: :class:`tuple` of :class:`int`
+    """
+    old_bases = np.frombuffer(old_str, np.uint8)
+    bases = np.frombuffer(seq_str, np.uint8)
+    common_len = min(len(old_bases), len(bases))
+    differ = np.flatnonzero(old_bases[:common_len] != bases[:common_len])
+    prefix_len = int(differ[0]) if len(differ) else common_len
+    tail_len = common_len - prefix_len
+    differ = np.flatnonzero(
+        old_bases[len(old_bases) - tail_len:][::-1] !=
+        bases[len(bases) - tail_len:][::-1])
+    suffix_len = int(differ[0]) if len(differ) else tail_len
+    return prefix_len, suffix_len
+
+
+def _splice_index(starts, ends, index):
+    """Find the first index at or after ``index`` strictly inside none
+    of some islands.
+
+    :param starts: sorted island start indices
+    :type starts: :class:`numpy.ndarray` of :class:`int`
+    :param ends: exclusive island end indices
+    :type ends: :class:`numpy.ndarray` of :class:`int`
+    :param index: the index to start from
+    :type index: :class:`int`
+    :return: the index
+    :rtype: :class:`int`
+    """
+    before = np.searchsorted(starts, index)
+    if before and ends[before - 1] > index:
+        # Scans resume at the end of an island, so no island starts
+        # before the end of the last.
+        return int(ends[before - 1])
+    return index
+
+
+def _scan_to_splice(algo, seq_str, scan_start, edit_end, old_starts,
+                    old_ends, island_size, min_gc_ratio,
+                    min_obs_exp_cpg_ratio):
+    """Scan an edited sequence from a point at which the scan is
+    outside any island, until the new and original scans agree.
+
+    :param algo: the exact algorithm to scan with
+    :type algo: :class:`cpg_islands.algorithms.MetaAlgorithm`
+    :param seq_str: the edited sequence
+    :type seq_str: :class:`str`
+    :param scan_start: where to start scanning
+    :type scan_start: :class:`int`
+    :param edit_end: exclusive end of the edit in the edited sequence
+    :type edit_end: :class:`int`
+    :param old_starts: start indices of the original islands, shifted
+        to the edited sequence's coordinates
+    :type old_starts: :class:`numpy.ndarray` of :class:`int`
+    :param old_ends: exclusive end indices of the original islands,
+        likewise shifted
+    :type old_ends: :class:`numpy.ndarray` of :class:`int`
+    :return: the index from which the original islands hold, and the
+        islands found before it
+    :rtype: :class:`tuple`
+    """
+    seq_len = len(seq_str)
+    target = edit_end
+    found = []
+    while True:
+        splice_index = _splice_index(old_starts, old_ends, target)
+        # Give the last window before the splice room to fit.
+        limit = min(splice_index + island_size - 1, seq_len)
+        blocking = None
+        # Scans need room for at least one window.
+        slice_islands = (
+            algo.scan(seq_str[scan_start:limit], island_size,
+                      min_gc_ratio, min_obs_exp_cpg_ratio)
+            if limit - scan_start >= island_size else [])
+        for island in slice_islands:
+            start = scan_start + island[0]
+            end = scan_start + island[1]
+            if start >= splice_index:
+                break
+            if end > splice_index or end == limit < seq_len:
+                # The new scan is inside an island at the splice, or
+                # the island may carry on past the slice.
+                blocking = start, end
+                break
+            found.append((start, end) + island[2:])
+        if blocking is None:
+            return splice_index, found
+        # Try again past the island, rescanning from its start.
+        scan_start, target = blocking
+
+
+def find_islands_multiscale(seq, island_sizes, min_gc_ratio,
+                            min_obs_exp_cpg_ratio):
+    """Find the CpG islands of the sliding window definition for each
+    of several island sizes, e.g. 200, 500 and 1000 to compare the
+    conventions of Gardiner-Garden and Frommer (1987) and Takai and
+    Jones (2002).
+
+    The sequence is counted once, and every window of every size is
+    then evaluated from the same prefix counts in one vectorized pass.
+    Only growing each island to its full length is done one island at
+    a time. This is far cheaper than a scan per size, and the islands
+    are exactly those which any of the exact engines would find.
+
+    :param seq: the sequence; see :func:`find_islands`
+    :type seq: see :func:`as_seq_str`
+    :param island_sizes: the sizes to find islands for
+    :type island_sizes: :class:`list` of :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :return: the islands for each size, in the order given
+    :rtype: :class:`list` of :class:`IslandArrays`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    seq_str = as_seq_str(seq)
+    seq_len = len(seq_str)
+    for island_size in island_sizes:
+        validate_parameters(seq_len, island_size, min_gc_ratio,
+                            min_obs_exp_cpg_ratio)
+    counts = (seq.counts if isinstance(seq, SharedSequence)
+              else PrefixCounts.from_seq(seq_str))
+    # Starts of the windows of each size which are islands.
+    window_starts = [[] for _ in island_sizes]
+    for chunk_start in xrange(0, seq_len, _MULTISCALE_CHUNK_LEN):
+        checkpoint()
+        starts = np.arange(chunk_start,
+                           min(chunk_start + _MULTISCALE_CHUNK_LEN, seq_len))
+        for island_size, found in zip(island_sizes, window_starts):
+            sized_starts = starts[
+                :max(seq_len - island_size + 1 - chunk_start, 0)]
+            found.append(sized_starts[counts.is_island(
+                sized_starts, sized_starts + island_size, min_gc_ratio,
+                min_obs_exp_cpg_ratio)])
+    return [IslandArrays.from_tuples(_grow_islands(
+        counts, np.concatenate(found), island_size, min_gc_ratio,
+        min_obs_exp_cpg_ratio))
+        for island_size, found in zip(island_sizes, window_starts)]
+
+
+class CachedIslandFinder(object):
+    """Finds the islands of the sliding window definition in one
+    sequence again and again as the definition changes, e.g., while a
+    user explores thresholds.
+
+    The sequence's prefix counts are kept, as are the ratios of every
+    window of the last island size used. Changing only the minimum
+    ratios then costs just a comparison of those ratios with the new
+    minimums, and growing each island to its full length. The ratios
+    take about 17 bytes per base, so the finder suits sequences of up
+    to :data:`MAX_CACHED_LEN` bases. Instances are not safe to use from
+    more than one thread at a time.
+    """
+    def __init__(self, seq):
+        """Constructor. The sequence is counted when first needed.
+
+        :param seq: the sequence
+        :type seq: see :func:`as_seq_str`
+        """
+        self.seq_str = as_seq_str(seq)
+        self._counts = None
+        self._island_size = None
+        self._window_ratios = None
+
+    @property
+    def counts(self):
+        """Prefix counts of the sequence.
+
+        :rtype: :class:`cpg_islands.counts.PrefixCounts`
+        """
+        if self._counts is None:
+            self._counts = PrefixCounts.from_seq(self.seq_str)
+        return self._counts
+
+    def _ratios_for_size(self, island_size):
+        """Return whether each window of a size has both C's and G's,
+        and its ratios, computing them if the size has changed.
+
+        :param island_size: the number of bases in each window
+        :type island_size: :class:`int`
+        :return: a mask and two arrays of ratios, indexed by the start
+            of each window
+        :rtype: :class:`tuple` of :class:`numpy.ndarray`
+        """
+        if island_size != self._island_size:
+            counts = self.counts
+            window_count = len(counts) - island_size + 1
+            has_c_and_g = (
+                (counts.c_counts[island_size:] >
+                 counts.c_counts[:window_count]) &
+                (counts.g_counts[island_size:] >
+                 counts.g_counts[:window_count]))
+            starts = np.arange(window_count)
+            self._window_ratios = ((has_c_and_g,) + counts.ratios(
+                starts, starts + island_size))
+            self._island_size = island_size
+        return self._window_ratios
+
+    def find(self, island_size, min_gc_ratio, min_obs_exp_cpg_ratio):
+        """Find the islands, exactly as the exact engines would.
+
+        :param island_size: the number of bases which an island may contain
+        :type island_size: :class:`int`
+        :param min_gc_ratio: the ratio of GC to other bases
+        :type min_gc_ratio: :class:`float`
+        :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+        :type min_obs_exp_cpg_ratio: :class:`float`
+        :return: the islands
+        :rtype: :class:`IslandArrays`
+        :raise: :exc:`ValueError` when parameters are invalid
+        """
+        validate_parameters(len(self.seq_str), island_size, min_gc_ratio,
+                            min_obs_exp_cpg_ratio)
+        has_c_and_g, gc_ratios, obs_exp_cpg_ratios = self._ratios_for_size(
+            island_size)
+        checkpoint()
+        window_starts = np.flatnonzero(
+            has_c_and_g & (gc_ratios >= min_gc_ratio) &
+            (obs_exp_cpg_ratios >= min_obs_exp_cpg_ratio))
+        return IslandArrays.from_tuples(_grow_islands(
+            self.counts, window_starts, island_size, min_gc_ratio,
+            min_obs_exp_cpg_ratio))
+
+
+def _grow_islands(counts, window_starts, island_size, min_gc_ratio,
+                  min_obs_exp_cpg_ratio):
+    """Follow the sliding window scan from one island window to the
+    next, growing each into an island.
+
+    :param counts: prefix counts of the sequence
+    :type counts: :class:`cpg_islands.counts.PrefixCounts`
+    :param window_starts: sorted starts of the windows which are islands
+    :type window_starts: :class:`numpy.ndarray` of :class:`int`
+    :return: ``(start, end, gc_ratio, obs_exp_cpg_ratio)`` tuple for
+        each island, in order
+    :rtype: iterator of :class:`tuple`
+    """
+    end = 0
+    while True:
+        checkpoint()
+        # The scan resumes at the end of the last island.
+        index = np.searchsorted(window_starts, end)
+        if index == len(window_starts):
+            return
+        start = int(window_starts[index])
+        end = _island_end(counts, start, island_size, min_gc_ratio,
+                          min_obs_exp_cpg_ratio)
+        gc_ratios, obs_exp_cpg_ratios = counts.ratios([start], [end])
+        yield start, end, float(gc_ratios[0]), float(obs_exp_cpg_ratios[0])
+
+
+def _island_end(counts, start, island_size, min_gc_ratio,
+                min_obs_exp_cpg_ratio):
+    """Grow an island window for as long as it stays an island.
+
+    :param counts: prefix counts of the sequence
+    :type counts: :class:`cpg_islands.counts.PrefixCounts`
+    :param start: start of the window, which must be an island
+    :type start: :class:`int`
+    :return: exclusive end of the island
+    :rtype: :class:`int`
+    """
+    seq_len = len(counts)
+    end = start + island_size
+    step = island_size
+    while end < seq_len:
+        # Try ever longer stretches of extensions at once.
+        ends = np.arange(end + 1, min(end + step, seq_len) + 1)
+        failed = np.flatnonzero(~counts.is_island(
+            start, ends, min_gc_ratio, min_obs_exp_cpg_ratio))
+        if len(failed):
+            return int(ends[failed[0]]) - 1
+        end = int(ends[-1])
+        step *= 2
+    return end
+
+
+def submit_islands(executor, seq, island_size, min_gc_ratio,
+                   min_obs_exp_cpg_ratio, engine=DEFAULT_ENGINE,
+                   masked_intervals=None, merge_gap=0, min_length=0):
+    """Find CpG islands in a sequence in the background. Cancelling the
+    returned task stops the scan even once it has started: thread
+    executors abandon it at its next checkpoint, and
+    :class:`cpg_islands.tasks.ProcessExecutor` ends its worker.
+
+    Long sequences bound for worker processes are published as a
+    :class:`cpg_islands.shared.SharedSequence` rather than pickled,
+    and unpublished once the task is done.
+
+    :param executor: executor to run the scan
+    :type executor: :class:`cpg_islands.tasks.ThreadExecutor` or
+        :class:`cpg_islands.tasks.ProcessExecutor`
+    :param seq: the sequence; see :func:`find_islands`
+    :type seq: see :func:`as_seq_str`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param engine: identifier of the algorithm to use
+    :type engine: :class:`str`
+    :param masked_intervals: see :func:`iter_islands`
+    :type masked_intervals: :class:`list` of :class:`tuple`
+    :param merge_gap: see :func:`merge_islands`; zero merges nothing
+    :type merge_gap: :class:`int`
+    :param min_length: see :func:`merge_islands`
+    :type min_length: :class:`int`
+    :return: task whose result is an :class:`IslandArrays`
+    :rtype: :class:`cpg_islands.tasks.Task`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    # Fail fast in the caller rather than in the background. The
+    # string is converted here since memoryviews can't be pickled.
+    seq_str = as_seq_str(seq)
+    get_engine(engine)
+    validate_parameters(len(seq_str), island_size, min_gc_ratio,
+                        min_obs_exp_cpg_ratio)
+    validate_merging(merge_gap, min_length)
+    return _submit_shared(
+        executor, find_islands, seq, seq_str, True, island_size,
+        min_gc_ratio, min_obs_exp_cpg_ratio, engine, masked_intervals,
+        merge_gap, min_length)
+
+
+def submit_update(executor, old_seq, old_islands, seq, island_size,
+                  min_gc_ratio, min_obs_exp_cpg_ratio,
+                  engine=DEFAULT_ENGINE):
+    """Update the islands of an edited sequence in the background; see
+    :func:`update_islands`. The edit is located in the calling process,
+    so the original sequence is never sent. A long edited sequence
+    bound for a worker process is published as a
+    :class:`cpg_islands.shared.SharedSequence` without its prefix
+    counts, which the update doesn't need, so that each edit costs
+    little more than the scan around it.
+
+    :param executor: executor to run the update
+    :type executor: :class:`cpg_islands.tasks.ThreadExecutor` or
+        :class:`cpg_islands.tasks.ProcessExecutor`
+    :param old_seq: the sequence before the edit
+    :type old_seq: see :func:`as_seq_str`
+    :param old_islands: islands found in ``old_seq`` with the same
+        parameters and engine
+    :type old_islands: :class:`IslandArrays`
+    :param seq: the edited sequence
+    :type seq: see :func:`as_seq_str`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param engine: identifier of the algorithm to use
+    :type engine: :class:`str`
+    :return: task whose result is an :class:`IslandArrays`
+    :rtype: :class:`cpg_islands.tasks.Task`
+    :raise: :exc:`ValueError` when parameters are invalid
+    """
+    seq_str = as_seq_str(seq)
+    algo = get_engine(engine)
+    validate_parameters(len(seq_str), island_size, min_gc_ratio,
+                        min_obs_exp_cpg_ratio)
+    if not algo.exact:
+        return submit_islands(executor, seq, island_size, min_gc_ratio,
+                              min_obs_exp_cpg_ratio, engine)
+    old_str = as_seq_str(old_seq)
+    prefix_len, suffix_len = _common_affix_lens(old_str, seq_str)
+    return _submit_shared(
+        executor, _splice_islands, seq, seq_str, False, old_islands,
+        len(old_str), prefix_len, suffix_len, island_size, min_gc_ratio,
+        min_obs_exp_cpg_ratio, engine)
+
+
+def _submit_shared(executor, func, seq, seq_str, with_counts, *args):
+    """Submit a function taking a sequence as its first argument,
+    publishing long sequences bound for worker processes and
+    unpublishing them once the task is done.
+
+    :param executor: the executor
+    :type executor: :class:`cpg_islands.tasks.ThreadExecutor` or
+        :class:`cpg_islands.tasks.ProcessExecutor`
+    :param func: the function
+    :type func: callable
+    :param seq: the sequence as given
+    :type seq: see :func:`as_seq_str`
+    :param seq_str: the sequence as a string
+    :type seq_str: :class:`str` or :class:`buffer`
+    :param with_counts: whether the function needs prefix counts
+    :type with_counts: :class:`bool`
+    :param args: the function's other arguments
+    :return: the task
+    :rtype: :class:`cpg_islands.tasks.Task`
+    """
+    if (isinstance(executor, ProcessExecutor) and
+            not isinstance(seq, SharedSequence) and
+            len(seq_str) >= MIN_SHARED_LEN):
+        shared = SharedSequence.publish(seq_str, with_counts=with_counts)
+        task = executor.submit(func, shared, *args)
+        task.add_done_callback(lambda task: shared.unlink())
+        return task
+    if isinstance(seq, SharedSequence):
+        # Send the handle, not the view.
+        seq_str = seq
+    return executor.submit(func, seq_str, *args)
+
+
+def warm_up():
+    """Prepare a worker process to find islands, so that its first job
+    isn't slowed down. Suitable as an executor's initializer.
+    """
+    find_islands('CG', 2, 0, 0)
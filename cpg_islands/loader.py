@@ -0,0 +1,217 @@
+""":mod:`cpg_islands.loader` --- Parallel loading of multi-record files
+
+Parsing a large multi-record file one record after another can take
+longer than scanning its records for islands. The file is instead
+memory-mapped and split at record boundaries, which only requires
+searching for the lines which begin records, and each record's byte
+range is handed to a worker process. Workers parse and encode their
+record and find its islands straight away, so that only the islands
+travel back.
+"""
+
+import mmap
+
+from cpg_islands.encoding import (read_fasta, read_genbank,
+                                  iter_genbank_record_ends)
+from cpg_islands.islands import find_islands
+
+FASTA_FORMATS = frozenset(['fasta'])
+"""Biopython names of the FASTA format which can be split."""
+
+GENBANK_FORMATS = frozenset(['genbank', 'gb'])
+"""Biopython names of the GenBank format which can be split."""
+
+SPLIT_FORMATS = FASTA_FORMATS | GENBANK_FORMATS
+"""Biopython names of all formats which can be split."""
+
+
+class RecordError(ValueError):
+    """Raised when islands cannot be found in a record which was
+    otherwise read successfully.
+    """
+    def __init__(self, record_id, reason):
+        """Constructor.
+
+        :param record_id: the record's identifier
+        :type record_id: :class:`str`
+        :param reason: why the record couldn't be scanned
+        :type reason: :class:`str`
+        """
+        # Both are arguments so that the error survives pickling.
+        super(RecordError, self).__init__(record_id, reason)
+        self.record_id = record_id
+        self.reason = reason
+
+    def __str__(self):
+        return self.reason
+
+
+class RecordRanges(object):
+    """Byte ranges of the records in a sequence file."""
+    def __init__(self, path, file_format, ranges):
+        """Constructor. Use :meth:`scan` to find the ranges of a file.
+
+        :param path: path to the file
+        :type path: :class:`str`
+        :param file_format: Biopython name of the file's format; see
+            :data:`SPLIT_FORMATS`
+        :type file_format: :class:`str`
+        :param ranges: ``(start, end)`` offsets of each record
+        :type ranges: :class:`list` of :class:`tuple`
+        """
+        self.path = path
+        self.file_format = file_format
+        self.ranges = ranges
+
+    @classmethod
+    def scan(cls, path, file_format):
+        """Find the records in a file without parsing them.
+
+        :param path: path to the file
+        :type path: :class:`str`
+        :param file_format: Biopython name of the file's format; see
+            :data:`SPLIT_FORMATS`
+        :type file_format: :class:`str`
+        :return: the ranges
+        :rtype: :class:`RecordRanges`
+        :raise: :exc:`ValueError` if the format cannot be split
+        :raise: :exc:`IOError` if the file cannot be read
+        """
+        if file_format not in SPLIT_FORMATS:
+            raise ValueError('Format cannot be split: {0}'.format(
+                file_format))
+        with open(path, 'rb') as handle:
+            handle.seek(0, 2)
+            if not handle.tell():
+                # Empty files cannot be mapped.
+                return cls(path, file_format, [])
+            mapping = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if file_format in FASTA_FORMATS:
+                ranges = _find_fasta_ranges(mapping)
+            else:
+                ranges = _find_genbank_ranges(mapping)
+        finally:
+            mapping.close()
+        return cls(path, file_format, ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+
+def _find_fasta_ranges(mapping):
+    """Split FASTA text before each header line. Anything before the
+    first header is skipped, as Biopython does.
+
+    :param mapping: the text
+    :type mapping: :class:`mmap.mmap`
+    :return: ``(start, end)`` offsets of each record
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    starts = [0] if mapping[:1] == '>' else []
+    index = 0
+    while True:
+        index = mapping.find('\n>', index)
+        if index == -1:
+            break
+        index += 1
+        starts.append(index)
+    ends = starts[1:] + [len(mapping)]
+    return zip(starts, ends)
+
+
+def _find_genbank_ranges(mapping):
+    """Split GenBank text after each ``//`` terminator line. Text after
+    the last terminator is a range of its own unless it is blank, so
+    that a truncated record is reported rather than dropped.
+
+    :param mapping: the text
+    :type mapping: :class:`mmap.mmap`
+    :return: ``(start, end)`` offsets of each record
+    :rtype: :class:`list` of :class:`tuple`
+    """
+    ranges = []
+    start = 0
+    for end in iter_genbank_record_ends(mapping):
+        ranges.append((start, end))
+        start = end
+    if mapping[start:].strip():
+        ranges.append((start, len(mapping)))
+    return ranges
+
+
+def read_record(path, file_format, start, end):
+    """Read and encode the record in a byte range of a file.
+
+    :param path: path to the file
+    :type path: :class:`str`
+    :param file_format: Biopython name of the file's format; see
+        :data:`SPLIT_FORMATS`
+    :type file_format: :class:`str`
+    :param start: offset of the record's first byte
+    :type start: :class:`int`
+    :param end: offset just past the record's last byte
+    :type end: :class:`int`
+    :return: the record's identifier and encoded bases
+    :rtype: :class:`tuple`
+    :raise: :exc:`ValueError` if the range is not exactly one record
+    """
+    # Mappings must begin on a page boundary.
+    offset = start - start % mmap.ALLOCATIONGRANULARITY
+    with open(path, 'rb') as handle:
+        mapping = mmap.mmap(handle.fileno(), end - offset,
+                            access=mmap.ACCESS_READ, offset=offset)
+    try:
+        # Reading the mapping stops at the end of the range.
+        mapping.seek(start - offset)
+        if file_format in FASTA_FORMATS:
+            record = read_fasta(mapping)
+        else:
+            record = read_genbank(mapping)
+    finally:
+        mapping.close()
+    return record.id, record.bases
+
+
+def find_record_islands(path, file_format, start, end, island_size,
+                        min_gc_ratio, min_obs_exp_cpg_ratio, engine,
+                        merge_gap=0, min_length=0):
+    """Read the record in a byte range of a file and find its islands.
+    Suitable for running in a worker process.
+
+    :param path: path to the file
+    :type path: :class:`str`
+    :param file_format: see :func:`read_record`
+    :type file_format: :class:`str`
+    :param start: see :func:`read_record`
+    :type start: :class:`int`
+    :param end: see :func:`read_record`
+    :type end: :class:`int`
+    :param island_size: the number of bases which an island may contain
+    :type island_size: :class:`int`
+    :param min_gc_ratio: the ratio of GC to other bases
+    :type min_gc_ratio: :class:`float`
+    :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+    :type min_obs_exp_cpg_ratio: :class:`float`
+    :param engine: identifier of the algorithm to use
+    :type engine: :class:`str`
+    :param merge_gap: see :func:`cpg_islands.islands.merge_islands`
+    :type merge_gap: :class:`int`
+    :param min_length: see :func:`cpg_islands.islands.merge_islands`
+    :type min_length: :class:`int`
+    :return: the record's identifier and its islands
+    :rtype: :class:`tuple`
+    :raise: :exc:`ValueError` if the range is not exactly one record
+    :raise: :exc:`RecordError` if the parameters don't suit the record
+    """
+    record_id, bases = read_record(path, file_format, start, end)
+    try:
+        islands = find_islands(bases, island_size, min_gc_ratio,
+                               min_obs_exp_cpg_ratio, engine,
+                               merge_gap=merge_gap, min_length=min_length)
+    except ValueError as error:
+        raise RecordError(record_id, str(error))
+    return record_id, islands
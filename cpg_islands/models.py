@@ -3,6 +3,10 @@
 
 import argparse
 from abc import ABCMeta, abstractmethod
+from cStringIO import StringIO
+from functools import partial
+import os
+import threading
 import timeit
 
 from Bio import Entrez, SeqIO
@@ -10,8 +14,12 @@ from Bio.SeqRecord import SeqRecord
 from Bio.Seq import Seq
 from Bio.Alphabet import IUPAC
 
-from cpg_islands import metadata, algorithms
-from cpg_islands.utils import Event
+from cpg_islands import metadata, algorithms, islands
+from cpg_islands.encoding import iter_fasta, read_fasta, read_genbank
+from cpg_islands.tasks import ImmediateExecutor, checkpoint
+from cpg_islands.entrez import (RateLimiter, NCBI_REQUESTS_PER_SECOND,
+                                split_genbank)
+from cpg_islands.utils import Event, LRUCache, ProgressFile, call_directly
 
 
 class IslandInfo(object):
@@ -71,6 +79,19 @@ class MetaAppModel(object):
     .. function:: callback()
     """
 
+    file_load_progressed = Event()
+    """Fired as a file is loaded in the background. Callbacks should
+    look like:
+
+    .. function:: callback(bytes_read, total_bytes)
+
+        :param bytes_read: number of bytes of the file read so far;
+            once it equals ``total_bytes``, loading has finished
+        :type bytes_read: :class:`int`
+        :param total_bytes: size of the file
+        :type total_bytes: :class:`int`
+    """
+
     @abstractmethod
     def register_for_events(self):
         """Register for events fired by other models."""
@@ -90,6 +111,20 @@ class MetaAppModel(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def cancel_file_load(self):
+        """Direct pass-through to
+        :func:`MetaSeqInputModel.cancel_file_load()`.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def shutdown(self):
+        """Called when the application exits. Stops any computation
+        and the worker pool.
+        """
+        raise NotImplementedError()
+
 
 class MetaSeqInputModel(object):
     __metaclass__ = ABCMeta
@@ -145,6 +180,19 @@ class MetaSeqInputModel(object):
 
     """
 
+    file_load_progressed = Event()
+    """Fired as a file is loaded in the background. Callbacks should
+    look like:
+
+    .. function:: callback(bytes_read, total_bytes)
+
+        :param bytes_read: number of bytes of the file read so far;
+            once it equals ``total_bytes``, loading has finished
+        :type bytes_read: :class:`int`
+        :param total_bytes: size of the file
+        :type total_bytes: :class:`int`
+    """
+
     @abstractmethod
     def set_island_definition_defaults(self):
         """Set the default island definitions.
@@ -165,10 +213,17 @@ class MetaSeqInputModel(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def cancel_file_load(self):
+        """Abandon the file being loaded by :meth:`load_file`, if it is
+        still loading.
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def compute_islands(
             self, seq, island_size, min_gc_ratio,
-            min_obs_exp_cpg_ratio, algo_index):
+            min_obs_exp_cpg_ratio, algo_index, masked_intervals=None):
         """Create a list of CpG island features in a sequence.
 
         :param seq: the sequence to analyze
@@ -181,10 +236,39 @@ class MetaSeqInputModel(object):
         :type min_obs_exp_cpg_ratio: :class:`float`
         :param algo_index: the index of the algorithm to use
         :type algo_index: :class:`int`
+        :param masked_intervals: ``(start, end)`` tuples of regions to
+            exclude from the scan, or :data:`None` to scan everything
+        :type masked_intervals: :class:`list` of :class:`tuple`
+        :raise: :exc:`ValueError` when parameters are invalid
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def recompute_islands(self, island_size, min_gc_ratio,
+                          min_obs_exp_cpg_ratio):
+        """Recompute the islands of the last sequence given to
+        :meth:`compute_islands` with a new island definition, e.g.,
+        while the user is adjusting it. Results go to the results
+        model without firing :attr:`islands_computed`. Does nothing if
+        no islands have been computed yet.
+
+        :param island_size: the number of bases which an island may contain
+        :type island_size: :class:`int`
+        :param min_gc_ratio: the ratio of GC to other bases
+        :type min_gc_ratio: :class:`float`
+        :param min_obs_exp_cpg_ratio: minimum observed to expected CpG's
+        :type min_obs_exp_cpg_ratio: :class:`float`
         :raise: :exc:`ValueError` when parameters are invalid
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def cancel_computation(self):
+        """Abandon the computation started by :meth:`compute_islands`,
+        if it is still running.
+        """
+        raise NotImplementedError()
+
 
 class MetaResultsModel(object):
     islands_computed = Event()
@@ -234,9 +318,86 @@ class MetaEntrezModel(object):
     .. function:: callback()
     """
 
+    suggestion_found = Event()
+    """Fired when a requested spelling suggestion has arrived. Callbacks
+    should look like:
+
+    .. function:: callback(suggestion)
+
+        :param suggestion: the suggested text query
+        :type suggestion: :class:`str`
+    """
+
+    results_found = Event()
+    """Fired when a further page of search results has arrived after
+    :meth:`load_more_results`. Callbacks should look like:
+
+    .. function:: callback(start, id_list)
+
+        :param start: index of the first new result
+        :type start: :class:`int`
+        :param id_list: ids of the new results
+        :type id_list: :class:`list` of :class:`str`
+    """
+
+    titles_found = Event()
+    """Fired when titles requested through :meth:`request_titles` have
+    arrived. Callbacks should look like:
+
+    .. function:: callback(start, titles)
+
+        :param start: index of the first result the titles are for
+        :type start: :class:`int`
+        :param titles: title of each result
+        :type titles: :class:`list` of :class:`str`
+    """
+
+    search_completed = Event()
+    """Fired when a search requested through :meth:`request_search` has
+    completed. Callbacks should look like:
+
+    .. function:: callback(id_list, query_translation)
+
+        :param id_list: ids of the first page of results
+        :type id_list: :class:`list` of :class:`str`
+        :param query_translation: the query as Entrez understood it
+        :type query_translation: :class:`str`
+    """
+
+    search_failed = Event()
+    """Fired when a search requested through :meth:`request_search`
+    has failed. Callbacks should look like:
+
+    .. function:: callback(error_message)
+
+        :param error_message: the error message
+        :type error_message: :class:`str`
+    """
+
+    seq_record_found = Event()
+    """Fired when a record requested through :meth:`request_seq_record`
+    has arrived. Callbacks should look like:
+
+    .. function:: callback(seq_record)
+
+        :param seq_record: the record
+        :type seq_record: :class:`SeqRecord`
+    """
+
+    seq_record_failed = Event()
+    """Fired when a record requested through :meth:`request_seq_record`
+    could not be loaded. Callbacks should look like:
+
+    .. function:: callback(error_message)
+
+        :param error_message: the error message
+        :type error_message: :class:`str`
+    """
+
     @abstractmethod
     def search(self, text):
-        """Search Entrez database.
+        """Search Entrez database. Only the first page of results is
+        returned; more are loaded with :meth:`load_more_results`.
 
         :param text: the text to search
         :type text: :class:`str`
@@ -245,6 +406,39 @@ class MetaEntrezModel(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def request_search(self, text):
+        """Search the Entrez database in the background and fire
+        :attr:`search_completed` or :attr:`search_failed` when done.
+        Any earlier search which has not yet been delivered is
+        abandoned.
+
+        :param text: the text to search
+        :type text: :class:`str`
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def load_more_results(self):
+        """Load the next page of results for the last search in the
+        background and fire :attr:`results_found` when it arrives.
+        Does nothing if all results have been loaded or the next page
+        is already on its way.
+        """
+        raise NotImplementedError()
+
+    @abstractmethod
+    def request_titles(self, start, count):
+        """Look up the titles of a range of results in the background
+        and fire :attr:`titles_found` when they arrive.
+
+        :param start: index of the first result
+        :type start: :class:`int`
+        :param count: number of results
+        :type count: :class:`int`
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def suggest(self, text):
         """Suggested Entrez spelling.
@@ -256,6 +450,17 @@ class MetaEntrezModel(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def request_suggestion(self, text):
+        """Look up the suggested Entrez spelling in the background and
+        fire :attr:`suggestion_found` when it arrives. Any earlier
+        request which has not yet been delivered is abandoned.
+
+        :param text: unchecked text from input
+        :type text: :class:`str`
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def get_seq_record(self, index):
         """Pull sequence based on index.
@@ -267,6 +472,19 @@ class MetaEntrezModel(object):
         """
         raise NotImplementedError()
 
+    @abstractmethod
+    def request_seq_record(self, index):
+        """Pull a sequence in the background and fire
+        :attr:`seq_record_found` or :attr:`seq_record_failed` when
+        done. It becomes the sequence loaded by :meth:`load_seq` once
+        it arrives. Any earlier request which has not yet been
+        delivered is abandoned.
+
+        :param index: the index of the sequence
+        :type index: :class:`int`
+        """
+        raise NotImplementedError()
+
     @abstractmethod
     def load_seq(self):
         """Load the currently selected sequence into SeqInputView."""
@@ -274,16 +492,22 @@ class MetaEntrezModel(object):
 
 
 class AppModel(MetaAppModel):
-    def __init__(self, seq_input_model, entrez_model):
+    def __init__(self, seq_input_model, entrez_model, worker_pool=None):
         """Constructor.
 
         :param type: :class:`MetaSeqInputModel`
+        :param worker_pool: executor shared by computations for the
+            life of the application, which this model shuts down
+        :type worker_pool: :class:`cpg_islands.tasks.ProcessExecutor`
         """
         self.entrez_model = entrez_model
         self.seq_input_model = seq_input_model
+        self.worker_pool = worker_pool
 
     def register_for_events(self):
         self.seq_input_model.islands_computed.append(self.islands_computed)
+        self.seq_input_model.file_load_progressed.append(
+            self.file_load_progressed)
         self.entrez_model.seq_loaded.append(self.seq_loaded)
 
     def run(self, argv):
@@ -316,43 +540,345 @@ URL: <{url}>
     def load_file(self, file_path):
         self.seq_input_model.load_file(file_path)
 
+    def cancel_file_load(self):
+        self.seq_input_model.cancel_file_load()
+
+    def shutdown(self):
+        self.seq_input_model.cancel_file_load()
+        self.seq_input_model.cancel_computation()
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown()
+
 
 class SeqInputModel(MetaSeqInputModel):
-    def __init__(self, results_model):
+    def __init__(self, results_model, executor=None, dispatch=call_directly,
+                 live_executor=None, load_executor=None):
         """Constructor.
 
         :param type: :class:`MetaResultsModel`
+        :param executor: executor to compute islands on, or
+            :data:`None` to compute them in the calling thread
+        :type executor: :class:`cpg_islands.tasks.ProcessExecutor`
+        :param dispatch: dispatcher used to fire events for
+            computations done on the executor
+        :type dispatch: callable
+        :param live_executor: executor to recompute islands on as the
+            island definition changes, or :data:`None` to recompute
+            them in the calling thread; it should run in this process,
+            where the sequence's counts are kept
+        :type live_executor: :class:`cpg_islands.tasks.ThreadExecutor`
+        :param load_executor: executor to load files on, or
+            :data:`None` to load them in the calling thread
+        :type load_executor: :class:`cpg_islands.tasks.ThreadExecutor`
         """
         self.results_model = results_model
+        self.executor = executor
+        self.dispatch = dispatch
+        self.live_executor = live_executor
+        self._compute_task = None
+        # Island definition, sequence and islands of the last
+        # computation which may be updated incrementally.
+        self._last_islands = None
+        # Record, algorithm index and masked intervals of the last
+        # request, which live recomputations reuse.
+        self._last_request = None
+        self._finder = None
+        self.load_executor = load_executor
+        self._load_task = None
+        # Identifies the latest file load, so that reports from loads
+        # since cancelled are ignored.
+        self._load_generation = 0
 
     def set_island_definition_defaults(self):
-        self.island_definition_defaults_set(200, 0.5, 0.6)
+        self.island_definition_defaults_set(
+            islands.DEFAULT_ISLAND_SIZE, islands.DEFAULT_MIN_GC_RATIO,
+            islands.DEFAULT_MIN_OBS_EXP_CPG_RATIO)
 
     def load_algorithms(self):
         algorithm_names = [algo.name for algo in algorithms.registry]
         self.algorithms_loaded(algorithm_names)
 
     def load_file(self, file_path):
+        if self.load_executor is None:
+            try:
+                seq_str = _read_seq(file_path)
+            except ValueError as error:
+                self.error_raised(str(error))
+                return
+            self.file_loaded(seq_str)
+            return
+        self.cancel_file_load()
+        generation = self._load_generation
         try:
-            seq_record = SeqIO.read(file_path, 'genbank')
-        except ValueError as error:
+            total_bytes = os.path.getsize(file_path)
+        except OSError as error:
+            self.error_raised(str(error))
+            return
+
+        def report(bytes_read):
+            # Runs on the loading thread, so cancellation is noticed
+            # between reports.
+            checkpoint()
+            self.dispatch(self._report_load_progress, generation,
+                          bytes_read, total_bytes)
+        report(0)
+        task = self.load_executor.submit(_read_seq, file_path, report)
+        self._load_task = task
+
+        def done(task):
+            self.dispatch(self._deliver_file, generation, total_bytes, task)
+        task.add_done_callback(done)
+
+    def cancel_file_load(self):
+        self._load_generation += 1
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
+
+    def _report_load_progress(self, generation, bytes_read, total_bytes):
+        """Fire :attr:`file_load_progressed` for the latest load.
+
+        :param generation: the load reporting progress
+        :type generation: :class:`int`
+        :param bytes_read: number of bytes read so far
+        :type bytes_read: :class:`int`
+        :param total_bytes: size of the file
+        :type total_bytes: :class:`int`
+        """
+        if generation == self._load_generation:
+            self.file_load_progressed(bytes_read, total_bytes)
+
+    def _deliver_file(self, generation, total_bytes, task):
+        """Show the sequence of a file loaded in the background, unless
+        the load has since been cancelled or superseded.
+
+        :param generation: the load which finished
+        :type generation: :class:`int`
+        :param total_bytes: size of the file
+        :type total_bytes: :class:`int`
+        :param task: the load's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        if generation != self._load_generation:
+            return
+        self._load_task = None
+        self.file_load_progressed(total_bytes, total_bytes)
+        error = task.exception()
+        if error is not None:
             self.error_raised(str(error))
             return
-        self.file_loaded(str(seq_record.seq))
+        self.file_loaded(task.result())
 
     def compute_islands(
             self, seq_record, island_size, min_gc_ratio,
-            min_obs_exp_cpg_ratio, algo_index):
+            min_obs_exp_cpg_ratio, algo_index, masked_intervals=None):
+        self._last_request = (seq_record, algo_index, masked_intervals)
+        self._compute(seq_record, island_size, min_gc_ratio,
+                      min_obs_exp_cpg_ratio, algo_index, masked_intervals)
+
+    def _compute(self, seq_record, island_size, min_gc_ratio,
+                 min_obs_exp_cpg_ratio, algo_index, masked_intervals,
+                 live=False):
+        """Compute islands, on the executor if there is one.
+
+        :param live: whether the computation follows a change to the
+            island definition, rather than the user submitting it
+        :type live: :class:`bool`
+        :raise: :exc:`ValueError` when parameters are invalid
+        """
+        algo = algorithms.registry[algo_index]
+        args = (algo, seq_record, island_size, min_gc_ratio,
+                min_obs_exp_cpg_ratio, masked_intervals)
+        if self.executor is None:
+            results, exec_time = _run_algorithm(*args)
+            self._set_results(algo.name, results, exec_time, live)
+            return
+        self.cancel_computation()
+        # Only the sequence is sent to the workers, and only the island
+        # tuples come back; the record is annotated here.
+        seq_str = str(seq_record.seq)
+        definition = (island_size, min_gc_ratio, min_obs_exp_cpg_ratio, algo)
+        # Exact scans of unmasked sequences may be updated after edits.
+        computation = ((definition, seq_str)
+                       if algo.exact and masked_intervals is None else None)
         start = timeit.default_timer()
+        task = self._submit_islands(seq_str, definition, masked_intervals,
+                                    computation)
+        self._compute_task = task
+
+        def done(task):
+            exec_time = timeit.default_timer() - start
+            self.dispatch(self._deliver_islands, seq_record, algo.name,
+                          exec_time, task, computation, live)
+        task.add_done_callback(done)
+
+    def recompute_islands(self, island_size, min_gc_ratio,
+                          min_obs_exp_cpg_ratio):
+        if self._last_request is None:
+            return
+        seq_record, algo_index, masked_intervals = self._last_request
         algo = algorithms.registry[algo_index]
+        if (not algo.exact or masked_intervals is not None or
+                len(seq_record.seq) > islands.MAX_CACHED_LEN):
+            # Only the exact scans of whole sequences share the
+            # finder's results, and long sequences would make its
+            # ratios too big to keep.
+            self._finder = None
+            self._compute(seq_record, island_size, min_gc_ratio,
+                          min_obs_exp_cpg_ratio, algo_index,
+                          masked_intervals, live=True)
+            return
+        self.cancel_computation()
+        finder = self._get_finder(str(seq_record.seq))
+        definition = (island_size, min_gc_ratio, min_obs_exp_cpg_ratio, algo)
+        algorithms.validate_parameters(len(finder.seq_str), *definition[:3])
+        executor = (ImmediateExecutor() if self.live_executor is None
+                    else self.live_executor)
+        start = timeit.default_timer()
+        task = executor.submit(finder.find, *definition[:3])
+        self._compute_task = task
+
+        def done(task):
+            exec_time = timeit.default_timer() - start
+            self.dispatch(self._deliver_islands, seq_record, algo.name,
+                          exec_time, task, (definition, finder.seq_str), True)
+        task.add_done_callback(done)
+
+    def _get_finder(self, seq_str):
+        """Return the finder for a sequence, keeping the last one if
+        the sequence hasn't changed.
+
+        :param seq_str: the sequence
+        :type seq_str: :class:`str`
+        :return: the finder
+        :rtype: :class:`cpg_islands.islands.CachedIslandFinder`
+        """
+        if self._finder is None or self._finder.seq_str != seq_str:
+            self._finder = islands.CachedIslandFinder(seq_str)
+        return self._finder
+
+    def _submit_islands(self, seq_str, definition, masked_intervals,
+                        computation):
+        """Start computing islands on the executor. If only part of the
+        sequence has changed since the last computation of the same
+        kind, only the islands around the change are recomputed.
+
+        :param seq_str: the sequence
+        :type seq_str: :class:`str`
+        :param definition: the island size, minimum ratios and algorithm
+        :type definition: :class:`tuple`
+        :param masked_intervals: regions to skip, or :data:`None`
+        :type masked_intervals: :class:`list` of :class:`tuple`
+        :param computation: the definition and sequence, if the results
+            may be updated later, otherwise :data:`None`
+        :type computation: :class:`tuple`
+        :return: task whose result is an
+            :class:`cpg_islands.islands.IslandArrays`
+        :rtype: :class:`cpg_islands.tasks.Task`
+        :raise: :exc:`ValueError` when parameters are invalid
+        """
+        last = self._last_islands
+        if (computation is None or last is None or
+                last[0] != definition):
+            return islands.submit_islands(
+                self.executor, seq_str, *(definition + (masked_intervals,)))
+        return islands.submit_update(self.executor, last[1], last[2],
+                                     seq_str, *definition)
+
+    def cancel_computation(self):
+        if self._compute_task is not None:
+            self._compute_task.cancel()
+            self._compute_task = None
+
+    def _deliver_islands(self, seq_record, algo_name, exec_time, task,
+                         computation=None, live=False):
+        """Show the results of a computation run on the executor,
+        unless it has since been cancelled or superseded.
+
+        :param seq_record: the sequence record to annotate
+        :type seq_record: :class:`SeqRecord`
+        :param algo_name: name of the algorithm used
+        :type algo_name: :class:`str`
+        :param exec_time: seconds taken to compute the results
+        :type exec_time: :class:`float`
+        :param task: the computation's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        :param computation: the island definition and sequence, if the
+            results may be updated after edits
+        :type computation: :class:`tuple`
+        :param live: whether the computation followed a change to the
+            island definition
+        :type live: :class:`bool`
+        """
+        if task.cancelled() or task.cancel_requested:
+            return
+        if task is self._compute_task:
+            self._compute_task = None
+        error = task.exception()
+        if error is not None:
+            self.error_raised(str(error))
+            return
+        island_arrays = task.result()
+        self._last_islands = (None if computation is None
+                              else computation + (island_arrays,))
+        self._set_results(
+            algo_name, algorithms.make_results(seq_record, island_arrays),
+            exec_time, live)
 
-        seq_record = algo.algorithm(
-            seq_record, island_size, min_gc_ratio, min_obs_exp_cpg_ratio)
+    def _set_results(self, algo_name, results, exec_time, live=False):
+        """Hand finished results to the results model.
 
-        end = timeit.default_timer()
+        :param algo_name: name of the algorithm used
+        :type algo_name: :class:`str`
+        :param results: the results
+        :type results: :class:`cpg_islands.algorithms.AlgoResults`
+        :param exec_time: seconds taken to compute the results
+        :type exec_time: :class:`float`
+        :param live: whether the results followed a change to the
+            island definition, which shouldn't take the user away from
+            adjusting it
+        :type live: :class:`bool`
+        """
+        self.results_model.set_results(results, algo_name, exec_time)
+        if not live:
+            self.islands_computed()
+
+
+def _read_seq(file_path, report=None):
+    """Read the sequence of a GenBank file. Its header is skipped
+    without being parsed, since only the sequence is shown.
+
+    :param file_path: the path to the file
+    :type file_path: :class:`str`
+    :param report: called with the number of bytes read now and then
+    :type report: callable
+    :return: the sequence
+    :rtype: :class:`str`
+    :raise: :exc:`ValueError` if the file cannot be parsed
+    """
+    with open(file_path) as handle:
+        if report is not None:
+            handle = ProgressFile(handle, report)
+        return str(read_genbank(handle).bases)
 
-        self.results_model.set_results(seq_record, algo.name, end - start)
-        self.islands_computed()
+
+def _run_algorithm(algo, seq_record, island_size, min_gc_ratio,
+                   min_obs_exp_cpg_ratio, masked_intervals):
+    """Run an algorithm and time it.
+
+    :return: the results, and the seconds taken to compute them
+    :rtype: :class:`tuple`
+    """
+    start = timeit.default_timer()
+    if masked_intervals is None:
+        results = algo.algorithm(
+            seq_record, island_size, min_gc_ratio, min_obs_exp_cpg_ratio)
+    else:
+        results = algo.masked_algorithm(
+            seq_record, island_size, min_gc_ratio, min_obs_exp_cpg_ratio,
+            masked_intervals)
+    end = timeit.default_timer()
+    return results, end - start
 
 
 class ResultsModel(MetaResultsModel):
@@ -386,46 +912,527 @@ class ResultsModel(MetaResultsModel):
 
 class EntrezModel(MetaEntrezModel):
     # TODO: This class is probably unnecessarily complicated.
-    def __init__(self, seq_input_model):
+    SUGGESTION_CACHE_SIZE = 256
+    """Number of spelling suggestions to remember."""
+
+    def __init__(self, seq_input_model, record_cache=None, executor=None,
+                 prefetch_count=20, batch_size=10, rate_limiter=None,
+                 dispatch=call_directly, seq_only=False, page_size=100,
+                 client=None):
+        """Constructor.
+
+        :param seq_input_model: model to load sequences into
+        :type seq_input_model: :class:`MetaSeqInputModel`
+        :param record_cache: persistent cache of record text keyed by
+            accession and version, or :data:`None` to keep records
+            in memory only
+        :type record_cache: :class:`cpg_islands.cache.RecordCache`
+        :param executor: executor used for requests made in the
+            background, or :data:`None` to make them in the calling
+            thread and only fetch records when they are requested
+        :type executor: :class:`cpg_islands.tasks.ThreadExecutor`
+        :param prefetch_count: number of top search results to prefetch
+        :type prefetch_count: :class:`int`
+        :param batch_size: number of records to request per ``efetch``
+            when prefetching
+        :type batch_size: :class:`int`
+        :param rate_limiter: limiter shared by all Entrez requests
+            made without a client; defaults to NCBI's limit for
+            clients without an API key
+        :type rate_limiter: :class:`cpg_islands.entrez.RateLimiter`
+        :param dispatch: dispatcher used to fire events for work done
+            in the background
+        :type dispatch: callable
+        :param seq_only: whether to fetch only the sequence, as FASTA,
+            rather than the full GenBank record with its features
+        :type seq_only: :class:`bool`
+        :param page_size: number of search results to load at a time
+        :type page_size: :class:`int`
+        :param client: client used for all Entrez requests, or
+            :data:`None` to make them through Biopython
+        :type client: :class:`cpg_islands.entrez.EntrezClient`
+        """
         Entrez.email = metadata.emails[0]
         self.seq_input_model = seq_input_model
+        self.record_cache = record_cache
+        self.executor = executor
+        self.prefetch_count = prefetch_count
+        self.batch_size = batch_size
+        self.rate_limiter = (RateLimiter(NCBI_REQUESTS_PER_SECOND)
+                             if rate_limiter is None else rate_limiter)
         self._id_list_cache = []
         self._last_loaded_seq_record = SeqRecord(
             seq=Seq('', IUPAC.unambiguous_dna))
         self._seq_record_cache = {}
+        # Prefetching threads share the record cache and the table of
+        # in-flight fetches with the caller's thread.
+        self._lock = threading.Lock()
+        self._pending_fetches = {}
+        self._search_generation = 0
+        self.dispatch = dispatch
+        self.seq_only = seq_only
+        self.client = client
+        self._suggestion_cache = LRUCache(self.SUGGESTION_CACHE_SIZE)
+        self._suggestion_task = None
+        self.page_size = page_size
+        self._result_count = 0
+        # Where the last search's results are kept on the Entrez
+        # history server, so that later pages can be requested.
+        self._history = None
+        self._page_task = None
+        self._page_pending = False
+        # The latest background search and record request. Earlier
+        # ones are ignored when they arrive.
+        self._search_task = None
+        self._search_request = 0
+        self._seq_record_task = None
+        self._seq_record_request = 0
 
     def search(self, text):
-        handle = Entrez.esearch(db='nucleotide', term=text)
-        results = Entrez.read(handle)
-        self._id_list_cache = results['IdList']
-        # Clear the cache of seq records on a new search. While it
-        # would be helpful to keep all records ever loaded cached,
-        # that would continue to eat up more memory as more records
-        # were loaded. If the search is used frequently, this memory
-        # footprint could be quite significant.
-        self._seq_record_cache.clear()  # TODO: This should be tested.
+        return self._apply_search(self._esearch(text))
+
+    def request_search(self, text):
+        if self._search_task is not None:
+            self._search_task.cancel()
+        self._search_request += 1
+        self._search_task = self._submit(
+            partial(self._deliver_search, self._search_request),
+            self._esearch, text)
+
+    def _deliver_search(self, request, task):
+        """Show the results of a background search if it is still the
+        latest one.
+
+        :param request: the search's request number
+        :type request: :class:`int`
+        :param task: the search's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        if request != self._search_request:
+            return
+        self._search_task = None
+        error = task.exception()
+        if error is not None:
+            self.search_failed(str(error))
+            return
+        self.search_completed(*self._apply_search(task.result()))
+
+    def _esearch(self, text):
+        """Make a search request. May run on an executor thread.
+
+        :param text: the text to search
+        :type text: :class:`str`
+        :return: the parsed ``esearch`` results
+        :rtype: :class:`dict`
+        """
+        # Ask for accession.version identifiers rather than GI
+        # numbers, since these are what the record cache is keyed by.
+        handle = self._request('esearch', db='nucleotide', term=text,
+                               idtype='acc', usehistory='y',
+                               retmax=self.page_size)
+        return Entrez.read(handle)
+
+    def _apply_search(self, results):
+        """Make search results the current ones.
+
+        :param results: the parsed ``esearch`` results
+        :type results: :class:`dict`
+        :return: tuple containing (id_list, query_translation)
+        :rtype: :class:`tuple`
+        """
+        self._result_count = int(results['Count'])
+        self._history = dict(WebEnv=results['WebEnv'],
+                             query_key=results['QueryKey'])
+        if self._page_task is not None:
+            self._page_task.cancel()
+            self._page_task = None
+        self._page_pending = False
+        with self._lock:
+            self._id_list_cache = results['IdList']
+            # Clear the cache of seq records on a new search. While it
+            # would be helpful to keep all records ever loaded cached,
+            # that would continue to eat up more memory as more
+            # records were loaded. If the search is used frequently,
+            # this memory footprint could be quite significant.
+            self._seq_record_cache.clear()  # TODO: This should be tested.
+            self._search_generation += 1
+            # Batches still queued for the previous search would only
+            # hold up requests for this one.
+            stale_fetches = set(self._pending_fetches.values())
+            self._pending_fetches.clear()
+        for task in stale_fetches:
+            task.cancel()
+        self._prefetch(self._id_list_cache)
         return (self._id_list_cache, results['QueryTranslation'])
 
+    def load_more_results(self):
+        if (self._page_pending or
+                len(self._id_list_cache) >= self._result_count):
+            return
+        # Without an executor the page is delivered before submission
+        # returns, so mark it pending beforehand.
+        self._page_pending = True
+        self._page_task = self._submit(
+            partial(self._deliver_page, self._history), self._fetch_page,
+            len(self._id_list_cache), self._history)
+
+    def _fetch_page(self, start, history):
+        """Fetch a page of ids from the history server.
+
+        :param start: index of the first result on the page
+        :type start: :class:`int`
+        :param history: the search's location on the history server
+        :type history: :class:`dict`
+        :return: ids of the results on the page
+        :rtype: :class:`list` of :class:`str`
+        """
+        handle = self._request('efetch', db='nucleotide', rettype='acc',
+                               retmode='text', retstart=start,
+                               retmax=self.page_size, **history)
+        try:
+            return handle.read().split()
+        finally:
+            handle.close()
+
+    def _deliver_page(self, history, task):
+        """Append a page of ids to the results and fire
+        :attr:`results_found` if the page is for the current search.
+
+        :param history: the location on the history server of the
+            search the page is for
+        :type history: :class:`dict`
+        :param task: the page's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        if history is not self._history:
+            return
+        self._page_pending = False
+        self._page_task = None
+        # If the page couldn't be fetched, asking again will retry.
+        if task.exception() is not None:
+            return
+        id_list = task.result()
+        start = len(self._id_list_cache)
+        self._id_list_cache.extend(id_list)
+        self.results_found(start, id_list)
+
+    def request_titles(self, start, count):
+        history = self._history
+        self._submit(partial(self._deliver_titles, history),
+                     self._fetch_titles, start, count, history)
+
+    def _fetch_titles(self, start, count, history):
+        """Fetch the titles of a range of results in one batched
+        ``esummary`` request against the history server.
+
+        :param start: index of the first result
+        :type start: :class:`int`
+        :param count: number of results
+        :type count: :class:`int`
+        :param history: the search's location on the history server
+        :type history: :class:`dict`
+        :return: the index of the first result, and the titles
+        :rtype: :class:`tuple`
+        """
+        handle = self._request('esummary', db='nucleotide',
+                               retstart=start, retmax=count, **history)
+        return start, [summary['Title'] for summary in Entrez.read(handle)]
+
+    def _deliver_titles(self, history, task):
+        """Fire :attr:`titles_found` if the titles are for the current
+        search.
+
+        :param history: the location on the history server of the
+            search the titles are for
+        :type history: :class:`dict`
+        :param task: the request's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        # Titles are a convenience; leave the ids showing if Entrez
+        # couldn't be reached.
+        if history is self._history and task.exception() is None:
+            self.titles_found(*task.result())
+
+    def _request(self, utility, **params):
+        """Make an Entrez request.
+
+        :param utility: name of the utility, e.g. ``esearch``
+        :type utility: :class:`str`
+        :param params: the utility's parameters
+        :return: handle to the response
+        :rtype: file-like object
+        """
+        if self.client is not None:
+            return getattr(self.client, utility)(**params)
+        self.rate_limiter.acquire()
+        return getattr(Entrez, utility)(**params)
+
+    def _submit(self, deliver, func, *args):
+        """Run a request in the background, or right away if there is
+        no executor, and deliver its task through the dispatcher once
+        it is done.
+
+        :param deliver: called with the task when it is done
+        :type deliver: callable
+        :param func: the request
+        :type func: callable
+        :return: the request's task
+        :rtype: :class:`cpg_islands.tasks.Task`
+        """
+        executor = (ImmediateExecutor() if self.executor is None
+                    else self.executor)
+        task = executor.submit(func, *args)
+
+        def done(task):
+            if not task.cancelled():
+                self.dispatch(deliver, task)
+        task.add_done_callback(done)
+        return task
+
     def suggest(self, text):
-        handle = Entrez.espell(db='pubmed', term=text)
-        result = Entrez.read(handle)
-        return result['CorrectedQuery']
+        suggestion = self._suggestion_cache.get(text)
+        if suggestion is None:
+            handle = self._request('espell', db='pubmed', term=text)
+            result = Entrez.read(handle)
+            suggestion = result['CorrectedQuery']
+            self._suggestion_cache.put(text, suggestion)
+        return suggestion
+
+    def request_suggestion(self, text):
+        if self._suggestion_task is not None:
+            # Drop the previous request if it hasn't gone out yet. If
+            # it has, its result is ignored when it arrives.
+            self._suggestion_task.cancel()
+        suggestion = self._suggestion_cache.get(text)
+        if suggestion is not None or self.executor is None:
+            self._suggestion_task = None
+            self.suggestion_found(self.suggest(text))
+            return
+        task = self.executor.submit(self.suggest, text)
+        self._suggestion_task = task
+        task.add_done_callback(self._suggestion_done)
+
+    def _suggestion_done(self, task):
+        """Called, possibly on an executor thread, when a suggestion
+        request is done.
+
+        :param task: the request's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        if not task.cancelled():
+            self.dispatch(self._deliver_suggestion, task)
+
+    def _deliver_suggestion(self, task):
+        """Fire :attr:`suggestion_found` if the request is still the
+        latest one.
+
+        :param task: the request's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        # Suggestions are a convenience; don't bother the user if
+        # Entrez couldn't be reached.
+        if task is self._suggestion_task and task.exception() is None:
+            self._suggestion_task = None
+            self.suggestion_found(task.result())
 
     def get_seq_record(self, index):
         # TODO: This should do more error checking to make sure that
         # an id list is actually cached.
-        entrez_id = self._id_list_cache[index]
+        self._last_loaded_seq_record = self._get_record(
+            self._id_list_cache[index])
+        return self._last_loaded_seq_record
+
+    def request_seq_record(self, index):
+        if self._seq_record_task is not None:
+            self._seq_record_task.cancel()
+        self._seq_record_request += 1
+        self._seq_record_task = self._submit(
+            partial(self._deliver_seq_record, self._seq_record_request),
+            self._get_record, self._id_list_cache[index])
+
+    def _deliver_seq_record(self, request, task):
+        """Show a record fetched in the background if it is still the
+        latest one requested.
+
+        :param request: the record's request number
+        :type request: :class:`int`
+        :param task: the request's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        if request != self._seq_record_request:
+            return
+        self._seq_record_task = None
+        error = task.exception()
+        if error is not None:
+            self.seq_record_failed(str(error))
+            return
+        self._last_loaded_seq_record = task.result()
+        self.seq_record_found(self._last_loaded_seq_record)
+
+    def _get_record(self, entrez_id):
+        """Return a record from memory, waiting for it to be
+        prefetched or loading it if need be. May run on an executor
+        thread.
+
+        :param entrez_id: the record's accession and version
+        :type entrez_id: :class:`str`
+        :return: the record
+        :rtype: :class:`SeqRecord`
+        """
+        with self._lock:
+            pending_fetch = self._pending_fetches.get(entrez_id)
+        if pending_fetch is not None:
+            # Wait for the prefetch rather than requesting the record
+            # a second time. If it failed, fetch the record below.
+            pending_fetch.exception()
+        with self._lock:
+            seq_record = self._seq_record_cache.get(entrez_id)
+        if seq_record is None:
+            seq_record = self._load_record(entrez_id)
+            with self._lock:
+                self._seq_record_cache[entrez_id] = seq_record
+        return seq_record
+
+    def _cache_key(self, entrez_id):
+        """Return the persistent cache key for a record. Sequence-only
+        records are kept apart from full GenBank records.
+
+        :param entrez_id: the record's accession and version
+        :type entrez_id: :class:`str`
+        :return: the key
+        :rtype: :class:`str`
+        """
+        return entrez_id + ':fasta' if self.seq_only else entrez_id
+
+    def _parse(self, text):
+        """Parse the text of a single record.
+
+        :param text: FASTA text in sequence-only mode, otherwise
+            GenBank text
+        :type text: :class:`str`
+        :return: the record
+        :rtype: :class:`SeqRecord`
+        """
+        if self.seq_only:
+            return read_fasta(StringIO(text)).to_seq_record()
+        return SeqIO.read(StringIO(text), 'genbank')
+
+    def _load_record(self, entrez_id):
+        """Load a record, going out to Entrez only if it is not in the
+        persistent cache.
+
+        :param entrez_id: the record's accession and version
+        :type entrez_id: :class:`str`
+        :return: the record
+        :rtype: :class:`SeqRecord`
+        :raise: :exc:`ValueError` if Entrez returned no record
+        """
+        key = self._cache_key(entrez_id)
+        if self.record_cache is not None:
+            text = self.record_cache.get(key)
+            if text is not None:
+                return self._parse(text)
+        records = self._efetch([entrez_id])
+        if not records:
+            raise ValueError('No records found in handle')
+        seq_record, text = records[0]
+        if self.record_cache is not None:
+            self.record_cache.put(key, text)
+        return seq_record
+
+    def _efetch(self, entrez_ids):
+        """Fetch records from Entrez in a single request. In
+        sequence-only mode, FASTA is requested and streamed straight
+        into encoded sequence buffers, skipping the feature tables.
+
+        :param entrez_ids: accession and version of each record
+        :type entrez_ids: :class:`list` of :class:`str`
+        :return: each record along with its text
+        :rtype: :class:`list` of :class:`tuple`
+        """
+        ids = entrez_ids[0] if len(entrez_ids) == 1 else ','.join(entrez_ids)
+        handle = self._request(
+            'efetch', db='nucleotide', id=ids,
+            rettype='fasta' if self.seq_only else 'gb', retmode='text')
         try:
-            seq_record = self._seq_record_cache[entrez_id]
-        except KeyError:
-            handle = Entrez.efetch(
-                db='nucleotide', id=entrez_id,
-                rettype='gb', retmode='text')
-            seq_record = SeqIO.read(handle, 'genbank')
+            if self.seq_only:
+                return [(fasta_record.to_seq_record(), fasta_record.to_fasta())
+                        for fasta_record in iter_fasta(handle)]
+            text = handle.read()
+        finally:
             handle.close()
-            self._seq_record_cache[entrez_id] = seq_record
-        self._last_loaded_seq_record = seq_record
-        return self._last_loaded_seq_record
+        texts = split_genbank(text) if len(entrez_ids) > 1 else [text]
+        return [(self._parse(record_text), record_text)
+                for record_text in texts]
+
+    def _prefetch(self, entrez_ids):
+        """Fetch the first records of a list in the background, in
+        batches.
+
+        :param entrez_ids: accession and version of each record
+        :type entrez_ids: :class:`list` of :class:`str`
+        """
+        if self.executor is None:
+            return
+        with self._lock:
+            entrez_ids = [
+                entrez_id for entrez_id in entrez_ids[:self.prefetch_count]
+                if entrez_id not in self._seq_record_cache and
+                entrez_id not in self._pending_fetches]
+            generation = self._search_generation
+        # The lock must not be held while submitting; an executor may
+        # run the batch, and then its callback, right away.
+        for i in xrange(0, len(entrez_ids), self.batch_size):
+            batch = entrez_ids[i:i + self.batch_size]
+            task = self.executor.submit(self._fetch_batch, batch, generation)
+            with self._lock:
+                if generation == self._search_generation:
+                    for entrez_id in batch:
+                        self._pending_fetches[entrez_id] = task
+            task.add_done_callback(self._batch_fetched)
+
+    def _fetch_batch(self, entrez_ids, generation):
+        """Fetch and parse several records, using a single ``efetch``
+        for all those not in the persistent cache. Runs on an executor
+        thread.
+
+        :param entrez_ids: accession and version of each record
+        :type entrez_ids: :class:`list` of :class:`str`
+        :param generation: the search which requested the records
+        :type generation: :class:`int`
+        """
+        seq_records = []
+        missing_ids = []
+        for entrez_id in entrez_ids:
+            text = (None if self.record_cache is None
+                    else self.record_cache.get(self._cache_key(entrez_id)))
+            if text is None:
+                missing_ids.append(entrez_id)
+            else:
+                seq_records.append(self._parse(text))
+        if missing_ids:
+            for seq_record, text in self._efetch(missing_ids):
+                if self.record_cache is not None:
+                    self.record_cache.put(
+                        self._cache_key(seq_record.id), text)
+                seq_records.append(seq_record)
+        with self._lock:
+            # Records from an earlier search would never be cleared
+            # from memory, so don't keep them.
+            if generation == self._search_generation:
+                for seq_record in seq_records:
+                    self._seq_record_cache[seq_record.id] = seq_record
+
+    def _batch_fetched(self, task):
+        """Forget about a finished batch fetch.
+
+        :param task: the batch's task
+        :type task: :class:`cpg_islands.tasks.Task`
+        """
+        with self._lock:
+            for entrez_id in task.args[0]:
+                if self._pending_fetches.get(entrez_id) is task:
+                    del self._pending_fetches[entrez_id]
 
     def load_seq(self):
         # TODO: This should do more error checking to check that a
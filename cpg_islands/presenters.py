@@ -2,6 +2,8 @@ from Bio.Seq import Seq
 from Bio.Alphabet import IUPAC, _verify_alphabet
 from Bio.SeqRecord import SeqRecord
 
+from cpg_islands.algorithms import find_soft_masked_intervals
+
 
 class AppPresenter(object):
     def __init__(self, model, view):
@@ -19,7 +21,10 @@ class AppPresenter(object):
         self.model.started.append(self.view.start)
         self.model.seq_loaded.append(self.view.show_seq_input)
         self.model.islands_computed.append(self.view.show_results)
+        self.model.file_load_progressed.append(self.view.show_load_progress)
         self.view.file_load_requested.append(self.model.load_file)
+        self.view.file_load_cancelled.append(self.model.cancel_file_load)
+        self.view.closed.append(self.model.shutdown)
 
 
 class SeqInputPresenter(object):
@@ -41,6 +46,7 @@ class SeqInputPresenter(object):
         self.model.error_raised.append(self.view.show_error)
         self.model.algorithms_loaded.append(self.view.set_algorithms)
         self.view.submitted.append(self._user_submits)
+        self.view.parameters_changed.append(self._user_changes_parameters)
 
     def _island_definition_defaults_set(
             self, island_size, min_gc_ratio, min_obs_exp_cpg_ratio):
@@ -57,7 +63,7 @@ class SeqInputPresenter(object):
 
     def _user_submits(
             self, seq_str, island_size_str, min_gc_ratio_str,
-            min_obs_exp_cpg_ratio_str, algo_index):
+            min_obs_exp_cpg_ratio_str, algo_index, exclude_masked=False):
         """Called when the user submits the form.
 
         :param seq_str: the sequence as a string
@@ -68,7 +74,14 @@ class SeqInputPresenter(object):
         :type min_gc_ratio_str: :class:`str`
         :param algo_index: the algorithm chosen
         :type algo_index: :class:`int`
+        :param exclude_masked: whether to skip soft-masked (lowercase)
+            regions of the sequence
+        :type exclude_masked: :class:`bool`
         """
+        # The case of the sequence is thrown away below, so find the
+        # soft-masked regions first.
+        masked_intervals = (find_soft_masked_intervals(seq_str)
+                            if exclude_masked else None)
         seq_mixed_case = Seq(seq_str, IUPAC.unambiguous_dna)
         seq = seq_mixed_case.upper()
         # Using `_verify_alphabet' is somewhat questionable, since it
@@ -101,7 +114,27 @@ class SeqInputPresenter(object):
             return
         self.model.compute_islands(
             SeqRecord(seq), island_size, min_gc_ratio,
-            min_obs_exp_cpg_ratio, algo_index)
+            min_obs_exp_cpg_ratio, algo_index, masked_intervals)
+
+    def _user_changes_parameters(self, island_size_str, min_gc_ratio_str,
+                                 min_obs_exp_cpg_ratio_str):
+        """Called when the user adjusts the island definition.
+
+        :param island_size_str: number of bases which an island may contain
+        :type island_size_str: :class:`str`
+        :param min_gc_ratio_str: the ratio of GC to other bases
+        :type min_gc_ratio_str: :class:`str`
+        :param min_obs_exp_cpg_ratio_str: minimum observed/expected CpG ratio
+        :type min_obs_exp_cpg_ratio_str: :class:`str`
+        """
+        # The user may not have finished adjusting the definition, so
+        # invalid values are left for submission to report.
+        try:
+            self.model.recompute_islands(int(island_size_str),
+                                         float(min_gc_ratio_str),
+                                         float(min_obs_exp_cpg_ratio_str))
+        except ValueError:
+            pass
 
     def _file_loaded(self, file_path):
         """Called when the user loads a file.
@@ -188,10 +221,19 @@ class EntrezPresenter(object):
 
     def register_for_events(self):
         """Connect view methods to presenter methods."""
+        self.model.suggestion_found.append(self.view.set_suggestion)
+        self.model.results_found.append(self._results_found)
+        self.model.titles_found.append(self.view.set_result_titles)
+        self.model.search_completed.append(self._search_completed)
+        self.model.search_failed.append(self._search_failed)
+        self.model.seq_record_found.append(self._seq_record_found)
+        self.model.seq_record_failed.append(self._seq_record_failed)
         self.view.query_changed.append(self._query_changed)
         self.view.search_requested.append(self._user_submits)
         self.view.result_selected.append(self._user_selected)
         self.view.load_requested.append(self._load_selected)
+        self.view.more_results_requested.append(
+            self._more_results_requested)
 
     def _user_submits(self, text):
         """Handle user submission.
@@ -199,9 +241,45 @@ class EntrezPresenter(object):
         :param text: text to search
         :type text: :class:`str`
         """
-        id_list, query_translation = self.model.search(text)
+        self.view.set_searching(True)
+        self.model.request_search(text)
+
+    def _search_completed(self, id_list, query_translation):
+        """Handle the results of a search arriving.
+
+        :param id_list: ids of the first page of results
+        :type id_list: :class:`list` of :class:`str`
+        :param query_translation: the query as Entrez understood it
+        :type query_translation: :class:`str`
+        """
+        self.view.set_searching(False)
         self.view.set_result(id_list)
         self.view.set_query_translation(query_translation)
+        self.model.request_titles(0, len(id_list))
+
+    def _search_failed(self, error_message):
+        """Handle a search failing.
+
+        :param error_message: the error message
+        :type error_message: :class:`str`
+        """
+        self.view.set_searching(False)
+        self.view.show_error('Search failed: {0}'.format(error_message))
+
+    def _more_results_requested(self):
+        """Handle the user reaching the end of the results."""
+        self.model.load_more_results()
+
+    def _results_found(self, start, id_list):
+        """Handle a further page of results arriving.
+
+        :param start: index of the first new result
+        :type start: :class:`int`
+        :param id_list: ids of the new results
+        :type id_list: :class:`list` of :class:`str`
+        """
+        self.view.set_result(id_list, append=True)
+        self.model.request_titles(start, len(id_list))
 
     def _user_selected(self, index):
         """Handle user submission.
@@ -209,7 +287,16 @@ class EntrezPresenter(object):
         :param index: list index of selected item on view
         :type index: :class:`int`
         """
-        seq_record = self.model.get_seq_record(index)
+        self.view.set_loading_seq(True)
+        self.model.request_seq_record(index)
+
+    def _seq_record_found(self, seq_record):
+        """Handle the selected record arriving.
+
+        :param seq_record: the record
+        :type seq_record: :class:`SeqRecord`
+        """
+        self.view.set_loading_seq(False)
         self.view.set_seq_locus(
             seq_record.id,
             'http://www.ncbi.nlm.nih.gov/nuccore/{0}'.format(seq_record.id))
@@ -217,14 +304,23 @@ class EntrezPresenter(object):
         self.view.set_seq_len('{0} bases'.format(len(seq_record.seq)))
         self.view.set_selected_seq(str(seq_record.seq))
 
+    def _seq_record_failed(self, error_message):
+        """Handle the selected record failing to load.
+
+        :param error_message: the error message
+        :type error_message: :class:`str`
+        """
+        self.view.set_loading_seq(False)
+        self.view.show_error(
+            'Sequence could not be loaded: {0}'.format(error_message))
+
     def _query_changed(self, query):
         """Handle user suggestions.
 
         :param text: text to query for suggestion
         :type text: :class:`str`
         """
-        suggestion = self.model.suggest(query)
-        self.view.set_suggestion(suggestion)
+        self.model.request_suggestion(query)
 
     def _load_selected(self):
         """Handle loading sequences."""
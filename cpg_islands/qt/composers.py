@@ -1,10 +1,14 @@
 """:mod:`cpg_islands.qt.composers` --- Functions to create Qt MVP triads
 """
 
+from cpg_islands.cache import RecordCache
+from cpg_islands.entrez import NCBI_REQUESTS_PER_SECOND, create_client
+from cpg_islands.islands import warm_up
 from cpg_islands.models import (AppModel,
                                 SeqInputModel,
                                 ResultsModel,
                                 EntrezModel)
+from cpg_islands.qt.dispatchers import GuiDispatcher
 from cpg_islands.qt.views import (AppView,
                                   SeqInputView,
                                   ResultsView,
@@ -13,6 +17,7 @@ from cpg_islands.presenters import (AppPresenter,
                                     SeqInputPresenter,
                                     ResultsPresenter,
                                     EntrezPresenter)
+from cpg_islands.tasks import ThreadExecutor, ProcessExecutor
 
 
 def create_app_presenter(argv):
@@ -21,13 +26,25 @@ def create_app_presenter(argv):
     :return: the created presenter
     :rtype: :class:`AppPresenter`
     """
+    dispatch = GuiDispatcher()
+    # Worker processes are started by the first computation and then
+    # kept, with the algorithms already imported, until the app exits.
+    worker_pool = ProcessExecutor(initializer=warm_up)
     results_model = ResultsModel()
     results_view = ResultsView()
-    seq_input_model = SeqInputModel(results_model)
+    # Adjusting the island definition recomputes islands on a thread,
+    # beside the counts of the sequence being explored.
+    # Files are loaded on a thread of their own too.
+    seq_input_model = SeqInputModel(results_model, worker_pool, dispatch,
+                                    live_executor=ThreadExecutor(1),
+                                    load_executor=ThreadExecutor(1))
     seq_input_view = SeqInputView()
-    entrez_model = EntrezModel(seq_input_model)
+    entrez_model = EntrezModel(
+        seq_input_model, RecordCache(),
+        ThreadExecutor(NCBI_REQUESTS_PER_SECOND), dispatch=dispatch,
+        seq_only=True, client=create_client())
     entrez_view = EntrezView()
-    app_model = AppModel(seq_input_model, entrez_model)
+    app_model = AppModel(seq_input_model, entrez_model, worker_pool)
     app_view = AppView(entrez_view, seq_input_view, results_view)
 
     seq_input_presenter = SeqInputPresenter(seq_input_model, seq_input_view)
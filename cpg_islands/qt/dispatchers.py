@@ -0,0 +1,41 @@
+""":mod:`cpg_islands.qt.dispatchers` --- Moving calls onto the GUI thread
+"""
+
+from PySide import QtCore
+
+
+class GuiDispatcher(QtCore.QObject):
+    """Dispatcher which calls functions on the thread which created it,
+    normally the GUI thread. Models hand it their events when they
+    finish work on a background thread, since Qt widgets may only be
+    touched from the GUI thread.
+    """
+    _called = QtCore.Signal(object, object)
+
+    def __init__(self, parent=None):
+        """Constructor.
+
+        :param parent: the object's parent
+        :type parent: :class:`QtCore.QObject`
+        """
+        super(GuiDispatcher, self).__init__(parent)
+        self._called.connect(self._call, QtCore.Qt.QueuedConnection)
+
+    def __call__(self, func, *args):
+        """Arrange for a function to be called on the GUI thread. This
+        may be called from any thread and returns immediately.
+
+        :param func: the function to call
+        :type func: callable
+        """
+        self._called.emit(func, args)
+
+    def _call(self, func, args):
+        """Call a function; runs on the GUI thread.
+
+        :param func: the function to call
+        :type func: callable
+        :param args: the function's arguments
+        :type args: :class:`tuple`
+        """
+        func(*args)
@@ -6,6 +6,7 @@
 """:mod:`cpg_islands.views.qt` --- Views based on Q toolkit
 """
 
+from itertools import islice
 from xml.sax import saxutils
 
 from PySide import QtGui, QtCore
@@ -46,7 +47,80 @@ class StatsLabel(QtGui.QLabel):
             QtCore.Qt.TextSelectableByKeyboard)
 
 
+class RatioInput(QtGui.QWidget):
+    """Spin box for a ratio, with a slider alongside it for sweeping
+    the ratio's usual range.
+    """
+    SLIDER_STEPS = 1000
+    """Number of steps across the slider's range."""
+
+    valueChanged = QtCore.Signal(float)
+
+    def __init__(self, slider_maximum, maximum, parent=None):
+        """Constructor.
+
+        :param slider_maximum: largest ratio the slider reaches
+        :type slider_maximum: :class:`float`
+        :param maximum: largest ratio which may be entered
+        :type maximum: :class:`float`
+        :param parent: the widget's parent
+        :type parent: :class:`QtGui.QWidget`
+        """
+        super(RatioInput, self).__init__(parent)
+        self.slider_maximum = float(slider_maximum)
+        self.top_layout = QtGui.QHBoxLayout(self)
+        self.top_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.slider = QtGui.QSlider(QtCore.Qt.Horizontal, self)
+        self.slider.setRange(0, self.SLIDER_STEPS)
+        self.slider.valueChanged.connect(self._slider_moved)
+        self.top_layout.addWidget(self.slider, 1)
+
+        self.spin_box = QtGui.QDoubleSpinBox(self)
+        self.spin_box.setDecimals(3)
+        self.spin_box.setRange(0, maximum)
+        self.spin_box.setSingleStep(0.01)
+        self.spin_box.valueChanged.connect(self._spin_box_changed)
+        self.top_layout.addWidget(self.spin_box)
+        self.setFocusProxy(self.spin_box)
+
+    def value(self):
+        return self.spin_box.value()
+
+    def setValue(self, value):
+        self.spin_box.setValue(value)
+
+    def _slider_moved(self, position):
+        """Called when the user moves the slider.
+
+        :param position: the slider's position
+        :type position: :class:`int`
+        """
+        self.spin_box.setValue(
+            position * self.slider_maximum / self.SLIDER_STEPS)
+
+    def _spin_box_changed(self, value):
+        """Called when the ratio changes, from either widget.
+
+        :param value: the ratio
+        :type value: :class:`float`
+        """
+        # Ratios beyond the slider's range leave it at the end.
+        self.slider.blockSignals(True)
+        self.slider.setValue(
+            int(round(value * self.SLIDER_STEPS / self.slider_maximum)))
+        self.slider.blockSignals(False)
+        self.valueChanged.emit(value)
+
+
 class AppView(QtGui.QMainWindow, BaseAppView):
+    LOAD_PROGRESS_STEPS = 1000
+    """Number of steps in the file loading progress bar."""
+
+    LOAD_PROGRESS_DELAY = 500
+    """Milliseconds a file must take to load before its progress is
+    shown."""
+
     def __init__(self, entrez_view, seq_input_view, results_view, parent=None):
         """Initialize the main application view with docked
         SeqenceInputView and ResultsView.
@@ -88,6 +162,9 @@ class AppView(QtGui.QMainWindow, BaseAppView):
         self.tab_widget.setCurrentWidget(self.seq_input_view)
         self.setCentralWidget(self.tab_widget)
 
+        # Created when a file is first loaded.
+        self.load_progress_dialog = None
+
     def start(self):
         self.showMaximized()
         self.raise_()
@@ -98,6 +175,30 @@ class AppView(QtGui.QMainWindow, BaseAppView):
     def show_seq_input(self):
         self.tab_widget.setCurrentWidget(self.seq_input_view)
 
+    def show_load_progress(self, bytes_read, total_bytes):
+        if self.load_progress_dialog is None:
+            self.load_progress_dialog = QtGui.QProgressDialog(
+                'Loading file...', '&Cancel', 0, self.LOAD_PROGRESS_STEPS,
+                self)
+            self.load_progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+            self.load_progress_dialog.setMinimumDuration(
+                self.LOAD_PROGRESS_DELAY)
+            self.load_progress_dialog.canceled.connect(self._load_cancelled)
+        # Files may have more bytes than a progress bar has steps. The
+        # dialog hides itself once it reaches the last step.
+        steps = self.LOAD_PROGRESS_STEPS
+        self.load_progress_dialog.setValue(
+            steps if bytes_read >= total_bytes
+            else bytes_read * steps // total_bytes)
+
+    def _load_cancelled(self):
+        """Called when the user cancels loading a file."""
+        self.file_load_cancelled()
+
+    def closeEvent(self, event):
+        self.closed()
+        super(AppView, self).closeEvent(event)
+
     def _about(self):
         """Create and show the about dialog."""
         AboutDialog(self).exec_()
@@ -121,36 +222,55 @@ class AppView(QtGui.QMainWindow, BaseAppView):
 
 
 class SeqInputView(QtGui.QWidget, BaseSeqInputView):
+    PARAMETERS_CHANGED_DELAY = 30
+    """Milliseconds of inactivity before an adjusted island definition
+    is considered changed."""
+
+    MAX_ISLAND_SIZE = 10 ** 9
+    """Largest island size which may be entered."""
+
     def __init__(self, parent=None):
         super(SeqInputView, self).__init__(parent)
 
         self.top_layout = QtGui.QVBoxLayout(self)
         self.form_layout = QtGui.QFormLayout()
 
-        self.island_size_input = QtGui.QLineEdit(self)
-        self.island_size_validator = QtGui.QIntValidator()
-        self.island_size_validator.setBottom(0)
-        self.island_size_input.setValidator(self.island_size_validator)
+        # Islands are recomputed once the user pauses adjusting the
+        # definition, rather than for every step of a slider.
+        self.parameters_changed_timer = QtCore.QTimer(self)
+        self.parameters_changed_timer.setSingleShot(True)
+        self.parameters_changed_timer.setInterval(
+            self.PARAMETERS_CHANGED_DELAY)
+        self.parameters_changed_timer.timeout.connect(
+            self._parameters_changed)
+
+        self.island_size_input = QtGui.QSpinBox(self)
+        self.island_size_input.setRange(1, self.MAX_ISLAND_SIZE)
+        self.island_size_input.setSingleStep(10)
+        # Typed sizes take effect once editing finishes, not with every
+        # keystroke, which would rescan for each digit; steps with the
+        # arrows or wheel are still applied as they happen.
+        self.island_size_input.setKeyboardTracking(False)
+        self.island_size_input.valueChanged.connect(self._parameter_adjusted)
         self.form_layout.addRow(u'&Island Size ≥', self.island_size_input)
 
-        self.min_gc_ratio_input = QtGui.QLineEdit(self)
-        self.min_gc_ratio_validator = QtGui.QDoubleValidator()
-        self.min_gc_ratio_validator.setBottom(0)
-        self.min_gc_ratio_validator.setTop(1)
-        self.min_gc_ratio_input.setValidator(self.min_gc_ratio_validator)
+        self.min_gc_ratio_input = RatioInput(1, 1, self)
+        self.min_gc_ratio_input.valueChanged.connect(self._parameter_adjusted)
         self.form_layout.addRow(u'&GC Ratio ≥', self.min_gc_ratio_input)
 
-        self.min_obs_exp_cpg_ratio_input = QtGui.QLineEdit(self)
-        self.min_obs_exp_ratio_validator = QtGui.QDoubleValidator()
-        self.min_obs_exp_ratio_validator.setBottom(0)
-        self.min_obs_exp_cpg_ratio_input.setValidator(
-            self.min_obs_exp_ratio_validator)
+        self.min_obs_exp_cpg_ratio_input = RatioInput(2, 100, self)
+        self.min_obs_exp_cpg_ratio_input.valueChanged.connect(
+            self._parameter_adjusted)
         self.form_layout.addRow(u'&Observed/Expected CpG Ratio ≥',
                                 self.min_obs_exp_cpg_ratio_input)
 
         self.algorithms_combo_box = QtGui.QComboBox(self)
         self.form_layout.addRow('&Algorithm', self.algorithms_combo_box)
 
+        self.exclude_masked_check_box = QtGui.QCheckBox(
+            'E&xclude soft-masked (lowercase) repeats', self)
+        self.form_layout.addRow(self.exclude_masked_check_box)
+
         self.top_layout.addLayout(self.form_layout)
 
         self.seq_input_label = QtGui.QLabel('S&equence')
@@ -188,10 +308,10 @@ class SeqInputView(QtGui.QWidget, BaseSeqInputView):
         :return: the ratio
         :rtype: :class:`str`
         """
-        return self.min_gc_ratio_input.text()
+        return str(self.min_gc_ratio_input.value())
 
     def set_min_gc_ratio(self, min_gc_ratio_str):
-        self.min_gc_ratio_input.setText(min_gc_ratio_str)
+        self.min_gc_ratio_input.setValue(float(min_gc_ratio_str))
 
     def _get_min_obs_exp_cpg_ratio(self):
         """Return the widget's entered observed/expected CpG ratio.
@@ -199,10 +319,11 @@ class SeqInputView(QtGui.QWidget, BaseSeqInputView):
         :return: the ratio
         :rtype: :class:`str`
         """
-        return self.min_obs_exp_cpg_ratio_input.text()
+        return str(self.min_obs_exp_cpg_ratio_input.value())
 
     def set_min_obs_exp_cpg_ratio(self, min_obs_exp_cpg_ratio_str):
-        self.min_obs_exp_cpg_ratio_input.setText(min_obs_exp_cpg_ratio_str)
+        self.min_obs_exp_cpg_ratio_input.setValue(
+            float(min_obs_exp_cpg_ratio_str))
 
     def _get_island_size(self):
         """Return the widget's entered island size.
@@ -210,7 +331,7 @@ class SeqInputView(QtGui.QWidget, BaseSeqInputView):
         :return: the key
         :rtype: :class:`str`
         """
-        return self.island_size_input.text()
+        return str(self.island_size_input.value())
 
     def _get_algorithm_index(self):
         """Return the currently selected algorithm's index.
@@ -220,8 +341,16 @@ class SeqInputView(QtGui.QWidget, BaseSeqInputView):
         """
         return self.algorithms_combo_box.currentIndex()
 
+    def _get_exclude_masked(self):
+        """Return whether soft-masked regions should be excluded.
+
+        :return: whether to exclude masked regions
+        :rtype: :class:`bool`
+        """
+        return self.exclude_masked_check_box.isChecked()
+
     def set_island_size(self, island_size):
-        self.island_size_input.setText(island_size)
+        self.island_size_input.setValue(int(island_size))
 
     def set_algorithms(self, algorithm_names):
         self.algorithms_combo_box.clear()
@@ -242,12 +371,31 @@ class SeqInputView(QtGui.QWidget, BaseSeqInputView):
                            self._get_island_size(),
                            self._get_min_gc_ratio(),
                            self._get_min_obs_exp_cpg_ratio(),
-                           self._get_algorithm_index())
+                           self._get_algorithm_index(),
+                           self._get_exclude_masked())
         except ValueError as error:
             self.show_error(str(error))
 
+    def _parameter_adjusted(self, value):
+        """Called on each step of adjusting the island definition.
+
+        :param value: the adjusted parameter's value
+        :type value: :class:`int` or :class:`float`
+        """
+        self.parameters_changed_timer.start()
+
+    def _parameters_changed(self):
+        """Called once the user pauses adjusting the island definition."""
+        self.parameters_changed(self._get_island_size(),
+                                self._get_min_gc_ratio(),
+                                self._get_min_obs_exp_cpg_ratio())
+
 
 class ResultsView(QtGui.QWidget, BaseResultsView):
+    ISLANDS_PER_FILL = 500
+    """Number of islands added to the list between handling events, so
+    that long lists don't freeze the window."""
+
     def __init__(self, parent=None):
         super(ResultsView, self).__init__(parent)
 
@@ -269,6 +417,10 @@ class ResultsView(QtGui.QWidget, BaseResultsView):
         self.islands_list = QtGui.QListWidget(self)
         self.islands_list_label.setBuddy(self.islands_list)
         self.islands_list.currentRowChanged.connect(self._island_selected)
+        self._unlisted_islands = iter([])
+        self.islands_fill_timer = QtCore.QTimer(self)
+        self.islands_fill_timer.setInterval(0)
+        self.islands_fill_timer.timeout.connect(self._fill_islands_list)
         self.islands_list.setFrameShape(QtGui.QFrame.StyledPanel)
         self.islands_list_layout = QtGui.QVBoxLayout(
             self.islands_list_container)
@@ -327,10 +479,23 @@ class ResultsView(QtGui.QWidget, BaseResultsView):
         self.top_layout.addWidget(self.list_seq_splitter, 1)
 
     def set_islands(self, islands):
+        # Any islands still being listed are stale.
         self.islands_list.clear()
-        for i, (start, end) in enumerate(islands):
-            self.islands_list.addItem(
-                'Island {0} ({1}-{2})'.format(i, start, end))
+        self._unlisted_islands = enumerate(islands)
+        self._fill_islands_list()
+
+    def _fill_islands_list(self):
+        """Add the next islands to the list, and arrange to add more
+        once pending events are handled.
+        """
+        items = ['Island {0} ({1}-{2})'.format(i, start, end)
+                 for i, (start, end) in islice(self._unlisted_islands,
+                                               self.ISLANDS_PER_FILL)]
+        self.islands_list.addItems(items)
+        if len(items) < self.ISLANDS_PER_FILL:
+            self.islands_fill_timer.stop()
+        else:
+            self.islands_fill_timer.start()
 
     def set_algo_name(self, algo_name):
         self.algo_name_label.setText(algo_name)
@@ -390,6 +555,10 @@ class ResultsView(QtGui.QWidget, BaseResultsView):
 
 
 class EntrezView(QtGui.QWidget, BaseEntrezView):
+    QUERY_CHANGED_DELAY = 300
+    """Milliseconds of typing inactivity before the query is
+    considered changed."""
+
     def __init__(self, parent=None):
         """Construct a entrez widget.
 
@@ -403,7 +572,12 @@ class EntrezView(QtGui.QWidget, BaseEntrezView):
         # Top Search Form
         self.search_layout = QtGui.QFormLayout()
         self.query_input = QtGui.QLineEdit(self)
-        self.query_input.textChanged.connect(self._query_input_changed)
+        # Only ask for a suggestion once the user pauses typing.
+        self.query_changed_timer = QtCore.QTimer(self)
+        self.query_changed_timer.setSingleShot(True)
+        self.query_changed_timer.setInterval(self.QUERY_CHANGED_DELAY)
+        self.query_changed_timer.timeout.connect(self._query_input_changed)
+        self.query_input.textChanged.connect(self.query_changed_timer.start)
         self.search_layout.addRow('&Query', self.query_input)
 
         self.suggestion_display = QtGui.QLabel(self)
@@ -429,6 +603,8 @@ class EntrezView(QtGui.QWidget, BaseEntrezView):
         self.results_list = QtGui.QListWidget(self)
         self.results_list_label.setBuddy(self.results_list)
         self.results_list.currentRowChanged.connect(self._result_selected)
+        self.results_list.verticalScrollBar().valueChanged.connect(
+            self._results_scrolled)
         self.results_list_layout.addWidget(self.results_list)
         self.results_splitter.addWidget(self.results_list_container)
 
@@ -489,10 +665,39 @@ class EntrezView(QtGui.QWidget, BaseEntrezView):
     def set_selected_seq(self, seq_str):
         self.seq_display.setPlainText(seq_str)
 
-    def set_result(self, results):
-        self.results_list.clear()
+    def set_result(self, results, append=False):
+        if not append:
+            self.results_list.clear()
         self.results_list.addItems(results)
 
+    def set_result_titles(self, start, titles):
+        for row, title in enumerate(titles, start):
+            item = self.results_list.item(row)
+            if item is None:
+                break
+            # Ids are kept in the item data so that titles may be
+            # set more than once.
+            entrez_id = item.data(QtCore.Qt.UserRole) or item.text()
+            item.setData(QtCore.Qt.UserRole, entrez_id)
+            item.setText('{0} {1}'.format(entrez_id, title))
+
+    def set_searching(self, searching):
+        # Searches may still be made; a new one replaces the last.
+        self.submit_button.setText('Se&arching...' if searching
+                                   else 'Se&arch')
+
+    def set_loading_seq(self, loading):
+        self.load_button.setEnabled(not loading)
+        self.load_button.setText('Loading...' if loading else 'Load')
+
+    def show_error(self, message):
+        """Show the user an error dialog.
+
+        :param message: error message
+        :type message: :class:`str`
+        """
+        QtGui.QMessageBox.critical(self, metadata.nice_title, message)
+
     def _get_query(self):
         """Return the query widget's entered text.
 
@@ -513,6 +718,11 @@ class EntrezView(QtGui.QWidget, BaseEntrezView):
         """Submit the entered term."""
         self.query_changed(self._get_query())
 
+    def _results_scrolled(self, value):
+        """Ask for more results once the end of the list is reached."""
+        if value == self.results_list.verticalScrollBar().maximum():
+            self.more_results_requested()
+
     def _result_selected(self, current_row):
         """Pulls the selected index."""
         if current_row >= 0:
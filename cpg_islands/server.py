@@ -0,0 +1,440 @@
+""":mod:`cpg_islands.server` --- Local HTTP service for finding islands
+
+Jobs are posted as JSON to ``/islands`` and run on a warm pool of
+worker processes. Islands are streamed back as newline-delimited JSON,
+one object per line, as each record's scan completes.
+
+A job names either a sequence or a sequence file::
+
+    {"seq": "ATATACACGGAATATT", "island_size": 4}
+    {"path": "/data/chr21.fa", "format": "fasta", "min_gc_ratio": 0.55}
+    {"path": "/data/chr21.fa", "merge_gap": 100, "min_length": 500}
+
+Omitted island definition parameters take the same defaults as the GUI.
+Sequences are encoded with :func:`cpg_islands.encoding.encode_chunk`
+however they arrive, so lowercase bases count just as they do in the GUI.
+FASTA and GenBank files are split into records by
+:class:`cpg_islands.loader.RecordRanges`, and each record is parsed by
+the worker which scans it; other formats are parsed as they are read.
+``merge_gap`` and ``min_length`` merge each record's islands with
+:func:`cpg_islands.islands.merge_islands`.
+``GET /engines`` lists the identifiers which may be given as
+``engine``.
+"""
+
+import BaseHTTPServer
+from collections import deque
+import json
+import os
+import socket
+import SocketServer
+
+from Bio import SeqIO
+
+from cpg_islands import metadata
+from cpg_islands.algorithms import registry, validate_parameters
+from cpg_islands.encoding import encode_chunk
+from cpg_islands.islands import (submit_islands, as_seq_str, get_engine,
+                                 validate_merging, DEFAULT_ENGINE,
+                                 DEFAULT_ISLAND_SIZE, DEFAULT_MIN_GC_RATIO,
+                                 DEFAULT_MIN_OBS_EXP_CPG_RATIO)
+from cpg_islands.loader import (find_record_islands, RecordError,
+                                RecordRanges, SPLIT_FORMATS)
+from cpg_islands.tasks import Task
+
+NDJSON_TYPE = 'application/x-ndjson'
+"""Media type of streamed responses."""
+
+GENBANK_EXTENSIONS = frozenset(['.gb', '.gbk', '.genbank'])
+"""File extensions taken to mean GenBank when no format is given."""
+
+
+class Job(object):
+    """Container class for a request to find islands."""
+    def __init__(self, records, island_size=DEFAULT_ISLAND_SIZE,
+                 min_gc_ratio=DEFAULT_MIN_GC_RATIO,
+                 min_obs_exp_cpg_ratio=DEFAULT_MIN_OBS_EXP_CPG_RATIO,
+                 engine=DEFAULT_ENGINE, merge_gap=0, min_length=0):
+        """Constructor.
+
+        :param records: ``(record_id, seq)`` tuple for each sequence,
+            or the ranges of records in a file which the executor's
+            workers are to read
+        :type records: iterable of :class:`tuple` or
+            :class:`cpg_islands.loader.RecordRanges`
+        :param island_size: the number of bases which an island may contain
+        :type island_size: :class:`int`
+        :param min_gc_ratio: the ratio of GC to other bases
+        :type min_gc_ratio: :class:`float`
+        :param min_obs_exp_cpg_ratio: minimum observed-to-expected CpG ratio
+        :type min_obs_exp_cpg_ratio: :class:`float`
+        :param engine: identifier of the algorithm to use
+        :type engine: :class:`str`
+        :param merge_gap: islands with fewer bases than this between
+            them are merged
+        :type merge_gap: :class:`int`
+        :param min_length: minimum length of an island after merging
+        :type min_length: :class:`int`
+        """
+        self.records = records
+        self.island_size = island_size
+        self.min_gc_ratio = min_gc_ratio
+        self.min_obs_exp_cpg_ratio = min_obs_exp_cpg_ratio
+        self.engine = engine
+        self.merge_gap = merge_gap
+        self.min_length = min_length
+
+    @classmethod
+    def from_json(cls, body):
+        """Read a job from the body of a request.
+
+        :param body: the JSON request body
+        :type body: :class:`str`
+        :return: the job
+        :rtype: :class:`Job`
+        :raise: :exc:`ValueError` if the request is malformed
+        """
+        request = json.loads(body)
+        if not isinstance(request, dict):
+            raise ValueError('Request must be a JSON object')
+        if ('seq' in request) == ('path' in request):
+            raise ValueError('Request must give exactly one of seq or path')
+        try:
+            job = cls(None,
+                      int(request.get('island_size', DEFAULT_ISLAND_SIZE)),
+                      float(request.get('min_gc_ratio',
+                                        DEFAULT_MIN_GC_RATIO)),
+                      float(request.get('min_obs_exp_cpg_ratio',
+                                        DEFAULT_MIN_OBS_EXP_CPG_RATIO)),
+                      str(request.get('engine', DEFAULT_ENGINE)),
+                      int(request.get('merge_gap', 0)),
+                      int(request.get('min_length', 0)))
+        except TypeError:
+            raise ValueError('Invalid island definition parameters')
+        get_engine(job.engine)
+        validate_merging(job.merge_gap, job.min_length)
+        if 'seq' in request:
+            try:
+                seq_str = encode_chunk(as_seq_str(request['seq']))
+            except TypeError as error:
+                raise ValueError(str(error))
+            # A lone sequence can be checked before anything is sent.
+            validate_parameters(len(seq_str), job.island_size,
+                                job.min_gc_ratio, job.min_obs_exp_cpg_ratio)
+            job.records = [(request.get('id'), seq_str)]
+        else:
+            job.records = _read_records(request['path'],
+                                        request.get('format'))
+        return job
+
+
+def _read_records(path, file_format=None):
+    """Lazily read the records in a sequence file, or find where they
+    are if workers can read them.
+
+    :param path: path to the file
+    :type path: :class:`str`
+    :param file_format: Biopython name of the file's format, or
+        :data:`None` to guess from its extension
+    :type file_format: :class:`str`
+    :return: the ranges of the records, or a ``(record_id, seq)``
+        tuple for each record
+    :rtype: :class:`cpg_islands.loader.RecordRanges` or iterator of
+        :class:`tuple`
+    :raise: :exc:`ValueError` if the file cannot be opened or the
+        format is unknown
+    """
+    if file_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        file_format = ('genbank' if extension in GENBANK_EXTENSIONS
+                       else 'fasta')
+    if file_format in SPLIT_FORMATS:
+        try:
+            return RecordRanges.scan(path, file_format)
+        except EnvironmentError as error:
+            raise ValueError(str(error))
+    try:
+        handle = open(path)
+    except IOError as error:
+        raise ValueError(str(error))
+    try:
+        records = SeqIO.parse(handle, file_format)
+    except ValueError:
+        handle.close()
+        raise
+    return _iter_records(handle, records)
+
+
+def _iter_records(handle, records):
+    """Produce ``(record_id, seq)`` tuples of encoded sequences,
+    closing the file when done.
+
+    :param handle: the open file
+    :type handle: :class:`file`
+    :param records: the records being parsed from it
+    :type records: iterator of :class:`SeqRecord`
+    :return: ``(record_id, seq)`` tuple for each record
+    :rtype: iterator of :class:`tuple`
+    """
+    with handle:
+        for record in records:
+            yield record.id, encode_chunk(str(record.seq))
+
+
+def iter_island_lines(executor, job, max_pending):
+    """Run a job and produce its output.
+
+    Records are scanned in parallel on the executor, with at most
+    ``max_pending`` submitted at once, but output stays in record
+    order. If the consumer stops early, unfinished scans are cancelled.
+    Records given by their ranges in a file are also read by the scans.
+
+    :param executor: executor to run scans on
+    :type executor: :class:`cpg_islands.tasks.ProcessExecutor`
+    :param job: the job
+    :type job: :class:`Job`
+    :param max_pending: maximum number of records in flight
+    :type max_pending: :class:`int`
+    :return: a JSON object per island or per failed record
+    :rtype: iterator of :class:`str`
+    """
+    pending = deque()
+    try:
+        for lines, task in _iter_scans(executor, job):
+            pending.append((lines, task))
+            if len(pending) >= max_pending:
+                for line in pending.popleft()[0]:
+                    yield line
+        while pending:
+            for line in pending.popleft()[0]:
+                yield line
+    finally:
+        for lines, task in pending:
+            task.cancel()
+
+
+def _iter_scans(executor, job):
+    """Start scanning a job's records, one at a time as needed.
+
+    :return: the output of each scan, which waits for it, and its task
+    :rtype: iterator of :class:`tuple`
+    """
+    if isinstance(job.records, RecordRanges):
+        for start, end in job.records:
+            task = executor.submit(
+                find_record_islands, job.records.path,
+                job.records.file_format, start, end, job.island_size,
+                job.min_gc_ratio, job.min_obs_exp_cpg_ratio, job.engine,
+                job.merge_gap, job.min_length)
+            yield _record_result_lines(task), task
+        return
+    records = iter(job.records)
+    while True:
+        try:
+            record_id, seq = next(records)
+        except StopIteration:
+            return
+        except ValueError as error:
+            # The file is malformed; report what was scanned.
+            task = _failed_task(error)
+            yield _result_lines(None, task), task
+            return
+        task = _submit(executor, job, seq)
+        yield _result_lines(record_id, task), task
+
+
+def _submit(executor, job, seq):
+    """Start scanning a record.
+
+    :return: the scan's task, which has already failed if the
+        parameters don't suit the record
+    :rtype: :class:`cpg_islands.tasks.Task`
+    """
+    try:
+        return submit_islands(executor, seq, job.island_size,
+                              job.min_gc_ratio, job.min_obs_exp_cpg_ratio,
+                              job.engine, merge_gap=job.merge_gap,
+                              min_length=job.min_length)
+    except ValueError as error:
+        return _failed_task(error)
+
+
+def _failed_task(error):
+    """Create a task which has already failed.
+
+    :param error: the failure
+    :type error: :exc:`Exception`
+    :return: the task
+    :rtype: :class:`cpg_islands.tasks.Task`
+    """
+    task = Task(None)
+    task.set_running()
+    task.set_exception_info((type(error), error, None))
+    return task
+
+
+def _result_lines(record_id, task):
+    """Wait for a record's scan and format its islands.
+
+    :param record_id: the record's identifier
+    :type record_id: :class:`str`
+    :param task: the scan's task
+    :type task: :class:`cpg_islands.tasks.Task`
+    :return: a JSON object per island, or one describing the error
+    :rtype: iterator of :class:`str`
+    """
+    try:
+        islands = task.result()
+    except Exception as error:
+        yield _json_line(record=record_id, error=str(error))
+        return
+    for line in _island_lines(record_id, islands):
+        yield line
+
+
+def _record_result_lines(task):
+    """Wait for a scan which reads its own record and format its
+    islands.
+
+    :param task: the scan's task, whose result is the record's
+        identifier and its islands
+    :type task: :class:`cpg_islands.tasks.Task`
+    :return: a JSON object per island, or one describing the error
+    :rtype: iterator of :class:`str`
+    """
+    try:
+        record_id, islands = task.result()
+    except RecordError as error:
+        yield _json_line(record=error.record_id, error=str(error))
+        return
+    except Exception as error:
+        # The record couldn't be read, so its identifier is unknown.
+        yield _json_line(record=None, error=str(error))
+        return
+    for line in _island_lines(record_id, islands):
+        yield line
+
+
+def _island_lines(record_id, islands):
+    """Format a record's islands.
+
+    :param record_id: the record's identifier
+    :type record_id: :class:`str`
+    :param islands: the islands
+    :type islands: :class:`cpg_islands.islands.IslandArrays`
+    :return: a JSON object per island
+    :rtype: iterator of :class:`str`
+    """
+    for start, end, gc_ratio, obs_exp_cpg_ratio in islands:
+        yield _json_line(record=record_id, start=start, end=end,
+                         gc_ratio=gc_ratio,
+                         obs_exp_cpg_ratio=obs_exp_cpg_ratio)
+
+
+def _json_line(**fields):
+    """Format an object as a line of newline-delimited JSON.
+
+    :return: the line
+    :rtype: :class:`str`
+    """
+    return json.dumps(fields, sort_keys=True) + '\n'
+
+
+class IslandRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Handles requests to an :class:`IslandServer`."""
+    # Keep connections alive so that clients sending many short
+    # sequences don't pay for a connection each time.
+    protocol_version = 'HTTP/1.1'
+    server_version = '{0}/{1}'.format(metadata.title, metadata.version)
+
+    def do_GET(self):
+        if self.path == '/engines':
+            self._send_json(200, [algo.id for algo in registry])
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path != '/islands':
+            self._send_json(404, {'error': 'Not found'})
+            return
+        try:
+            job = Job.from_json(body)
+        except ValueError as error:
+            self._send_json(400, {'error': str(error)})
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', NDJSON_TYPE)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        lines = iter_island_lines(self.server.executor, job,
+                                  self.server.max_pending)
+        try:
+            for line in lines:
+                self._write_chunk(line)
+            self._write_chunk('')
+        except socket.error:
+            # The client went away; stop its scans.
+            lines.close()
+            self.close_connection = 1
+
+    def _write_chunk(self, data):
+        """Write part of a chunked response. An empty chunk ends the
+        response.
+
+        :param data: the data
+        :type data: :class:`str`
+        """
+        self.wfile.write('{0:x}\r\n{1}\r\n'.format(len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status, obj):
+        """Send a complete JSON response.
+
+        :param status: HTTP status code
+        :type status: :class:`int`
+        :param obj: the response
+        :type obj: :class:`object`
+        """
+        data = json.dumps(obj)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(
+                self, format, *args)
+
+
+class IslandServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """HTTP server running island jobs on a shared executor."""
+    daemon_threads = True
+
+    def __init__(self, address, executor, max_pending=None, verbose=False):
+        """Constructor.
+
+        :param address: ``(host, port)`` to listen on
+        :type address: :class:`tuple`
+        :param executor: executor shared by all jobs, normally a warm
+            :class:`cpg_islands.tasks.ProcessExecutor`
+        :type executor: :class:`cpg_islands.tasks.ProcessExecutor`
+        :param max_pending: maximum number of records per job in
+            flight at once; defaults to twice the number of workers
+        :type max_pending: :class:`int`
+        :param verbose: whether to log each request
+        :type verbose: :class:`bool`
+        """
+        BaseHTTPServer.HTTPServer.__init__(
+            self, address, IslandRequestHandler)
+        self.executor = executor
+        self.max_pending = (2 * getattr(executor, 'max_workers', 1)
+                            if max_pending is None else max_pending)
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        """URL the server is listening on."""
+        return 'http://{0}:{1}/'.format(*self.server_address)
@@ -0,0 +1,171 @@
+""":mod:`cpg_islands.shared` --- Sequences shared between processes
+
+A sequence passed to a worker process as an argument is pickled and
+copied into that worker. Publishing it instead writes the encoded bases
+and their prefix counts once to a memory-mapped file, in shared memory
+where the platform has it. Workers are sent a small handle and map the
+same pages read-only, so attaching copies nothing and memory use stays
+flat however many workers there are.
+"""
+
+import mmap
+import os
+import tempfile
+
+import numpy as np
+
+from cpg_islands.counts import COUNT_DTYPE, PrefixCounts
+
+SHARED_MEMORY_DIR = '/dev/shm'
+"""Directory backed by memory, used for published sequences if it
+exists."""
+
+MIN_SHARED_LEN = 1024 * 1024
+"""Sequences shorter than this are cheaper to pickle than to publish."""
+
+
+def _counts_offset(seq_len):
+    """Return where the counts begin in a published file, aligned so
+    that they may be viewed in place.
+
+    :param seq_len: length of the sequence
+    :type seq_len: :class:`int`
+    :return: offset in bytes
+    :rtype: :class:`int`
+    """
+    alignment = COUNT_DTYPE.itemsize
+    return -(-seq_len // alignment) * alignment
+
+
+class SharedSequence(object):
+    """Handle to an encoded sequence and its prefix counts published to
+    a memory-mapped file. Handles pickle to just the file's location,
+    and map the file when first used in each process.
+    """
+    def __init__(self, path, seq_len, has_counts=True):
+        """Constructor. Use :meth:`publish` to create a new shared
+        sequence.
+
+        :param path: path to the published file
+        :type path: :class:`str`
+        :param seq_len: length of the sequence
+        :type seq_len: :class:`int`
+        :param has_counts: whether the file holds the prefix counts
+        :type has_counts: :class:`bool`
+        """
+        self.path = path
+        self.seq_len = seq_len
+        self.has_counts = has_counts
+        self._mapping = None
+        self._bases = None
+        self._counts = None
+
+    @classmethod
+    def publish(cls, seq_str, counts=None, with_counts=True):
+        """Write a sequence where other processes can map it.
+
+        :param seq_str: the encoded sequence
+        :type seq_str: :class:`str`, :class:`bytearray` or
+            :class:`buffer`
+        :param counts: the sequence's prefix counts, if already known
+        :type counts: :class:`cpg_islands.counts.PrefixCounts`
+        :param with_counts: whether to publish the prefix counts, which
+            are twelve times the size of the sequence; without them,
+            processes count the bases themselves if they need to
+        :type with_counts: :class:`bool`
+        :return: handle to the published sequence, which the caller
+            must :meth:`unlink` once workers are finished with it
+        :rtype: :class:`SharedSequence`
+        """
+        if counts is None and with_counts:
+            counts = PrefixCounts.from_seq(seq_str)
+        seq_len = len(seq_str)
+        directory = (SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR)
+                     else None)
+        fd, path = tempfile.mkstemp(prefix='cpg-islands-', suffix='.seq',
+                                    dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as shared_file:
+                shared_file.write(buffer(seq_str))
+                if with_counts:
+                    shared_file.write(
+                        '\0' * (_counts_offset(seq_len) - seq_len))
+                    for array in (counts.c_counts, counts.g_counts,
+                                  counts.cpg_counts):
+                        shared_file.write(buffer(
+                            np.ascontiguousarray(array, COUNT_DTYPE)))
+                elif not seq_len:
+                    # Empty files cannot be mapped.
+                    shared_file.write('\0')
+        except Exception:
+            os.remove(path)
+            raise
+        return cls(path, seq_len, with_counts)
+
+    def __getstate__(self):
+        return {'path': self.path, 'seq_len': self.seq_len,
+                'has_counts': self.has_counts}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'], state['seq_len'],
+                      state['has_counts'])
+
+    def __len__(self):
+        return self.seq_len
+
+    def _attach(self):
+        """Map the published file if it isn't already."""
+        if self._mapping is not None:
+            return
+        with open(self.path, 'rb') as shared_file:
+            self._mapping = mmap.mmap(shared_file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+        self._bases = buffer(self._mapping, 0, self.seq_len)
+        if not self.has_counts:
+            return
+        count_len = self.seq_len + 1
+        offset = _counts_offset(self.seq_len)
+        arrays = []
+        for _ in xrange(3):
+            arrays.append(np.frombuffer(self._mapping, COUNT_DTYPE,
+                                        count_len, offset))
+            offset += count_len * COUNT_DTYPE.itemsize
+        self._counts = PrefixCounts(*arrays)
+
+    @property
+    def bases(self):
+        """The encoded sequence, viewed in place. It may be indexed and
+        sliced like a :class:`str`.
+        """
+        self._attach()
+        return self._bases
+
+    @property
+    def counts(self):
+        """The sequence's prefix counts, viewed in place, or counted in
+        this process if they weren't published.
+
+        :rtype: :class:`cpg_islands.counts.PrefixCounts`
+        """
+        self._attach()
+        if self._counts is None:
+            self._counts = PrefixCounts.from_seq(self._bases)
+        return self._counts
+
+    def close(self):
+        """Drop this process's mapping of the file. Views already
+        handed out keep it mapped until they are released.
+        """
+        self._mapping = None
+        self._bases = None
+        self._counts = None
+
+    def unlink(self):
+        """Remove the published file. Processes which have mapped it
+        may keep using it; its memory is freed once they are done.
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
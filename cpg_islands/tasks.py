@@ -0,0 +1,489 @@
+""":mod:`cpg_islands.tasks` --- Running work in the background
+"""
+
+import multiprocessing
+import sys
+import threading
+from Queue import Queue
+
+
+class CancelledError(Exception):
+    """Raised when the result of a cancelled task is requested, or by
+    :func:`checkpoint` to abandon a task whose cancellation has been
+    requested.
+    """
+    pass
+
+
+_current = threading.local()
+
+
+def current_task():
+    """Return the task being run by the calling thread.
+
+    :return: the task, or :data:`None` if the thread is not running one
+    :rtype: :class:`Task`
+    """
+    return getattr(_current, 'task', None)
+
+
+def checkpoint():
+    """Abandon the task being run by the calling thread if its
+    cancellation has been requested. Long-running functions should call
+    this now and then so that they may be cancelled once started.
+
+    :raise: :exc:`CancelledError` if cancellation has been requested
+    """
+    task = getattr(_current, 'task', None)
+    if task is not None and task.cancel_requested:
+        raise CancelledError()
+
+
+class Task(object):
+    """The eventual result of a function run by an executor."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    CANCELLED = 'cancelled'
+
+    def __init__(self, func, args=(), kwargs=None):
+        """Constructor.
+
+        :param func: the function to run
+        :type func: callable
+        :param args: positional arguments for the function
+        :type args: :class:`tuple`
+        :param kwargs: keyword arguments for the function
+        :type kwargs: :class:`dict`
+        """
+        self.func = func
+        self.args = args
+        self.kwargs = {} if kwargs is None else kwargs
+        self.state = self.PENDING
+        self.cancel_requested = False
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+        self._condition = threading.Condition()
+
+    def run(self):
+        """Run the function, unless the task has been cancelled. This
+        is called by executors.
+        """
+        if not self.set_running():
+            return
+        previous_task = getattr(_current, 'task', None)
+        _current.task = self
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except CancelledError:
+            if self.cancel_requested:
+                self.set_cancelled()
+            else:
+                self.set_exception_info(sys.exc_info())
+        except Exception:
+            self.set_exception_info(sys.exc_info())
+        else:
+            self.set_result(result)
+        finally:
+            _current.task = previous_task
+
+    def set_running(self):
+        """Mark the task as running, unless it has been cancelled. This
+        is called by executors which run the function themselves.
+
+        :return: whether the function should be run
+        :rtype: :class:`bool`
+        """
+        with self._condition:
+            if self.state != self.PENDING:
+                return False
+            self.state = self.RUNNING
+            return True
+
+    def set_result(self, result):
+        """Record the function's return value. This is called by
+        executors which run the function themselves.
+
+        :param result: the return value
+        :type result: :class:`object`
+        """
+        self._finish(result, None)
+
+    def set_exception_info(self, exc_info):
+        """Record the exception raised by the function. This is called
+        by executors which run the function themselves.
+
+        :param exc_info: the exception, as returned by
+            :func:`sys.exc_info`
+        :type exc_info: :class:`tuple`
+        """
+        self._finish(None, exc_info)
+
+    def set_cancelled(self):
+        """Record that the function was abandoned after its
+        cancellation was requested.
+        """
+        with self._condition:
+            self.state = self.CANCELLED
+            self._condition.notify_all()
+        self._run_callbacks()
+
+    def _finish(self, result, exc_info):
+        """Record the outcome and notify waiters and callbacks.
+
+        :param result: the function's return value
+        :type result: :class:`object`
+        :param exc_info: the exception raised by the function, if any
+        :type exc_info: :class:`tuple`
+        """
+        with self._condition:
+            self._result = result
+            self._exc_info = exc_info
+            self.state = self.FINISHED
+            self._condition.notify_all()
+        self._run_callbacks()
+
+    def cancel(self):
+        """Cancel the task if it has not started running. If it is
+        running, request that it stop; the function sees the request
+        at its next :func:`checkpoint`, and some executors abandon it
+        outright.
+
+        :return: whether the task is now cancelled
+        :rtype: :class:`bool`
+        """
+        with self._condition:
+            if self.state == self.PENDING:
+                self.state = self.CANCELLED
+                self._condition.notify_all()
+            elif self.state == self.RUNNING:
+                self.cancel_requested = True
+                return False
+            elif self.state != self.CANCELLED:
+                return False
+        self._run_callbacks()
+        return True
+
+    def cancelled(self):
+        """Return whether the task was cancelled."""
+        return self.state == self.CANCELLED
+
+    def running(self):
+        """Return whether the task is currently running."""
+        return self.state == self.RUNNING
+
+    def done(self):
+        """Return whether the task has finished or was cancelled."""
+        return self.state in (self.FINISHED, self.CANCELLED)
+
+    def _wait(self, timeout):
+        """Block until the task is done.
+
+        :param timeout: seconds to wait, or :data:`None` to wait forever
+        :type timeout: :class:`float`
+        :raise: :exc:`CancelledError` if the task was cancelled
+        :raise: :exc:`RuntimeError` if the timeout expires
+        """
+        with self._condition:
+            if not self.done():
+                self._condition.wait(timeout)
+            if self.state == self.CANCELLED:
+                raise CancelledError()
+            if self.state != self.FINISHED:
+                raise RuntimeError('Timed out waiting for task')
+
+    def result(self, timeout=None):
+        """Return the function's result, waiting for it if necessary.
+        If the function raised an exception, it is re-raised here.
+
+        :param timeout: seconds to wait, or :data:`None` to wait forever
+        :type timeout: :class:`float`
+        :return: the function's return value
+        :rtype: :class:`object`
+        """
+        self._wait(timeout)
+        if self._exc_info is not None:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        """Return the exception raised by the function, waiting for it
+        if necessary.
+
+        :param timeout: seconds to wait, or :data:`None` to wait forever
+        :type timeout: :class:`float`
+        :return: the exception, or :data:`None` if there was none
+        :rtype: :exc:`Exception`
+        """
+        self._wait(timeout)
+        return None if self._exc_info is None else self._exc_info[1]
+
+    def add_done_callback(self, callback):
+        """Arrange for a callable to be called with this task when it
+        is done. If it is already done, the callable is called
+        immediately. Callbacks run in the thread which finished the
+        task.
+
+        :param callback: the callable
+        :type callback: callable
+        """
+        with self._condition:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def _run_callbacks(self):
+        """Call and forget all registered callbacks."""
+        with self._condition:
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            callback(self)
+
+
+class ImmediateExecutor(object):
+    """Executor which runs each task right away in the calling
+    thread. Useful where background work must be deterministic.
+    """
+    def submit(self, func, *args, **kwargs):
+        """Run a function.
+
+        :param func: the function to run
+        :type func: callable
+        :return: the finished task
+        :rtype: :class:`Task`
+        """
+        task = Task(func, args, kwargs)
+        task.run()
+        return task
+
+    def shutdown(self, wait=True):
+        """Do nothing; there is nothing to shut down."""
+        pass
+
+
+class ThreadExecutor(object):
+    """Executor which runs tasks on a bounded pool of daemon threads.
+    Threads are started when the first task is submitted.
+    """
+    def __init__(self, max_workers):
+        """Constructor.
+
+        :param max_workers: the number of worker threads
+        :type max_workers: :class:`int`
+        """
+        if max_workers <= 0:
+            raise ValueError(
+                'Invalid number of workers: {0}'.format(max_workers))
+        self.max_workers = max_workers
+        self._queue = Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def _start_threads(self):
+        """Start the worker threads if they are not running. Must be
+        called with the lock held.
+        """
+        while len(self._threads) < self.max_workers:
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        """Run tasks from the queue until told to stop."""
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            task.run()
+
+    def submit(self, func, *args, **kwargs):
+        """Schedule a function to be run.
+
+        :param func: the function to run
+        :type func: callable
+        :return: the scheduled task
+        :rtype: :class:`Task`
+        :raise: :exc:`RuntimeError` if the executor has been shut down
+        """
+        task = Task(func, args, kwargs)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('Cannot submit after shutdown')
+            self._start_threads()
+            self._queue.put(task)
+        return task
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads once queued tasks have run.
+
+        :param wait: whether to block until the threads have stopped
+        :type wait: :class:`bool`
+        """
+        with self._lock:
+            self._shutdown = True
+            threads = self._threads
+            for _ in threads:
+                self._queue.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()
+
+
+def _serve(connection, initializer, initargs):
+    """Run functions sent by a :class:`ProcessExecutor` until told to
+    stop. This is the main function of worker processes.
+
+    :param connection: the worker's end of its pipe
+    :type connection: :class:`multiprocessing.Connection`
+    :param initializer: function to call before serving, if any
+    :type initializer: callable
+    :param initargs: arguments for the initializer
+    :type initargs: :class:`tuple`
+    """
+    if initializer is not None:
+        initializer(*initargs)
+    while True:
+        try:
+            message = connection.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        func, args, kwargs = message
+        try:
+            reply = (True, func(*args, **kwargs))
+        except Exception as error:
+            reply = (False, error)
+        try:
+            connection.send(reply)
+        except Exception as error:
+            # The result or exception couldn't be pickled.
+            connection.send((False, RuntimeError(repr(error))))
+
+
+class _Worker(object):
+    """A worker process and the executor's end of its pipe."""
+    def __init__(self, initializer, initargs):
+        """Start the process.
+
+        :param initializer: function to call in the process before it
+            runs any tasks, if any
+        :type initializer: callable
+        :param initargs: arguments for the initializer
+        :type initargs: :class:`tuple`
+        """
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_serve, args=(child_connection, initializer, initargs))
+        self.process.daemon = True
+        self.process.start()
+        child_connection.close()
+
+    def stop(self):
+        """Ask the process to exit and wait for it."""
+        try:
+            self.connection.send(None)
+        except IOError:
+            pass
+        self.process.join()
+        self.connection.close()
+
+    def kill(self):
+        """End the process right away."""
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+class ProcessExecutor(ThreadExecutor):
+    """Executor which runs tasks in a pool of worker processes. Each
+    worker process is started when it is first needed and kept for
+    later tasks, so imports and the initializer are paid for only
+    once. Functions, their arguments and their results must be
+    picklable.
+
+    Cancelling a running task ends its worker process, which is
+    replaced straight away.
+    """
+    POLL_INTERVAL = 0.05
+    """Seconds between checks for cancellation of a running task."""
+
+    def __init__(self, max_workers=None, initializer=None, initargs=()):
+        """Constructor.
+
+        :param max_workers: the number of worker processes; defaults
+            to the number of CPUs
+        :type max_workers: :class:`int`
+        :param initializer: function to call in each worker process
+            before it runs any tasks, e.g., to import modules
+        :type initializer: callable
+        :param initargs: arguments for the initializer
+        :type initargs: :class:`tuple`
+        """
+        super(ProcessExecutor, self).__init__(
+            multiprocessing.cpu_count() if max_workers is None
+            else max_workers)
+        self.initializer = initializer
+        self.initargs = initargs
+
+    def _work(self):
+        """Send tasks from the queue to a worker process until told to
+        stop.
+        """
+        worker = None
+        try:
+            while True:
+                task = self._queue.get()
+                if task is None:
+                    return
+                if not task.set_running():
+                    continue
+                if worker is None:
+                    worker = _Worker(self.initializer, self.initargs)
+                if not self._run_in_worker(worker, task):
+                    # Replace the worker now rather than when the next
+                    # task arrives, so that the pool stays warm.
+                    worker = (None if self._shutdown
+                              else _Worker(self.initializer, self.initargs))
+        finally:
+            if worker is not None:
+                worker.stop()
+
+    def _run_in_worker(self, worker, task):
+        """Run a task in a worker process and record its outcome.
+
+        :param worker: the worker
+        :type worker: :class:`_Worker`
+        :param task: the running task
+        :type task: :class:`Task`
+        :return: whether the worker may be used again
+        :rtype: :class:`bool`
+        """
+        try:
+            worker.connection.send((task.func, task.args, task.kwargs))
+        except Exception:
+            # The task couldn't be pickled; the worker is unaffected.
+            task.set_exception_info(sys.exc_info())
+            return True
+        while not worker.connection.poll(self.POLL_INTERVAL):
+            if task.cancel_requested:
+                worker.kill()
+                task.set_cancelled()
+                return False
+        try:
+            succeeded, value = worker.connection.recv()
+        except EOFError:
+            worker.kill()
+            task.set_exception_info(
+                (RuntimeError, RuntimeError('Worker process died'), None))
+            return False
+        if succeeded:
+            task.set_result(value)
+        else:
+            task.set_exception_info((type(value), value, None))
+        return True
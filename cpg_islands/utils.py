@@ -1,6 +1,9 @@
 """:mod:`cpg_islands.utils` --- Miscellaneous utilities
 """
 
+from collections import OrderedDict
+import threading
+
 
 # credit: <http://stackoverflow.com/a/2022629>
 class Event(list):
@@ -35,3 +38,131 @@ class Event(list):
 
     def __repr__(self):
         return 'Event({0})'.format(list.__repr__(self))
+
+
+def call_directly(func, *args):
+    """Dispatcher which calls a function right away in the calling
+    thread. Models which do work in the background use a dispatcher to
+    fire their events; GUIs substitute one which moves the call onto
+    their own thread.
+
+    :param func: the function to call
+    :type func: callable
+    """
+    func(*args)
+
+
+class LRUCache(object):
+    """Mapping of limited size which discards the least recently used
+    items first. Instances may be shared between threads.
+    """
+    def __init__(self, max_size):
+        """Constructor.
+
+        :param max_size: maximum number of items to keep
+        :type max_size: :class:`int`
+        """
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return an item, marking it as recently used.
+
+        :param key: the item's key
+        :type key: hashable
+        :param default: value to return if the key is not present
+        :type default: :class:`object`
+        :return: the item, or the default
+        :rtype: :class:`object`
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value
+            return value
+
+    def put(self, key, value):
+        """Add an item, discarding the least recently used item if the
+        cache is full.
+
+        :param key: the item's key
+        :type key: hashable
+        :param value: the item
+        :type value: :class:`object`
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    def clear(self):
+        """Remove all items."""
+        with self._lock:
+            self._items.clear()
+
+
+class ProgressFile(object):
+    """Wrapper for a file being read by a parser, which reports how
+    many bytes have been read now and then.
+    """
+    def __init__(self, handle, callback, interval=1 << 20):
+        """Constructor.
+
+        :param handle: the open file
+        :type handle: :class:`file`
+        :param callback: called with the number of bytes read so far
+            after the first read and then roughly every ``interval``
+            bytes; it may raise to abandon reading
+        :type callback: callable
+        :param interval: bytes between reports
+        :type interval: :class:`int`
+        """
+        self._handle = handle
+        self._callback = callback
+        self.interval = interval
+        self.bytes_read = 0
+        self._next_report = 0
+
+    def _advance(self, data):
+        """Count data read, reporting progress if it is due.
+
+        :param data: the data read
+        :type data: :class:`str`
+        :return: the data
+        :rtype: :class:`str`
+        """
+        self.bytes_read += len(data)
+        if self.bytes_read >= self._next_report:
+            self._next_report = self.bytes_read + self.interval
+            self._callback(self.bytes_read)
+        return data
+
+    def read(self, size=-1):
+        return self._advance(self._handle.read(size))
+
+    def readline(self, size=-1):
+        return self._advance(self._handle.readline(size))
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def close(self):
+        self._handle.close()
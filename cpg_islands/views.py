@@ -15,6 +15,20 @@ class BaseAppView(object):
         :type file_path: :class:`str`
     """
 
+    file_load_cancelled = Event()
+    """Called when the user cancels loading a file. Callbacks should
+    look like:
+
+    .. function:: callback()
+    """
+
+    closed = Event()
+    """Called when the user closes the application. Callbacks should
+    look like:
+
+    .. function:: callback()
+    """
+
     def start(self):
         """Start the view."""
         raise NotImplementedError()
@@ -27,13 +41,26 @@ class BaseAppView(object):
         """Show the results view."""
         raise NotImplementedError()
 
+    def show_load_progress(self, bytes_read, total_bytes):
+        """Show how much of a file has been loaded.
+
+        :param bytes_read: number of bytes of the file read so far;
+            once it equals ``total_bytes``, loading has finished
+        :type bytes_read: :class:`int`
+        :param total_bytes: size of the file
+        :type total_bytes: :class:`int`
+        """
+        raise NotImplementedError()
+
 
 class BaseSeqInputView(object):
     submitted = Event()
     """Called when the form is submitted, i.e., submit is clicked by
     the user. Callbacks should look like:
 
-    .. function:: callback(seq_str, island_size_str, min_gc_ratio_str)
+    .. function:: callback(seq_str, island_size_str, min_gc_ratio_str, \
+                           min_obs_exp_cpg_ratio_str, algo_index, \
+                           exclude_masked)
 
         :param seq_str: the sequence as a string
         :type seq_str: :class:`str`
@@ -41,6 +68,27 @@ class BaseSeqInputView(object):
         :type island_size_str: :class:`str`
         :param min_gc_ratio_str: the ratio of GC to other bases
         :type min_gc_ratio_str: :class:`str`
+        :param min_obs_exp_cpg_ratio_str: minimum observed/expected CpG ratio
+        :type min_obs_exp_cpg_ratio_str: :class:`str`
+        :param algo_index: the index of the chosen algorithm
+        :type algo_index: :class:`int`
+        :param exclude_masked: whether to skip soft-masked (lowercase) regions
+        :type exclude_masked: :class:`bool`
+    """
+
+    parameters_changed = Event()
+    """Called when the user has adjusted the island definition and
+    paused. Callbacks should look like:
+
+    .. function:: callback(island_size_str, min_gc_ratio_str, \
+                           min_obs_exp_cpg_ratio_str)
+
+        :param island_size_str: number of bases which an island may contain
+        :type island_size_str: :class:`str`
+        :param min_gc_ratio_str: the ratio of GC to other bases
+        :type min_gc_ratio_str: :class:`str`
+        :param min_obs_exp_cpg_ratio_str: minimum observed/expected CpG ratio
+        :type min_obs_exp_cpg_ratio_str: :class:`str`
     """
 
     def set_seq(self, seq_str):
@@ -193,8 +241,24 @@ class BaseResultsView(object):
 class BaseEntrezView(object):
     search_requested = Event()
     query_changed = Event()
+    """Called when the user has changed the query and paused
+    typing. Views should not fire this on every keystroke. Callbacks
+    should look like:
+
+    .. function:: callback(query)
+
+        :param query: the query text
+        :type query: :class:`str`
+    """
+
     result_selected = Event()
     load_requested = Event()
+    more_results_requested = Event()
+    """Called when the user has reached the end of the results shown
+    and would like to see more. Callbacks should look like:
+
+    .. function:: callback()
+    """
 
     def set_suggestion(self, suggestion):
         """Set the suggestions based on spelling.
@@ -248,10 +312,49 @@ class BaseEntrezView(object):
         """
         raise NotImplementedError()
 
-    def set_result(self, results):
+    def set_result(self, results, append=False):
         """Set the list of sequence ids.
 
         :param result: list of sequence ids
         :type result: :class:`list`
+        :param append: whether to add the ids to the end of those
+            already shown rather than replacing them
+        :type append: :class:`bool`
+        """
+        raise NotImplementedError()
+
+    def set_result_titles(self, start, titles):
+        """Show the titles of a range of results alongside their ids.
+
+        :param start: index of the first result
+        :type start: :class:`int`
+        :param titles: title of each result
+        :type titles: :class:`list` of :class:`str`
+        """
+        raise NotImplementedError()
+
+    def set_searching(self, searching):
+        """Show whether a search is in flight.
+
+        :param searching: whether a search is in flight
+        :type searching: :class:`bool`
+        """
+        raise NotImplementedError()
+
+    def set_loading_seq(self, loading):
+        """Show whether the selected sequence is being loaded. The
+        current sequence should not be loaded into the sequence input
+        meanwhile.
+
+        :param loading: whether the sequence is being loaded
+        :type loading: :class:`bool`
+        """
+        raise NotImplementedError()
+
+    def show_error(self, message):
+        """Show the user an error dialog.
+
+        :param message: error message
+        :type message: :class:`str`
         """
         raise NotImplementedError()
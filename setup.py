@@ -93,6 +93,9 @@ setup(name=metadata.title,
       entry_points={
           'gui_scripts': [
               'cpg_islands = cpg_islands.qt.main:main'
+          ],
+          'console_scripts': [
+              'cpg-islands = cpg_islands.cli:main'
           ]
       },
       **extra_options)
@@ -0,0 +1,72 @@
+"""Local stand-in for the Entrez utilities, for exercising
+:class:`cpg_islands.entrez.EntrezClient` without going to NCBI.
+"""
+
+import BaseHTTPServer
+import SocketServer
+import threading
+import urlparse
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # Keep connections alive between requests.
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with self.server.lock:
+            self.server.requests.append(
+                (self.path, dict(urlparse.parse_qsl(body))))
+            status = (self.server.statuses.pop(0) if self.server.statuses
+                      else 200)
+        data = self.server.body
+        self.send_response(status)
+        if status != 200 and self.server.retry_after is not None:
+            self.send_header('Retry-After', self.server.retry_after)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class EutilsServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """Server answering every request with :attr:`body`, after first
+    answering with each of :attr:`statuses` in turn, along with
+    :attr:`retry_after` if it is set.
+    """
+    daemon_threads = True
+
+    def __init__(self, body='<eSearchResult/>'):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), _Handler)
+        self.body = body
+        self.statuses = []
+        self.retry_after = None
+        self.requests = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clients may hang up before reading a whole response.
+        pass
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{0}/entrez/eutils/'.format(
+            self.server_address[1])
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever,
+                                  kwargs=dict(poll_interval=0.01))
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
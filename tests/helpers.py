@@ -4,6 +4,7 @@ from Bio.Seq import Seq
 from Bio.Alphabet import IUPAC
 from Bio.SeqFeature import SeqFeature, FeatureLocation
 from Bio.SeqRecord import SeqRecord
+import numpy as np
 
 from cpg_islands.algorithms import IslandMetadata, AlgoResults
 
@@ -34,6 +35,23 @@ def make_seq_record(seq_str='', feature_tuples=[]):
         features=[_make_feature(start, end) for start, end in feature_tuples])
 
 
+def make_random_seq_str(length, gc_ratio=0.5):
+    """Create a random sequence, the same on every call.
+
+    :param length: the number of bases
+    :type length: :class:`int`
+    :param gc_ratio: the expected ratio of C's and G's to all bases
+    :type gc_ratio: :class:`float`
+    :return: the sequence
+    :rtype: :class:`str`
+    """
+    rng = np.random.RandomState(0)
+    at_prob = (1 - gc_ratio) / 2
+    gc_prob = gc_ratio / 2
+    return ''.join(rng.choice(list('ACGT'), length,
+                              p=[at_prob, gc_prob, gc_prob, at_prob]))
+
+
 def make_algo_results(seq_str='', island_metadata_tuples=[]):
     island_features = []
     island_metadata_list = []
@@ -26,7 +26,8 @@ class TestAppModel:
     def test_register_for_events(self, model):
         model.register_for_events()
         assert model.seq_input_model.mock_calls == [
-            call.islands_computed.append(model.islands_computed)]
+            call.islands_computed.append(model.islands_computed),
+            call.file_load_progressed.append(model.file_load_progressed)]
         assert model.entrez_model.mock_calls == [
             call.seq_loaded.append(model.seq_loaded)]
 
@@ -90,7 +91,25 @@ class TestAppModel:
                     [call.set_island_definition_defaults(),
                      call.load_algorithms()])
 
+    class TestShutdown:
+        def test_no_worker_pool(self, model):
+            model.shutdown()
+            assert (model.seq_input_model.mock_calls ==
+                    [call.cancel_file_load(), call.cancel_computation()])
+
+        def test_worker_pool(self, model):
+            model.worker_pool = MagicMock()
+            model.shutdown()
+            assert (model.seq_input_model.mock_calls ==
+                    [call.cancel_file_load(), call.cancel_computation()])
+            assert model.worker_pool.mock_calls == [call.shutdown()]
+
     def test_load_file(self, model):
         model.load_file(sentinel.file_path)
         assert (model.seq_input_model.mock_calls ==
                 [call.load_file(sentinel.file_path)])
+
+    def test_cancel_file_load(self, model):
+        model.cancel_file_load()
+        assert (model.seq_input_model.mock_calls ==
+                [call.cancel_file_load()])
@@ -1,10 +1,29 @@
 from __future__ import division
 
+from cStringIO import StringIO
+
 import pytest
 from mock import sentinel, call, create_autospec, patch, MagicMock
 
 from cpg_islands.models import EntrezModel, MetaSeqInputModel
-from tests.helpers import make_seq_record
+from cpg_islands.tasks import ImmediateExecutor, Task
+from tests.helpers import make_seq_record, fixture_file, read_fixture_file
+
+
+def assert_parsed_once(mock_seqio, text):
+    """Assert that GenBank text was parsed exactly once."""
+    assert mock_seqio.read.call_count == 1
+    handle, format_name = mock_seqio.read.call_args[0]
+    assert handle.getvalue() == text
+    assert format_name == 'genbank'
+
+
+def search_results(id_list, query_translation=sentinel._):
+    return {'IdList': id_list,
+            'QueryTranslation': query_translation,
+            'Count': '250',
+            'WebEnv': sentinel.web_env,
+            'QueryKey': '1'}
 
 
 @pytest.fixture
@@ -17,15 +36,137 @@ class TestEntrezModel:
     def test_search(self, model):
         with patch('cpg_islands.models.Entrez') as mock_entrez:
             mock_entrez.esearch.return_value = sentinel.handle
-            mock_entrez.read.return_value = {
-                'IdList': sentinel.id_list,
-                'QueryTranslation': sentinel.query_translation}
+            mock_entrez.read.return_value = search_results(
+                sentinel.id_list, sentinel.query_translation)
             results = model.search(sentinel.search)
         assert results == (sentinel.id_list, sentinel.query_translation)
         assert mock_entrez.mock_calls == [
-            call.esearch(db='nucleotide', term=sentinel.search),
+            call.esearch(db='nucleotide', term=sentinel.search,
+                         idtype='acc', usehistory='y', retmax=100),
             call.read(sentinel.handle)]
 
+    class TestPaging:
+        def search(self, mock_entrez, model):
+            mock_entrez.read.return_value = search_results(['A.1', 'B.1'])
+            model.search(sentinel._)
+            mock_entrez.reset_mock()
+
+        def test_load_more_results(self, model):
+            callback = MagicMock()
+            model.results_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model)
+                mock_entrez.efetch.return_value.read.return_value = \
+                    'C.1\nD.1\n'
+                model.load_more_results()
+            mock_entrez.efetch.assert_called_once_with(
+                db='nucleotide', rettype='acc', retmode='text',
+                retstart=2, retmax=100,
+                WebEnv=sentinel.web_env, query_key='1')
+            callback.assert_called_once_with(2, ['C.1', 'D.1'])
+            assert model._id_list_cache == ['A.1', 'B.1', 'C.1', 'D.1']
+
+        def test_all_loaded(self, model):
+            callback = MagicMock()
+            model.results_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = dict(
+                    search_results(['A.1']), Count='1')
+                model.search(sentinel._)
+                model.load_more_results()
+            assert mock_entrez.efetch.mock_calls == []
+            assert callback.mock_calls == []
+
+        def test_page_not_requested_twice(self, model):
+            queued = []
+
+            class QueueingExecutor(object):
+                def submit(self, func, *args, **kwargs):
+                    task = Task(func, args, kwargs)
+                    queued.append(task)
+                    return task
+
+            model.executor = QueueingExecutor()
+            model.prefetch_count = 0
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model)
+                model.load_more_results()
+                model.load_more_results()
+            assert len(queued) == 1
+
+        def test_stale_page_dropped(self, model):
+            callback = MagicMock()
+            model.results_found.append(callback)
+            queued = []
+
+            class QueueingExecutor(object):
+                def submit(self, func, *args, **kwargs):
+                    task = Task(func, args, kwargs)
+                    queued.append(task)
+                    return task
+
+            model.executor = QueueingExecutor()
+            model.prefetch_count = 0
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model)
+                model.load_more_results()
+                page_task = queued[0]
+                # Start running the page so that it can't be cancelled.
+                page_task.state = Task.RUNNING
+                self.search(mock_entrez, model)
+                page_task.state = Task.PENDING
+                mock_entrez.efetch.return_value.read.return_value = 'C.1'
+                page_task.run()
+            assert callback.mock_calls == []
+            assert model._id_list_cache == ['A.1', 'B.1']
+
+        def test_failed_page_retried(self, model):
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model)
+                mock_entrez.efetch.side_effect = IOError('fake error')
+                model.load_more_results()
+                mock_entrez.efetch.side_effect = None
+                mock_entrez.efetch.return_value.read.return_value = 'C.1'
+                model.load_more_results()
+            assert mock_entrez.efetch.call_count == 2
+            assert model._id_list_cache == ['A.1', 'B.1', 'C.1']
+
+        def test_request_titles(self, model):
+            callback = MagicMock()
+            model.titles_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model)
+                mock_entrez.read.return_value = [
+                    {'Title': 'first'}, {'Title': 'second'}]
+                model.request_titles(0, 2)
+            mock_entrez.esummary.assert_called_once_with(
+                db='nucleotide', retstart=0, retmax=2,
+                WebEnv=sentinel.web_env, query_key='1')
+            callback.assert_called_once_with(0, ['first', 'second'])
+
+        def test_titles_error_ignored(self, model):
+            callback = MagicMock()
+            model.titles_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model)
+                mock_entrez.esummary.side_effect = IOError('fake error')
+                model.request_titles(0, 2)
+            assert callback.mock_calls == []
+
+    def test_client(self, model):
+        """When a client is given, all requests should go through it."""
+        model.client = MagicMock()
+        model.client.espell.return_value = sentinel.handle
+        model.rate_limiter = MagicMock()
+        with patch('cpg_islands.models.Entrez') as mock_entrez:
+            mock_entrez.read.return_value = {
+                'CorrectedQuery': sentinel.corrected_query}
+            model.suggest(sentinel.text)
+        assert model.client.mock_calls == [
+            call.espell(db='pubmed', term=sentinel.text)]
+        assert mock_entrez.mock_calls == [call.read(sentinel.handle)]
+        assert model.rate_limiter.mock_calls == []
+
     def test_suggest(self, model):
         with patch('cpg_islands.models.Entrez') as mock_entrez:
             mock_entrez.espell.return_value = sentinel.handle
@@ -37,18 +178,202 @@ class TestEntrezModel:
             call.espell(db='pubmed', term=sentinel.text),
             call.read(sentinel.handle)]
 
+    def test_suggest_cached(self, model):
+        with patch('cpg_islands.models.Entrez') as mock_entrez:
+            mock_entrez.read.return_value = {
+                'CorrectedQuery': sentinel.corrected_query}
+            model.suggest('humna')
+            suggestion = model.suggest('humna')
+        assert suggestion == sentinel.corrected_query
+        assert mock_entrez.espell.call_count == 1
+
+    class TestRequestSuggestion:
+        def test_synchronous(self, model):
+            callback = MagicMock()
+            model.suggestion_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = {
+                    'CorrectedQuery': sentinel.corrected_query}
+                model.request_suggestion('humna')
+            assert callback.mock_calls == [call(sentinel.corrected_query)]
+
+        def test_dispatched(self, model):
+            model.executor = ImmediateExecutor()
+            model.dispatch = MagicMock()
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = {
+                    'CorrectedQuery': sentinel.corrected_query}
+                model.request_suggestion('humna')
+            assert model.dispatch.call_count == 1
+            func, task = model.dispatch.call_args[0]
+            callback = MagicMock()
+            model.suggestion_found.append(callback)
+            func(task)
+            assert callback.mock_calls == [call(sentinel.corrected_query)]
+
+        def test_stale_dropped(self, model):
+            """Only the latest request's suggestion is delivered, and
+            requests which haven't gone out yet are cancelled."""
+            queued = []
+            dispatched = []
+
+            class QueueingExecutor(object):
+                def submit(self, func, *args, **kwargs):
+                    task = Task(func, args, kwargs)
+                    queued.append(task)
+                    return task
+
+            model.executor = QueueingExecutor()
+            model.dispatch = lambda func, *args: dispatched.append(
+                (func, args))
+            callback = MagicMock()
+            model.suggestion_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.side_effect = lambda handle: {
+                    'CorrectedQuery': handle}
+                mock_entrez.espell.side_effect = \
+                    lambda db, term: term.upper()
+                model.request_suggestion('hu')
+                model.request_suggestion('hum')
+                # The second request completes, but its result hasn't
+                # reached the GUI thread when the third is made.
+                queued[1].run()
+                model.request_suggestion('huma')
+                queued[2].run()
+            for func, args in dispatched:
+                func(*args)
+            assert queued[0].cancelled()
+            assert callback.mock_calls == [call('HUMA')]
+            assert mock_entrez.espell.call_count == 2
+
+        def test_error_ignored(self, model):
+            model.executor = ImmediateExecutor()
+            callback = MagicMock()
+            model.suggestion_found.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.espell.side_effect = IOError('no network')
+                model.request_suggestion('humna')
+            assert callback.mock_calls == []
+
+    class TestRequestSearch:
+        def test_synchronous(self, model):
+            callback = MagicMock()
+            model.search_completed.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(
+                    ['A.1', 'B.1'], sentinel.query_translation)
+                model.request_search(sentinel.search)
+            assert (callback.mock_calls ==
+                    [call(['A.1', 'B.1'], sentinel.query_translation)])
+
+        def test_stale_dropped(self, model):
+            """Only the latest search is delivered, and searches which
+            haven't gone out yet are cancelled."""
+            queued = []
+            dispatched = []
+
+            class QueueingExecutor(object):
+                def submit(self, func, *args, **kwargs):
+                    task = Task(func, args, kwargs)
+                    queued.append(task)
+                    return task
+
+            model.executor = QueueingExecutor()
+            model.dispatch = lambda func, *args: dispatched.append(
+                (func, args))
+            callback = MagicMock()
+            model.search_completed.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.esearch.side_effect = lambda term, **params: term
+                mock_entrez.read.side_effect = lambda handle: search_results(
+                    [handle + '.1'], handle)
+                model.request_search('A')
+                model.request_search('B')
+                queued[1].run()
+                model.request_search('C')
+                queued[2].run()
+            for func, args in dispatched:
+                func(*args)
+            assert queued[0].cancelled()
+            assert callback.mock_calls == [call(['C.1'], 'C')]
+            assert model._id_list_cache == ['C.1']
+
+        def test_error(self, model):
+            model.executor = ImmediateExecutor()
+            completed_callback = MagicMock()
+            model.search_completed.append(completed_callback)
+            failed_callback = MagicMock()
+            model.search_failed.append(failed_callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.esearch.side_effect = IOError('no network')
+                model.request_search(sentinel.search)
+            assert completed_callback.mock_calls == []
+            assert failed_callback.mock_calls == [call('no network')]
+
+    class TestRequestSeqRecord:
+        def search(self, model):
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(
+                    ['A.1', 'B.1', 'C.1'])
+                model.search(sentinel._)
+
+        def test_found(self, model):
+            self.search(model)
+            model.executor = ImmediateExecutor()
+            model._seq_record_cache['B.1'] = sentinel.record
+            callback = MagicMock()
+            model.seq_record_found.append(callback)
+            model.request_seq_record(1)
+            assert callback.mock_calls == [call(sentinel.record)]
+            assert model._last_loaded_seq_record is sentinel.record
+
+        def test_stale_dropped(self, model):
+            self.search(model)
+            queued = []
+
+            class QueueingExecutor(object):
+                def submit(self, func, *args, **kwargs):
+                    task = Task(func, args, kwargs)
+                    queued.append(task)
+                    return task
+
+            model.executor = QueueingExecutor()
+            model._seq_record_cache.update(
+                {'A.1': sentinel.a, 'B.1': sentinel.b, 'C.1': sentinel.c})
+            callback = MagicMock()
+            model.seq_record_found.append(callback)
+            model.request_seq_record(0)
+            model.request_seq_record(1)
+            queued[1].set_running()
+            model.request_seq_record(2)
+            queued[2].run()
+            queued[1].set_result(sentinel.b)
+            assert queued[0].cancelled()
+            assert callback.mock_calls == [call(sentinel.c)]
+            assert model._last_loaded_seq_record is sentinel.c
+
+        def test_error(self, model):
+            self.search(model)
+            model.executor = ImmediateExecutor()
+            callback = MagicMock()
+            model.seq_record_failed.append(callback)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.efetch.side_effect = IOError('no network')
+                model.request_seq_record(0)
+            assert callback.mock_calls == [call('no network')]
+
     class TestGetSeqRecord:
         def test_normal_use(self, model):
             with patch('cpg_islands.models.Entrez') as mock_entrez:
                 with patch('cpg_islands.models.SeqIO') as mock_seqio:
                     # call previously necessary methods
-                    mock_entrez.read.return_value = {
-                        'IdList': [sentinel._, sentinel._,
-                                   sentinel.chosen_id, sentinel._],
-                        'QueryTranslation': sentinel._}
+                    mock_entrez.read.return_value = search_results(
+                        [sentinel._, sentinel._,
+                         sentinel.chosen_id, sentinel._])
                     model.search(sentinel._)
 
                     handle = MagicMock()
+                    handle.read.return_value = 'LOCUS fake'
                     mock_entrez.efetch.return_value = handle
                     mock_seqio.read.return_value = sentinel.record
                     record = model.get_seq_record(2)
@@ -61,7 +386,7 @@ class TestEntrezModel:
                 id=sentinel.chosen_id,
                 rettype='gb',
                 retmode='text')
-            assert mock_seqio.mock_calls == [call.read(handle, 'genbank')]
+            assert_parsed_once(mock_seqio, 'LOCUS fake')
 
         def test_cache(self, model):
             """When get_seq_record is called multiple times to fetch
@@ -70,13 +395,13 @@ class TestEntrezModel:
             with patch('cpg_islands.models.Entrez') as mock_entrez:
                 with patch('cpg_islands.models.SeqIO') as mock_seqio:
                     # call previously necessary methods
-                    mock_entrez.read.return_value = {
-                        'IdList': [sentinel._, sentinel._,
-                                   sentinel.chosen_id, sentinel._],
-                        'QueryTranslation': sentinel._}
+                    mock_entrez.read.return_value = search_results(
+                        [sentinel._, sentinel._,
+                         sentinel.chosen_id, sentinel._])
                     model.search(sentinel._)
 
                     handle = MagicMock()
+                    handle.read.return_value = 'LOCUS fake'
                     mock_entrez.efetch.return_value = handle
                     mock_seqio.read.return_value = sentinel.record
 
@@ -93,7 +418,186 @@ class TestEntrezModel:
                 rettype='gb',
                 retmode='text')
             # Should be called once and only once.
-            assert mock_seqio.mock_calls == [call.read(handle, 'genbank')]
+            assert_parsed_once(mock_seqio, 'LOCUS fake')
+
+        def test_persistent_cache_hit(self, model):
+            """When a record is in the persistent cache, it should not
+            go out to Entrez at all."""
+            model.record_cache = MagicMock()
+            model.record_cache.get.return_value = 'LOCUS cached'
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                with patch('cpg_islands.models.SeqIO') as mock_seqio:
+                    mock_entrez.read.return_value = search_results(
+                        ['JX500709.1'])
+                    model.search(sentinel._)
+                    mock_seqio.read.return_value = sentinel.record
+                    record = model.get_seq_record(0)
+            assert record == sentinel.record
+            assert mock_entrez.efetch.mock_calls == []
+            assert model.record_cache.mock_calls == [
+                call.get('JX500709.1')]
+            assert_parsed_once(mock_seqio, 'LOCUS cached')
+
+        def test_persistent_cache_miss(self, model):
+            """When a record is not in the persistent cache, it should
+            be fetched and stored."""
+            model.record_cache = MagicMock()
+            model.record_cache.get.return_value = None
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                with patch('cpg_islands.models.SeqIO') as mock_seqio:
+                    mock_entrez.read.return_value = search_results(
+                        ['JX500709.1'])
+                    model.search(sentinel._)
+                    mock_entrez.efetch.return_value.read.return_value = \
+                        'LOCUS fetched'
+                    model.get_seq_record(0)
+            assert model.record_cache.mock_calls == [
+                call.get('JX500709.1'),
+                call.put('JX500709.1', 'LOCUS fetched')]
+            assert_parsed_once(mock_seqio, 'LOCUS fetched')
+
+    class TestPrefetch:
+        @pytest.fixture
+        def model(self):
+            mock_seq_input_model = create_autospec(
+                MetaSeqInputModel, spec_set=True)
+            return EntrezModel(mock_seq_input_model,
+                               executor=ImmediateExecutor())
+
+        def search(self, mock_entrez, model, id_list):
+            mock_entrez.read.return_value = search_results(id_list)
+            mock_entrez.efetch.return_value = open(
+                fixture_file('U49845.1-and-JX500709.1.gb'))
+            model.search(sentinel._)
+
+        def test_batched(self, model):
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model, ['U49845.1', 'JX500709.1'])
+                seq_record = model.get_seq_record(1)
+            mock_entrez.efetch.assert_called_once_with(
+                db='nucleotide',
+                id='U49845.1,JX500709.1',
+                rettype='gb',
+                retmode='text')
+            assert seq_record.id == 'JX500709.1'
+            assert (str(seq_record.seq) ==
+                    read_fixture_file('JX500709.1.flattened'))
+
+        def test_prefetch_count(self, model):
+            model.prefetch_count = 1
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model, ['U49845.1', 'JX500709.1'])
+            mock_entrez.efetch.assert_called_once_with(
+                db='nucleotide',
+                id='U49845.1',
+                rettype='gb',
+                retmode='text')
+
+        def test_batch_size(self, model):
+            model.batch_size = 1
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model, ['U49845.1', 'JX500709.1'])
+            assert mock_entrez.efetch.call_count == 2
+
+        def test_fills_persistent_cache(self, model):
+            model.record_cache = MagicMock()
+            model.record_cache.get.return_value = None
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                self.search(mock_entrez, model, ['U49845.1', 'JX500709.1'])
+            put_keys = [args[0] for args, kwargs
+                        in model.record_cache.put.call_args_list]
+            assert put_keys == ['U49845.1', 'JX500709.1']
+
+        def test_new_search_cancels_stale_batches(self, model):
+            queued = []
+
+            class QueueingExecutor(object):
+                def submit(self, func, *args, **kwargs):
+                    task = Task(func, args, kwargs)
+                    queued.append(task)
+                    return task
+
+            model.executor = QueueingExecutor()
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(['U49845.1'])
+                model.search(sentinel._)
+                mock_entrez.read.return_value = search_results(['JX500709.1'])
+                model.search(sentinel._)
+            assert len(queued) == 2
+            assert queued[0].cancelled()
+            assert not queued[1].cancelled()
+            assert model._pending_fetches == {'JX500709.1': queued[1]}
+
+        def test_failure_falls_back(self, model):
+            """When a prefetch fails, the record is fetched on demand."""
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(['JX500709.1'])
+                mock_entrez.efetch.side_effect = [
+                    IOError('fake network error'),
+                    open(fixture_file('JX500709.1.gb'))]
+                model.search(sentinel._)
+                seq_record = model.get_seq_record(0)
+            assert seq_record.id == 'JX500709.1'
+            assert mock_entrez.efetch.call_count == 2
+
+    class TestSeqOnly:
+        TITLE = 'JX500709.1 Homo sapiens fake sequence'
+
+        @pytest.fixture
+        def model(self):
+            mock_seq_input_model = create_autospec(
+                MetaSeqInputModel, spec_set=True)
+            return EntrezModel(mock_seq_input_model,
+                               executor=ImmediateExecutor(), seq_only=True)
+
+        def fasta_handle(self, seq_str):
+            lines = [seq_str[i:i + 70] for i in xrange(0, len(seq_str), 70)]
+            return StringIO('>{0}\n{1}\n'.format(
+                self.TITLE, '\n'.join(lines).lower()))
+
+        def test_fetches_fasta(self, model):
+            seq_str = read_fixture_file('JX500709.1.flattened')
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(['JX500709.1'])
+                mock_entrez.efetch.return_value = self.fasta_handle(seq_str)
+                model.search(sentinel._)
+                seq_record = model.get_seq_record(0)
+            mock_entrez.efetch.assert_called_once_with(
+                db='nucleotide',
+                id='JX500709.1',
+                rettype='fasta',
+                retmode='text')
+            assert seq_record.id == 'JX500709.1'
+            assert seq_record.description == self.TITLE
+            assert str(seq_record.seq) == seq_str
+
+        def test_persistent_cache_key(self, model):
+            """Sequence-only records should not be mistaken for full
+            GenBank records in the persistent cache."""
+            model.executor = None
+            model.record_cache = MagicMock()
+            model.record_cache.get.return_value = None
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(['JX500709.1'])
+                mock_entrez.efetch.return_value = self.fasta_handle('ACGT')
+                model.search(sentinel._)
+                model.get_seq_record(0)
+            assert model.record_cache.mock_calls == [
+                call.get('JX500709.1:fasta'),
+                call.put('JX500709.1:fasta',
+                         '>{0}\nACGT\n'.format(self.TITLE))]
+
+        def test_persistent_cache_hit(self, model):
+            model.executor = None
+            model.record_cache = MagicMock()
+            model.record_cache.get.return_value = '>{0}\nACGT\n'.format(
+                self.TITLE)
+            with patch('cpg_islands.models.Entrez') as mock_entrez:
+                mock_entrez.read.return_value = search_results(['JX500709.1'])
+                model.search(sentinel._)
+                seq_record = model.get_seq_record(0)
+            assert mock_entrez.efetch.mock_calls == []
+            assert str(seq_record.seq) == 'ACGT'
 
     class TestLoadSeq:
         def test_file_loaded_called(self, model):
@@ -101,11 +605,11 @@ class TestEntrezModel:
             with patch('cpg_islands.models.Entrez') as mock_entrez:
                 with patch('cpg_islands.models.SeqIO') as mock_seqio:
                     # call previously necessary methods
-                    mock_entrez.read.return_value = {
-                        'IdList': [sentinel._, sentinel._,
-                                   sentinel._, sentinel._],
-                        'QueryTranslation': sentinel._}
+                    mock_entrez.read.return_value = search_results(
+                        [sentinel._, sentinel._,
+                         sentinel._, sentinel._])
                     model.search(sentinel._)
+                    mock_entrez.efetch.return_value.read.return_value = ''
                     mock_seqio.read.return_value = make_seq_record(seq_str)
                     model.get_seq_record(2)
 
@@ -1,8 +1,39 @@
+from functools import partial
+import threading
+
 import pytest
 from mock import patch, create_autospec, MagicMock, call, sentinel
 
+from cpg_islands import islands
 from cpg_islands.models import SeqInputModel, MetaResultsModel
-from tests.helpers import fixture_file, read_fixture_file
+from cpg_islands.tasks import ImmediateExecutor, ProcessExecutor, Task
+from cpg_islands.utils import ProgressFile
+from tests.helpers import (fixture_file, read_fixture_file, make_seq_record,
+                           make_algo_results)
+
+SEQ_STR = 'GCATAACGGTAATCTATCGTATCATATT'
+SEQ_RESULTS = make_algo_results(SEQ_STR, [(6, 12, 0.5, 3), (17, 21, 0.5, 4)])
+
+
+class QueueingExecutor(object):
+    """Executor which holds tasks until told to run them."""
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, func, *args, **kwargs):
+        task = Task(func, args, kwargs)
+        self.tasks.append(task)
+        return task
+
+
+def make_model(executor=None, live_executor=None, load_executor=None):
+    """Create a model with executors, whose dispatcher calls straight
+    through rather than waiting for an event loop.
+    """
+    results_model = create_autospec(MetaResultsModel, spec_set=True)
+    dispatch = MagicMock(side_effect=lambda func, *args: func(*args))
+    return SeqInputModel(results_model, executor, dispatch, live_executor,
+                         load_executor)
 
 
 @pytest.fixture
@@ -66,6 +97,80 @@ class TestSeqInputModel:
                     [call('More than one record found in handle')])
             assert model.results_model.mock_calls == []
 
+    class TestLoadFileOnExecutor:
+        def test_loaded(self):
+            model = make_model(load_executor=ImmediateExecutor())
+            file_loaded_callback = MagicMock()
+            model.file_loaded.append(file_loaded_callback)
+            progress_callback = MagicMock()
+            model.file_load_progressed.append(progress_callback)
+            with patch('cpg_islands.models.ProgressFile',
+                       partial(ProgressFile, interval=1024)):
+                model.load_file(fixture_file('JX500709.1.gb'))
+            assert (file_loaded_callback.mock_calls ==
+                    [call(read_fixture_file('JX500709.1.flattened'))])
+            progress = [mock_call[1] for mock_call in
+                        progress_callback.mock_calls]
+            assert progress[0] == (0, 20453)
+            assert progress[-1] == (20453, 20453)
+            assert len(progress) > 3
+            assert progress == sorted(progress)
+
+        def test_parse_error(self):
+            model = make_model(load_executor=ImmediateExecutor())
+            error_raised_callback = MagicMock()
+            model.error_raised.append(error_raised_callback)
+            progress_callback = MagicMock()
+            model.file_load_progressed.append(progress_callback)
+            model.load_file(fixture_file('empty.gb'))
+            assert (error_raised_callback.mock_calls ==
+                    [call('No records found in handle')])
+            assert progress_callback.mock_calls[-1] == call(0, 0)
+
+        def test_missing_file(self):
+            model = make_model(load_executor=QueueingExecutor())
+            error_raised_callback = MagicMock()
+            model.error_raised.append(error_raised_callback)
+            model.load_file(fixture_file('missing.gb'))
+            assert len(error_raised_callback.mock_calls) == 1
+            assert model.load_executor.tasks == []
+
+        def test_cancelled(self):
+            model = make_model(load_executor=QueueingExecutor())
+            file_loaded_callback = MagicMock()
+            model.file_loaded.append(file_loaded_callback)
+            progress_callback = MagicMock()
+            model.file_load_progressed.append(progress_callback)
+            model.load_file(fixture_file('JX500709.1.gb'))
+            model.cancel_file_load()
+            [task] = model.load_executor.tasks
+            assert task.cancelled()
+            assert progress_callback.mock_calls == [call(0, 20453)]
+            assert file_loaded_callback.mock_calls == []
+
+        def test_cancelled_while_loading(self):
+            model = make_model(load_executor=QueueingExecutor())
+            file_loaded_callback = MagicMock()
+            model.file_loaded.append(file_loaded_callback)
+            model.load_file(fixture_file('JX500709.1.gb'))
+            [task] = model.load_executor.tasks
+            task.set_running()
+            model.cancel_file_load()
+            task.set_result(sentinel.stale_seq)
+            assert file_loaded_callback.mock_calls == []
+
+        def test_superseded(self):
+            model = make_model(load_executor=QueueingExecutor())
+            file_loaded_callback = MagicMock()
+            model.file_loaded.append(file_loaded_callback)
+            model.load_file(fixture_file('JX500709.1.gb'))
+            model.load_file(fixture_file('JX500709.1.gb'))
+            first, second = model.load_executor.tasks
+            assert first.cancelled()
+            second.run()
+            assert (file_loaded_callback.mock_calls ==
+                    [call(read_fixture_file('JX500709.1.flattened'))])
+
     @patch('cpg_islands.models.algorithms', autospec=True, spec_set=True)
     class TestComputeIslands:
         @pytest.mark.parametrize('algo_index', range(5))
@@ -92,6 +197,22 @@ class TestSeqInputModel:
                                     sentinel.min_gc_ratio,
                                     sentinel.min_obs_exp_cpg_ratio)])
 
+        def test_masked_algorithm_called(self, mock_algorithms, model):
+            algo = MagicMock()
+            mock_algorithms.registry = [algo]
+            model.compute_islands(sentinel.seq_record,
+                                  sentinel.island_size,
+                                  sentinel.min_gc_ratio,
+                                  sentinel.min_obs_exp_cpg_ratio,
+                                  0,
+                                  sentinel.masked_intervals)
+            assert (algo.mock_calls[0] ==
+                    call.masked_algorithm(sentinel.seq_record,
+                                          sentinel.island_size,
+                                          sentinel.min_gc_ratio,
+                                          sentinel.min_obs_exp_cpg_ratio,
+                                          sentinel.masked_intervals))
+
         def test_results_set(self, mock_algorithms, model):
             # Mock out algorithm return value.
             first_algo = MagicMock()
@@ -131,3 +252,178 @@ class TestSeqInputModel:
             model.compute_islands(sentinel.fake, sentinel.fake,
                                   sentinel.fake, sentinel.fake, sentinel.fake)
             assert callback.mock_calls == [call()]
+
+
+class TestComputeIslandsOnExecutor:
+    def compute(self, model, island_size=2):
+        model.compute_islands(make_seq_record(SEQ_STR), island_size,
+                              0.5, 0.6, 0)
+
+    def test_results_set(self):
+        model = make_model(ImmediateExecutor())
+        callback = MagicMock()
+        model.islands_computed.append(callback)
+        self.compute(model)
+        assert len(model.dispatch.mock_calls) == 1
+        [set_results_call] = model.results_model.mock_calls
+        results, algo_name, exec_time = set_results_call[1]
+        assert results == SEQ_RESULTS
+        assert callback.mock_calls == [call()]
+
+    def test_invalid_parameters(self):
+        model = make_model(QueueingExecutor())
+        with pytest.raises(ValueError):
+            self.compute(model, island_size=0)
+        assert model.executor.tasks == []
+
+    def test_superseded(self):
+        model = make_model(QueueingExecutor())
+        self.compute(model)
+        self.compute(model)
+        first, second = model.executor.tasks
+        assert first.cancelled()
+        second.run()
+        assert len(model.results_model.mock_calls) == 1
+
+    def test_superseded_while_running(self):
+        model = make_model(QueueingExecutor())
+        self.compute(model)
+        first = model.executor.tasks[0]
+        first.set_running()
+        self.compute(model)
+        assert first.cancel_requested
+        first.set_result((sentinel.stale_results, 1))
+        assert model.results_model.mock_calls == []
+
+    def test_cancel_computation(self):
+        model = make_model(QueueingExecutor())
+        callback = MagicMock()
+        model.islands_computed.append(callback)
+        self.compute(model)
+        model.cancel_computation()
+        assert model.executor.tasks[0].cancelled()
+        assert callback.mock_calls == []
+
+    def test_error_raised(self):
+        model = make_model(QueueingExecutor())
+        callback = MagicMock()
+        model.error_raised.append(callback)
+        self.compute(model)
+        task = model.executor.tasks[0]
+        task.set_running()
+        task.set_exception_info(
+            (RuntimeError, RuntimeError('Worker process died'), None))
+        assert callback.mock_calls == [call('Worker process died')]
+        assert model.results_model.mock_calls == []
+
+    def test_edited_sequence_updated(self):
+        model = make_model(ImmediateExecutor())
+        self.compute(model)
+        edited = SEQ_STR[:14] + 'CG' + SEQ_STR[14:]
+        with patch.object(islands, '_splice_islands',
+                          wraps=islands._splice_islands) as mock_update:
+            model.compute_islands(make_seq_record(edited), 2, 0.5, 0.6, 0)
+        assert len(mock_update.mock_calls) == 1
+        results = model.results_model.mock_calls[-1][1][0]
+        expected = islands.find_islands(edited, 2, 0.5, 0.6,
+                                        'sliding_window')
+        assert results == make_algo_results(edited, expected)
+
+    def test_changed_definition_recomputed(self):
+        model = make_model(ImmediateExecutor())
+        self.compute(model)
+        with patch.object(islands, 'submit_update') as mock_update:
+            self.compute(model, island_size=3)
+        assert mock_update.mock_calls == []
+
+    def test_masked_recomputed(self):
+        model = make_model(ImmediateExecutor())
+        model.compute_islands(make_seq_record(SEQ_STR), 2, 0.5, 0.6, 0, [])
+        with patch.object(islands, 'submit_update') as mock_update:
+            self.compute(model)
+        assert mock_update.mock_calls == []
+
+    def test_worker_pool(self):
+        executor = ProcessExecutor(1)
+        model = make_model(executor)
+        computed = threading.Semaphore(0)
+        model.islands_computed.append(computed.release)
+        try:
+            for _ in xrange(2):
+                self.compute(model)
+                computed.acquire()
+        finally:
+            executor.shutdown()
+        results = [mock_call[1][0]
+                   for mock_call in model.results_model.mock_calls]
+        assert results == [SEQ_RESULTS, SEQ_RESULTS]
+
+
+class TestRecomputeIslands:
+    def make_model(self, live_executor=None):
+        return make_model(ImmediateExecutor(), live_executor)
+
+    def test_nothing_computed(self):
+        model = self.make_model()
+        model.recompute_islands(2, 0.5, 0.6)
+        assert model.results_model.mock_calls == []
+
+    def test_results_set(self):
+        model = self.make_model()
+        callback = MagicMock()
+        model.islands_computed.append(callback)
+        model.compute_islands(make_seq_record(SEQ_STR), 3, 0.5, 0.6, 0)
+        model.recompute_islands(2, 0.5, 0.6)
+        results = model.results_model.mock_calls[-1][1][0]
+        assert results == SEQ_RESULTS
+        # Only the submitted computation takes the user to the results.
+        assert callback.mock_calls == [call()]
+
+    def test_finder_kept(self):
+        model = self.make_model()
+        model.compute_islands(make_seq_record(SEQ_STR), 2, 0.5, 0.6, 0)
+        with patch.object(islands, 'CachedIslandFinder',
+                          wraps=islands.CachedIslandFinder) as mock_finder:
+            for min_gc_ratio in [0.4, 0.5, 0.6]:
+                model.recompute_islands(2, min_gc_ratio, 0.6)
+        assert mock_finder.mock_calls == [call(SEQ_STR)]
+
+    def test_invalid_parameters(self):
+        model = self.make_model(QueueingExecutor())
+        model.compute_islands(make_seq_record(SEQ_STR), 2, 0.5, 0.6, 0)
+        with pytest.raises(ValueError):
+            model.recompute_islands(0, 0.5, 0.6)
+        assert model.live_executor.tasks == []
+
+    def test_stale_cancelled(self):
+        model = self.make_model(QueueingExecutor())
+        model.compute_islands(make_seq_record(SEQ_STR), 2, 0.5, 0.6, 0)
+        model.recompute_islands(3, 0.5, 0.6)
+        model.recompute_islands(2, 0.5, 0.6)
+        first, second = model.live_executor.tasks
+        assert first.cancelled()
+        second.run()
+        results = model.results_model.mock_calls[-1][1][0]
+        assert results == SEQ_RESULTS
+        assert len(model.results_model.mock_calls) == 2
+
+    def test_inexact_algorithm_computed(self):
+        model = self.make_model(QueueingExecutor())
+        callback = MagicMock()
+        model.islands_computed.append(callback)
+        model.compute_islands(make_seq_record(SEQ_STR), 2, 0.5, 0.6, 2)
+        model.recompute_islands(3, 0.5, 0.6)
+        assert model.live_executor.tasks == []
+        assert len(model.results_model.mock_calls) == 2
+        assert callback.mock_calls == [call()]
+
+    @patch('cpg_islands.islands.MAX_CACHED_LEN', len(SEQ_STR) - 1)
+    def test_long_sequence_computed(self):
+        model = self.make_model(QueueingExecutor())
+        model.compute_islands(make_seq_record(SEQ_STR), 3, 0.5, 0.6, 0)
+        with patch.object(islands, 'CachedIslandFinder') as mock_finder:
+            model.recompute_islands(2, 0.5, 0.6)
+        assert mock_finder.mock_calls == []
+        assert model.live_executor.tasks == []
+        results = model.results_model.mock_calls[-1][1][0]
+        assert results == SEQ_RESULTS
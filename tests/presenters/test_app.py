@@ -19,6 +19,10 @@ class TestApplicationPresenter:
         assert presenter.model.mock_calls == [
             call.started.append(presenter.view.start),
             call.seq_loaded.append(presenter.view.show_seq_input),
-            call.islands_computed.append(presenter.view.show_results)]
+            call.islands_computed.append(presenter.view.show_results),
+            call.file_load_progressed.append(
+                presenter.view.show_load_progress)]
         assert presenter.view.mock_calls == [
-            call.file_load_requested.append(presenter.model.load_file)]
+            call.file_load_requested.append(presenter.model.load_file),
+            call.file_load_cancelled.append(presenter.model.cancel_file_load),
+            call.closed.append(presenter.model.shutdown)]
@@ -17,49 +17,95 @@ def presenter():
 class TestEntrezPresenter:
     def test_register_for_events(self, presenter):
         presenter.register_for_events()
+        assert presenter.model.mock_calls == [
+            call.suggestion_found.append(presenter.view.set_suggestion),
+            call.results_found.append(presenter._results_found),
+            call.titles_found.append(presenter.view.set_result_titles),
+            call.search_completed.append(presenter._search_completed),
+            call.search_failed.append(presenter._search_failed),
+            call.seq_record_found.append(presenter._seq_record_found),
+            call.seq_record_failed.append(presenter._seq_record_failed)]
         assert presenter.view.mock_calls == [
             call.query_changed.append(presenter._query_changed),
             call.search_requested.append(presenter._user_submits),
             call.result_selected.append(presenter._user_selected),
-            call.load_requested.append(presenter._load_selected)]
+            call.load_requested.append(presenter._load_selected),
+            call.more_results_requested.append(
+                presenter._more_results_requested)]
 
     class TestUserSubmits:
         def test_valid_values(self, presenter):
-            """When the user clicks search with a valid string,
-                the search results are shown."""
-            presenter.model.search.return_value = (sentinel.id_list,
-                                                   sentinel.query_translation)
+            """When the user clicks search with a valid string, the
+                search is made in the background."""
             presenter._user_submits(sentinel.search_str)
             assert (presenter.model.mock_calls ==
-                    [call.search(sentinel.search_str)])
+                    [call.request_search(sentinel.search_str)])
+            assert presenter.view.mock_calls == [call.set_searching(True)]
+
+        def test_search_completed(self, presenter):
+            """When the search completes, the search results are
+                shown."""
+            id_list = ['A.1', 'B.1']
+            presenter._search_completed(id_list, sentinel.query_translation)
+            assert (presenter.model.mock_calls ==
+                    [call.request_titles(0, 2)])
             assert (presenter.view.mock_calls ==
-                    [call.set_result(sentinel.id_list),
+                    [call.set_searching(False),
+                     call.set_result(id_list),
                      call.set_query_translation(sentinel.query_translation)])
 
+        def test_search_failed(self, presenter):
+            presenter._search_failed('timed out')
+            assert presenter.model.mock_calls == []
+            assert (presenter.view.mock_calls ==
+                    [call.set_searching(False),
+                     call.show_error('Search failed: timed out')])
+
+    def test_more_results_requested(self, presenter):
+        presenter._more_results_requested()
+        assert presenter.model.mock_calls == [call.load_more_results()]
+
+    def test_results_found(self, presenter):
+        presenter._results_found(100, ['C.1', 'D.1', 'E.1'])
+        assert presenter.view.mock_calls == [
+            call.set_result(['C.1', 'D.1', 'E.1'], append=True)]
+        assert presenter.model.mock_calls == [call.request_titles(100, 3)]
+
     def test_user_selected(self, presenter):
+        presenter._user_selected(sentinel.index)
+        assert presenter.model.mock_calls == [
+            call.request_seq_record(sentinel.index)]
+        assert presenter.view.mock_calls == [call.set_loading_seq(True)]
+
+    def test_seq_record_found(self, presenter):
         seq_str = 'ATATACGCGCATATA'
         seq_id = 'NG_032827.2'
         seq_desc = "It's a pretty cool sequence"
         seq_record = make_seq_record(seq_str)
         seq_record.id = seq_id
         seq_record.description = seq_desc
-        presenter.model.get_seq_record.return_value = seq_record
-        presenter._user_selected(sentinel.index)
-        assert presenter.model.mock_calls == [
-            call.get_seq_record(sentinel.index)]
+        presenter._seq_record_found(seq_record)
+        assert presenter.model.mock_calls == []
         assert presenter.view.mock_calls == [
+            call.set_loading_seq(False),
             call.set_seq_locus(
                 seq_id, 'http://www.ncbi.nlm.nih.gov/nuccore/NG_032827.2'),
             call.set_seq_desc(seq_desc),
             call.set_seq_len('15 bases'),
             call.set_selected_seq(seq_str)]
 
+    def test_seq_record_failed(self, presenter):
+        presenter._seq_record_failed('No records found in handle')
+        assert presenter.view.mock_calls == [
+            call.set_loading_seq(False),
+            call.show_error('Sequence could not be loaded: '
+                            'No records found in handle')]
+
     def test_user_changed(self, presenter):
-        presenter.model.suggest.return_value = sentinel.suggestion
         presenter._query_changed(sentinel.text)
-        assert presenter.model.mock_calls == [call.suggest(sentinel.text)]
-        assert presenter.view.mock_calls == [
-            call.set_suggestion(sentinel.suggestion)]
+        assert presenter.model.mock_calls == [
+            call.request_suggestion(sentinel.text)]
+        assert presenter.view.mock_calls == []
 
     def test_load_selected(self, presenter):
         presenter._load_selected()
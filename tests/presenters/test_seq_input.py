@@ -23,7 +23,9 @@ class TestSeqInputPresenter:
                  call.error_raised.append(presenter.view.show_error),
                  call.algorithms_loaded.append(presenter.view.set_algorithms)])
         assert (presenter.view.mock_calls ==
-                [call.submitted.append(presenter._user_submits)])
+                [call.submitted.append(presenter._user_submits),
+                 call.parameters_changed.append(
+                     presenter._user_changes_parameters)])
 
     def test_island_defintion_defaults_set(self, presenter):
         presenter._island_definition_defaults_set(343, 0.5, 0.65)
@@ -46,9 +48,9 @@ class TestSeqInputPresenter:
             # call_args[0] is ordered arguments, call_args[1] is
             # keyword arguments
             args = presenter.model.compute_islands.call_args[0]
-            assert len(args) == 5
+            assert len(args) == 6
             assert str(args[0].seq) == seq_str
-            assert args[1:] == (4, 0.5, 0.65, sentinel.algo_index)
+            assert args[1:] == (4, 0.5, 0.65, sentinel.algo_index, None)
             assert presenter.view.mock_calls == []
 
         def test_invalid_sequence(self, presenter):
@@ -100,9 +102,39 @@ class TestSeqInputPresenter:
                 seq_str, '4', '0.5', '0.65', sentinel.algo_index)
             assert presenter.model.compute_islands.call_count == 1
             args = presenter.model.compute_islands.call_args[0]
-            assert len(args) == 5
+            assert len(args) == 6
             assert str(args[0].seq) == 'ATATGCGCATAT'
-            assert args[1:] == (4, 0.5, 0.65, sentinel.algo_index)
+            assert args[1:] == (4, 0.5, 0.65, sentinel.algo_index, None)
+            assert presenter.view.mock_calls == []
+
+        def test_exclude_masked(self, presenter):
+            """When the user chooses to exclude soft-masked regions, the
+            lowercase runs are passed on as masked intervals."""
+            seq_str = 'ATatgcGCAtaT'
+            presenter._user_submits(
+                seq_str, '4', '0.5', '0.65', sentinel.algo_index, True)
+            assert presenter.model.compute_islands.call_count == 1
+            args = presenter.model.compute_islands.call_args[0]
+            assert str(args[0].seq) == 'ATATGCGCATAT'
+            assert args[1:] == (4, 0.5, 0.65, sentinel.algo_index,
+                                [(2, 6), (9, 11)])
+            assert presenter.view.mock_calls == []
+
+    class TestUserChangesParameters:
+        def test_valid_values(self, presenter):
+            presenter._user_changes_parameters('4', '0.5', '0.65')
+            assert (presenter.model.mock_calls ==
+                    [call.recompute_islands(4, 0.5, 0.65)])
+            assert presenter.view.mock_calls == []
+
+        def test_invalid_values_ignored(self, presenter):
+            presenter._user_changes_parameters('', '0.5', '0.65')
+            assert presenter.model.mock_calls == []
+            assert presenter.view.mock_calls == []
+
+        def test_rejected_values_ignored(self, presenter):
+            presenter.model.recompute_islands.side_effect = ValueError
+            presenter._user_changes_parameters('0', '0.5', '0.65')
             assert presenter.view.mock_calls == []
 
     class TestLoadFile:
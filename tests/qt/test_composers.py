@@ -1,5 +1,6 @@
 from mock import patch, call, sentinel, MagicMock
 
+from cpg_islands.islands import warm_up
 from cpg_islands.models import (MetaAppModel,
                                 MetaSeqInputModel,
                                 MetaResultsModel)
@@ -14,6 +15,16 @@ from cpg_islands.views import (BaseAppView,
 class TestComposers:
     # Keep in mind that the order of mock passed as arguments starts
     # from the bottom up.
+    @patch('cpg_islands.qt.composers.ProcessExecutor',
+           autospec=True, spec_set=True)
+    @patch('cpg_islands.qt.composers.create_client',
+           autospec=True, spec_set=True)
+    @patch('cpg_islands.qt.composers.GuiDispatcher',
+           autospec=True, spec_set=True)
+    @patch('cpg_islands.qt.composers.ThreadExecutor',
+           autospec=True, spec_set=True)
+    @patch('cpg_islands.qt.composers.RecordCache',
+           autospec=True, spec_set=True)
     @patch('cpg_islands.qt.composers.EntrezPresenter',
            autospec=True, spec_set=True)
     @patch('cpg_islands.qt.composers.EntrezView',
@@ -43,7 +54,9 @@ class TestComposers:
             mock_app_model, mock_app_view, mock_app_pres,
             mock_seq_input_model, mock_seq_input_view, mock_seq_input_pres,
             mock_results_model, mock_results_view, mock_results_pres,
-            mock_entrez_model, mock_entrez_view, mock_entrez_pres):
+            mock_entrez_model, mock_entrez_view, mock_entrez_pres,
+            mock_record_cache, mock_thread_executor, mock_dispatcher,
+            mock_create_client, mock_process_executor):
         mock_results_model.return_value = sentinel.results_model
         mock_results_view.return_value = sentinel.results_view
         mock_seq_input_model.return_value = sentinel.seq_input_model
@@ -52,6 +65,11 @@ class TestComposers:
         mock_app_view.return_value = sentinel.app_view
         mock_entrez_model.return_value = sentinel.entrez_model
         mock_entrez_view.return_value = sentinel.entrez_view
+        mock_record_cache.return_value = sentinel.record_cache
+        mock_thread_executor.return_value = sentinel.executor
+        mock_dispatcher.return_value = sentinel.dispatch
+        mock_create_client.return_value = sentinel.client
+        mock_process_executor.return_value = sentinel.worker_pool
 
         app_pres = mock_app_pres.return_value
 
@@ -60,7 +78,8 @@ class TestComposers:
         assert retval == app_pres
 
         assert (mock_app_model.mock_calls ==
-                [call(sentinel.seq_input_model, sentinel.entrez_model),
+                [call(sentinel.seq_input_model, sentinel.entrez_model,
+                      sentinel.worker_pool),
                  call().register_for_events(),
                  call().run(sentinel.argv)])
         assert (mock_app_view.mock_calls ==
@@ -71,7 +90,9 @@ class TestComposers:
                 call(app_model,
                      sentinel.app_view).register_for_events().call_list())
         assert (mock_seq_input_model.mock_calls ==
-                [call(sentinel.results_model)])
+                [call(sentinel.results_model, sentinel.worker_pool,
+                      sentinel.dispatch, live_executor=sentinel.executor,
+                      load_executor=sentinel.executor)])
         assert (mock_seq_input_view.mock_calls == [call()])
         assert (mock_seq_input_pres.mock_calls ==
                 call(sentinel.seq_input_model,
@@ -83,7 +104,15 @@ class TestComposers:
                 call(sentinel.results_model,
                      sentinel.results_view).register_for_events().call_list())
         assert (mock_entrez_model.mock_calls == [call(
-                sentinel.seq_input_model)])
+                sentinel.seq_input_model, sentinel.record_cache,
+                sentinel.executor, dispatch=sentinel.dispatch,
+                seq_only=True, client=sentinel.client)])
+        assert (mock_dispatcher.mock_calls == [call()])
+        assert (mock_create_client.mock_calls == [call()])
+        assert (mock_record_cache.mock_calls == [call()])
+        assert (mock_thread_executor.mock_calls == [call(1), call(1), call(3)])
+        assert (mock_process_executor.mock_calls ==
+                [call(initializer=warm_up)])
         assert (mock_entrez_view.mock_calls == [call()])
         assert (mock_entrez_pres.mock_calls == call(
                 sentinel.entrez_model,
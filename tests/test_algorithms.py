@@ -1,5 +1,8 @@
 from __future__ import division
 
+import random
+
+import numpy as np
 import pytest
 
 from cpg_islands import algorithms
@@ -17,13 +20,17 @@ from tests.helpers import make_algo_results, make_seq_record
 
 def pytest_generate_tests(metafunc):
     if 'algorithm' in metafunc.fixturenames:
+        # Every algorithm validates its parameters the same way, but
+        # only the exact ones find the sliding window islands.
+        instances = [instance for instance in algorithms.registry
+                     if instance.exact or metafunc.cls is TestValidation]
         metafunc.parametrize(
             'algorithm',
-            [instance.algorithm for instance in algorithms.registry],
-            ids=[instance.id for instance in algorithms.registry])
+            [instance.algorithm for instance in instances],
+            ids=[instance.id for instance in instances])
 
 
-class TestAlgorithms:
+class TestValidation:
     def test_empty_sequence(self, algorithm):
         with pytest.raises(ValueError) as exc_info:
             algorithm(make_seq_record(''), 1, 0, 0)
@@ -98,6 +105,8 @@ class TestAlgorithms:
         """
         algorithm(make_seq_record('ATGC'), 2, 0.5, 1.5)
 
+
+class TestAlgorithms:
     def test_single_cpg(self, algorithm):
         seq_str = 'CG'
         computed = algorithm(make_seq_record(seq_str), 2, 1, 2)
@@ -125,6 +134,38 @@ class TestAlgorithms:
         expected = make_algo_results(seq_str, [(10, 18, 0.625,  4 / 3)])
         assert computed == expected
 
+    def test_island_ending_near_end(self, algorithm):
+        # The island ends less than a window before the end of the
+        # sequence, after which no window fits.
+        seq_str = ('CCGCCCGCGGGCGGGGGCCCGGCCCCCCGCCGCGCCCCCGGGCGGCCGCGGCCC'
+                   'GGCGCGGCCGGC')
+        islands = algorithm.__self__.scan(seq_str, 33, 0.3, 1.0)
+        assert [(start, end) for start, end, _, _ in islands] == [(17, 50)]
+
+    @pytest.mark.parametrize('seq_str,island_size,min_gc_ratio', [
+        ('GGGGCGCGGGGTATAAAACTGCAGACCCGGAGGTATCCTCCCGTGCGAGGCCGCACCGCCGA'
+         'CCAGGAACTC', 1, 0),
+        ('ACGTTCGGCA', 1, 0.5),
+        ('CGCG' + 'A' * 10 + 'CG', 2, 0.5)])
+    def test_matches_sliding_window(self, algorithm, seq_str, island_size,
+                                    min_gc_ratio):
+        sliding = algorithms.SlidingWindowPythonAlgorithm()
+        assert (list(algorithm.__self__.scan(seq_str, island_size,
+                                             min_gc_ratio, 1.0)) ==
+                list(sliding.scan(seq_str, island_size, min_gc_ratio, 1.0)))
+
+    def test_matches_sliding_window_random(self, algorithm):
+        rng = random.Random(0)
+        sliding = algorithms.SlidingWindowPythonAlgorithm()
+        for _ in xrange(200):
+            seq_str = ''.join(rng.choice('ACGT')
+                              for _ in xrange(rng.randrange(1, 80)))
+            island_size = rng.randrange(1, min(len(seq_str), 10) + 1)
+            args = (seq_str, island_size, rng.choice([0, 0.3, 0.5]),
+                    rng.choice([0, 0.6, 1.0]))
+            assert (list(algorithm.__self__.scan(*args)) ==
+                    list(sliding.scan(*args)))
+
     class TestGCRatioLimit:
         def test_island_at_end(self, algorithm):
             seq_str = 'GCATAACGGTAATCTATCGTATCATATT'
@@ -132,3 +173,240 @@ class TestAlgorithms:
             expected = make_algo_results(
                 seq_str, [(6, 12, 0.5, 3), (17, 21, 0.5, 4)])
             assert computed == expected
+
+    class TestMasked:
+        def test_no_mask(self, algorithm):
+            seq_str = 'ATATACACGGAATATT'
+            algo = algorithm.__self__
+            computed = algo.masked_algorithm(
+                make_seq_record(seq_str), 4, 0.5, 0.6, [])
+            expected = make_algo_results(seq_str, [(5, 13, 0.5, 2)])
+            assert computed == expected
+
+        def test_island_in_mask_skipped(self, algorithm):
+            seq_str = 'ATATACACGGAATATT'
+            algo = algorithm.__self__
+            computed = algo.masked_algorithm(
+                make_seq_record(seq_str), 4, 0.5, 0.6, [(4, 10)])
+            expected = make_algo_results(seq_str, [])
+            assert computed == expected
+
+        def test_islands_offset(self, algorithm):
+            seq_str = 'CGGATATATA' + 'TTTTT' + 'CGGATATATA'
+            algo = algorithm.__self__
+            computed = algo.masked_algorithm(
+                make_seq_record(seq_str), 3, 0.5, 0.6, [(10, 15)])
+            expected = make_algo_results(
+                seq_str, [(0, 6, 0.5, 3), (15, 21, 0.5, 3)])
+            assert computed == expected
+
+
+class TestSkipAhead:
+    def scan(self, seq_str, island_size, min_gc_ratio, min_obs_exp_cpg_ratio,
+             skip_ahead):
+        algo = algorithms.AccumulatingSlidingWindowPythonAlgorithm(skip_ahead)
+        return list(algo.scan(seq_str, island_size, min_gc_ratio,
+                              min_obs_exp_cpg_ratio))
+
+    @pytest.mark.parametrize('weights', [(1, 1, 1, 1), (6, 1, 1, 6)],
+                             ids=['uniform', 'at_rich'])
+    def test_same_islands(self, weights):
+        rng = random.Random(0)
+        bases = ''.join(base * weight for base, weight in zip('ACGT', weights))
+        seq_str = ''.join(rng.choice(bases) for _ in xrange(5000))
+        for island_size, min_gc_ratio in [(10, 0.5), (50, 0.55), (200, 0.3)]:
+            islands = self.scan(seq_str, island_size, min_gc_ratio, 0.6, True)
+            assert islands == self.scan(seq_str, island_size, min_gc_ratio,
+                                        0.6, False)
+
+    def test_skip_to_end(self):
+        seq_str = 'CG' + 'A' * 100 + 'CGCG'
+        islands = self.scan(seq_str, 4, 0.5, 0.6, True)
+        assert islands == self.scan(seq_str, 4, 0.5, 0.6, False)
+        assert len(islands) == 2
+
+    def test_required_gc_count(self):
+        assert algorithms._required_gc_count(200, 0.5) == 100
+        assert algorithms._required_gc_count(3, 0.5) == 2
+        assert algorithms._required_gc_count(10, 0) == 0
+        assert algorithms._required_gc_count(10, 1) == 10
+        # 0.28 * 25 is a little more than 7 in floating point.
+        assert algorithms._required_gc_count(25, 0.28) == 7
+
+    def test_count_bases(self):
+        assert algorithms._count_bases('CGGTACG') == (2, 3, 2)
+
+
+class TestCoarseToFine:
+    def scan(self, algo, seq_str, island_size, min_gc_ratio=0.5,
+             min_obs_exp_cpg_ratio=0.6):
+        return list(algo.scan(seq_str, island_size, min_gc_ratio,
+                              min_obs_exp_cpg_ratio))
+
+    def test_registered(self):
+        algo = algorithms.CoarseToFineAlgorithm()
+        assert algo.exact
+        assert algo.id == 'coarse_to_fine'
+        assert algo.id in [instance.id for instance in algorithms.registry]
+
+    @pytest.mark.parametrize('block_size', [1, 7, 50])
+    def test_same_islands(self, block_size):
+        rng = random.Random(0)
+        # CpG-rich stretches scattered through AT-rich sequence.
+        seq_str = ''.join(
+            ''.join(rng.choice('CG' if rich else 'AATTCG')
+                    for _ in xrange(rng.randrange(10, 300)))
+            for rich in [False, True] * 20)
+        fine = algorithms.AccumulatingSlidingWindowPythonAlgorithm()
+        coarse = algorithms.CoarseToFineAlgorithm(fine, block_size)
+        for island_size in [10, 50, 200]:
+            islands = self.scan(fine, seq_str, island_size)
+            assert islands
+            assert self.scan(coarse, seq_str, island_size) == islands
+
+    def test_island_longer_than_range(self):
+        # The island starts in the only candidate block, and grows far
+        # beyond the slice first scanned.
+        seq_str = 'A' * 20 + 'CG' * 4 + 'CA' * 100 + 'A' * 20
+        fine = algorithms.SlidingWindowPythonAlgorithm()
+        coarse = algorithms.CoarseToFineAlgorithm(fine, 10)
+        islands = self.scan(fine, seq_str, 8, 0.5, 0.1)
+        assert islands[0][1] - islands[0][0] > 100
+        assert self.scan(coarse, seq_str, 8, 0.5, 0.1) == islands
+
+    def test_candidate_ranges(self):
+        seq_str = 'A' * 20 + 'CGCG' + 'A' * 20
+        # Windows starting in the block before the CpGs overlap them.
+        assert algorithms._candidate_ranges(seq_str, 4, 0.5, 0.6, 10) == [
+            (10, 30)]
+
+    def test_no_candidates(self):
+        algo = algorithms.CoarseToFineAlgorithm()
+        assert self.scan(algo, 'GGGGAAAACCCC', 4) == []
+
+    def test_block_window_sums(self):
+        assert (algorithms._block_window_sums(
+            np.array([1, 2, 3, 4]), 2).tolist() == [3, 5, 7, 4])
+
+
+class TestMaximalScoringSegments:
+    algo = algorithms.MaximalScoringSegmentsAlgorithm()
+
+    def scan(self, seq_str, island_size=2, min_gc_ratio=0.5,
+             min_obs_exp_cpg_ratio=0.6):
+        return list(self.algo.scan(seq_str, island_size, min_gc_ratio,
+                                   min_obs_exp_cpg_ratio))
+
+    def test_registered(self):
+        assert not self.algo.exact
+        assert self.algo.id == 'maximal_scoring_segments'
+        assert self.algo.id in [instance.id
+                                for instance in algorithms.registry]
+
+    def test_single_segment(self):
+        assert self.scan('ATATCGCGCGATAT') == [(4, 10, 1, 2)]
+
+    def test_segments_joined_across_dip(self):
+        # The `A' costs less than the GC on either side of it gains.
+        assert self.scan('TTTTCGCGACGCGTTTT') == [(4, 13, 8 / 9, 2.25)]
+
+    def test_segments_split_by_deep_dip(self):
+        assert (self.scan('TTCGCGTTTTTTTTCGCGTT') ==
+                [(2, 6, 1, 2), (14, 18, 1, 2)])
+
+    def test_short_segments_dropped(self):
+        assert self.scan('ATATCGCGCGATAT', island_size=7) == []
+
+    def test_obs_exp_minimum(self):
+        assert self.scan('ATATGGGCCCATAT') == []
+
+    def test_no_gc(self):
+        assert self.scan('ATATATAT') == []
+
+    def test_min_gc_ratio_of_one(self):
+        # No segment can score above zero.
+        assert self.scan('CGCGCG', min_gc_ratio=1) == []
+
+    def test_maximal(self):
+        rng = random.Random(0)
+        seq_str = ''.join(rng.choice('AACGTT') for _ in xrange(2000))
+        min_gc_ratio = 0.6
+        score = [0.4 if base in 'CG' else -0.6 for base in seq_str]
+        segments = [(start, end) for start, end, _, _ in self.scan(
+            seq_str, 1, min_gc_ratio, 0)]
+        assert segments
+        last_end = 0
+        for start, end in segments:
+            assert start >= last_end
+            last_end = end
+            assert sum(score[start:end]) > 0
+            # No prefix or suffix of a maximal segment scores below
+            # zero.
+            assert min(sum(score[start:i]) for i in
+                       xrange(start, end + 1)) > -1e-9
+            assert min(sum(score[i:end]) for i in
+                       xrange(start, end + 1)) > -1e-9
+
+    def test_algorithm(self):
+        seq_str = 'ATATCGCGCGATAT'
+        assert (self.algo.algorithm(make_seq_record(seq_str), 2, 0.5, 0.6) ==
+                make_algo_results(seq_str, [(4, 10, 1, 2)]))
+
+
+class TestCpGClusters:
+    def scan(self, seq_str, island_size=2, min_gc_ratio=0.5,
+             min_obs_exp_cpg_ratio=0.6, max_gap=4):
+        algo = algorithms.CpGClusterAlgorithm(max_gap)
+        return list(algo.scan(seq_str, island_size, min_gc_ratio,
+                              min_obs_exp_cpg_ratio))
+
+    def test_registered(self):
+        algo = algorithms.CpGClusterAlgorithm()
+        assert not algo.exact
+        assert algo.id == 'cpg_clusters'
+        assert algo.id in [instance.id for instance in algorithms.registry]
+
+    def test_clusters(self):
+        seq_str = 'CGATCG' + 'T' * 14 + 'CGACG'
+        assert self.scan(seq_str) == [(0, 6, 4 / 6, 3), (20, 25, 0.8, 2.5)]
+
+    def test_median_gap(self):
+        seq_str = 'CGATCG' + 'T' * 14 + 'CGACG'
+        # The gaps are 4, 16 and 3.
+        assert (self.scan(seq_str, max_gap=None) ==
+                self.scan(seq_str, max_gap=4))
+
+    def test_single_cpg(self):
+        assert self.scan('TTCGTT', max_gap=None) == [(2, 4, 1, 2)]
+
+    def test_no_cpg(self):
+        assert self.scan('GGGCCC') == []
+
+    def test_short_clusters_dropped(self):
+        seq_str = 'CGATCG' + 'T' * 14 + 'CGACG'
+        assert self.scan(seq_str, island_size=6) == [(0, 6, 4 / 6, 3)]
+
+    def test_gc_ratio_minimum(self):
+        assert self.scan('CGATATCG', min_gc_ratio=0.6, max_gap=6) == []
+        assert self.scan('CGATATCG', max_gap=6) == [(0, 8, 0.5, 4)]
+
+    def test_ratios_match_counts(self):
+        rng = random.Random(0)
+        seq_str = ''.join(rng.choice('ACGT') for _ in xrange(2000))
+        islands = self.scan(seq_str, 10, 0, 0, max_gap=10)
+        assert islands
+        for start, end, gc_ratio, obs_exp_cpg_ratio in islands:
+            assert seq_str[start:start + 2] == seq_str[end - 2:end] == 'CG'
+            assert ((gc_ratio, obs_exp_cpg_ratio) ==
+                    algorithms._compute_ratios(*(
+                        algorithms._compute_counts(seq_str[start:end]) +
+                        (end - start,))))
+
+
+class TestFindSoftMaskedIntervals:
+    def test_uppercase(self):
+        assert algorithms.find_soft_masked_intervals('ATCG') == []
+
+    def test_runs(self):
+        assert (algorithms.find_soft_masked_intervals('atCGgcAt') ==
+                [(0, 2), (4, 6), (7, 8)])
@@ -0,0 +1,74 @@
+import pytest
+
+from cpg_islands.cache import RecordCache
+
+
+@pytest.fixture
+def cache_path(tmpdir):
+    return str(tmpdir.join('records.sqlite'))
+
+
+class TestRecordCache:
+    def test_miss(self, cache_path):
+        cache = RecordCache(cache_path)
+        assert cache.get('JX500709.1') is None
+        assert 'JX500709.1' not in cache
+        assert len(cache) == 0
+
+    def test_round_trip(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('JX500709.1', 'LOCUS JX500709')
+        assert cache.get('JX500709.1') == 'LOCUS JX500709'
+        assert 'JX500709.1' in cache
+        assert len(cache) == 1
+
+    def test_versions_are_separate(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('JX500709.1', 'version one')
+        cache.put('JX500709.2', 'version two')
+        assert cache.get('JX500709.1') == 'version one'
+        assert cache.get('JX500709.2') == 'version two'
+
+    def test_persists(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('JX500709.1', 'LOCUS JX500709')
+        cache.close()
+        assert RecordCache(cache_path).get('JX500709.1') == 'LOCUS JX500709'
+
+    def test_compressed(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('U49845.1', 'ACGT' * 10000)
+        assert cache.size < 10000
+
+    def test_lru_eviction(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('A.1', 'A' * 1000)
+        cache.max_size = cache.size * 2
+        cache.put('B.1', 'B' * 1000)
+        # Touch the first record so that the second is least recently
+        # used.
+        cache.get('A.1')
+        cache.put('C.1', 'C' * 1000)
+        assert 'A.1' in cache
+        assert 'B.1' not in cache
+        assert 'C.1' in cache
+        assert cache.size <= cache.max_size
+
+    def test_eviction_order_persists(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('A.1', 'A' * 1000)
+        cache.put('B.1', 'B' * 1000)
+        cache.get('A.1')
+        size = cache.size
+        cache.close()
+        cache = RecordCache(cache_path, max_size=size)
+        cache.put('C.1', 'C' * 1000)
+        assert 'B.1' not in cache
+        assert 'A.1' in cache
+
+    def test_clear(self, cache_path):
+        cache = RecordCache(cache_path)
+        cache.put('A.1', 'A')
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.size == 0
@@ -0,0 +1,45 @@
+from mock import patch, sentinel, MagicMock
+import pytest
+
+from cpg_islands import cli
+
+
+class TestCreateParser:
+    def test_serve_defaults(self):
+        args = cli.create_parser().parse_args(['serve'])
+        assert args.command is cli.serve
+        assert args.host == '127.0.0.1'
+        assert args.port == 8080
+        assert args.jobs is None
+        assert not args.verbose
+
+    def test_serve(self):
+        args = cli.create_parser().parse_args(
+            ['serve', '--host', '0.0.0.0', '-p', '9000', '-j', '3', '-v'])
+        assert args.host == '0.0.0.0'
+        assert args.port == 9000
+        assert args.jobs == 3
+        assert args.verbose
+
+    def test_no_command(self):
+        with pytest.raises(SystemExit):
+            cli.create_parser().parse_args([])
+
+
+class TestServe:
+    @patch('cpg_islands.cli.IslandServer', autospec=True)
+    @patch('cpg_islands.cli.ProcessExecutor', autospec=True)
+    def test_interrupted(self, mock_executor_class, mock_server_class):
+        mock_server = mock_server_class.return_value
+        mock_server.url = 'http://127.0.0.1:9000/'
+        mock_server.serve_forever.side_effect = KeyboardInterrupt
+        args = MagicMock(host=sentinel.host, port=sentinel.port,
+                         jobs=sentinel.jobs, verbose=sentinel.verbose)
+        cli.serve(args)
+        mock_executor_class.assert_called_once_with(
+            sentinel.jobs, initializer=cli.warm_up)
+        mock_server_class.assert_called_once_with(
+            (sentinel.host, sentinel.port), mock_executor_class.return_value,
+            verbose=sentinel.verbose)
+        mock_server.server_close.assert_called_once_with()
+        mock_executor_class.return_value.shutdown.assert_called_once_with()
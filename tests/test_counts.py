@@ -0,0 +1,85 @@
+from __future__ import division
+
+import random
+
+import numpy as np
+import pytest
+
+from cpg_islands.algorithms import (_compute_counts, _compute_ratios,
+                                    _is_island)
+from cpg_islands.counts import PrefixCounts
+
+SEQ_STR = 'GCATAACGGTAATCTATCGTATCATATT'
+
+
+@pytest.fixture
+def random_seq_str():
+    rng = random.Random(0)
+    return ''.join(rng.choice('ACGT') for _ in xrange(500))
+
+
+class TestPrefixCounts:
+    def test_len(self):
+        assert len(PrefixCounts.from_seq(SEQ_STR)) == len(SEQ_STR)
+
+    def test_empty(self):
+        counts = PrefixCounts.from_seq('')
+        assert len(counts) == 0
+        assert counts.counts(0, 0) == (0, 0, 0)
+
+    @pytest.mark.parametrize('seq', [SEQ_STR, bytearray(SEQ_STR),
+                                     buffer(SEQ_STR)])
+    def test_seq_types(self, seq):
+        assert PrefixCounts.from_seq(seq).counts(6, 12) == (1, 2, 1)
+
+    def test_counts(self, random_seq_str):
+        counts = PrefixCounts.from_seq(random_seq_str)
+        rng = random.Random(1)
+        for _ in xrange(200):
+            start = rng.randrange(len(random_seq_str))
+            end = rng.randrange(start + 1, len(random_seq_str) + 1)
+            assert (counts.counts(start, end) ==
+                    _compute_counts(random_seq_str[start:end]))
+
+    def test_cpg_straddling_end_not_counted(self):
+        counts = PrefixCounts.from_seq('ACGT')
+        assert counts.counts(0, 2) == (1, 0, 0)
+        assert counts.counts(0, 3) == (1, 1, 1)
+        assert counts.counts(2, 4) == (0, 1, 0)
+
+    def test_ratios_match_scans(self, random_seq_str):
+        counts = PrefixCounts.from_seq(random_seq_str)
+        starts = np.arange(0, 400, 7)
+        ends = starts + 100
+        gc_ratios, obs_exp_cpg_ratios = counts.ratios(starts, ends)
+        for start, end, gc_ratio, obs_exp_cpg_ratio in zip(
+                starts, ends, gc_ratios, obs_exp_cpg_ratios):
+            expected = _compute_ratios(
+                *(_compute_counts(random_seq_str[start:end]) +
+                  (end - start,)))
+            # Exactly equal, not approximately.
+            assert (gc_ratio, obs_exp_cpg_ratio) == expected
+
+    def test_ratios_without_c_or_g(self):
+        counts = PrefixCounts.from_seq('AAAACCCCGGGG')
+        gc_ratios, obs_exp_cpg_ratios = counts.ratios([0, 0, 8], [4, 8, 12])
+        assert gc_ratios.tolist() == [0, 0.5, 1]
+        assert obs_exp_cpg_ratios.tolist() == [0, 0, 0]
+
+    def test_is_island(self, random_seq_str):
+        counts = PrefixCounts.from_seq(random_seq_str)
+        starts = np.arange(0, 480)
+        ends = starts + 20
+        for start, end, is_island in zip(
+                starts, ends, counts.is_island(starts, ends, 0.5, 0.6)):
+            c_count, g_count, cpg_count = _compute_counts(
+                random_seq_str[start:end])
+            assert is_island == (
+                c_count > 0 and g_count > 0 and _is_island(
+                    *(_compute_ratios(c_count, g_count, cpg_count, 20) +
+                      (0.5, 0.6))))
+
+    def test_is_island_without_c_or_g(self):
+        counts = PrefixCounts.from_seq('AAAACCCCCGGG')
+        assert counts.is_island([0, 4, 8], [4, 8, 12], 0, 0).tolist() == [
+            False, False, True]
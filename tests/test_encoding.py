@@ -0,0 +1,137 @@
+from cStringIO import StringIO
+
+from Bio import SeqIO
+from mock import patch
+import pytest
+
+from cpg_islands.encoding import (encode_chunk, iter_fasta, read_fasta,
+                                  read_genbank, iter_genbank_record_ends,
+                                  FastaRecord, GenBankRecord)
+from tests.helpers import fixture_file, read_fixture_file
+
+TWO_RECORDS = '>seq1 first record\nacgt\nACGT\n>seq2\r\nGG CC\r\n'
+
+
+def test_encode_chunk():
+    assert encode_chunk('acg t\n  60 CGA\r\n') == 'ACGTCGA'
+
+
+class TestIterFasta:
+    @pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 1024])
+    def test_chunk_boundaries(self, chunk_size):
+        records = list(iter_fasta(StringIO(TWO_RECORDS), chunk_size))
+        assert [(r.title, str(r.bases)) for r in records] == [
+            ('seq1 first record', 'ACGTACGT'),
+            ('seq2', 'GGCC')]
+
+    def test_header_without_newline(self):
+        records = list(iter_fasta(StringIO('>seq1\nAC\n>seq2'), 4))
+        assert [(r.title, str(r.bases)) for r in records] == [
+            ('seq1', 'AC'),
+            ('seq2', '')]
+
+    def test_empty(self):
+        assert list(iter_fasta(StringIO(''))) == []
+
+    def test_not_fasta(self):
+        with pytest.raises(ValueError):
+            list(iter_fasta(StringIO('LOCUS fake\n')))
+
+
+class TestReadFasta:
+    def test_one(self):
+        record = read_fasta(StringIO('>seq1\nacgt\n'))
+        assert record.title == 'seq1'
+        assert record.bases == bytearray('ACGT')
+
+    def test_none(self):
+        with pytest.raises(ValueError):
+            read_fasta(StringIO(''))
+
+    def test_two(self):
+        with pytest.raises(ValueError):
+            read_fasta(StringIO(TWO_RECORDS))
+
+
+class TestFastaRecord:
+    def test_to_seq_record(self):
+        seq_record = FastaRecord(
+            'JX500709.1 fake sequence', bytearray('ACGT')).to_seq_record()
+        assert seq_record.id == 'JX500709.1'
+        assert seq_record.description == 'JX500709.1 fake sequence'
+        assert str(seq_record.seq) == 'ACGT'
+
+    @pytest.mark.parametrize('title,record_id', [
+        ('seq1 first record', 'seq1'), ('seq1', 'seq1'), ('', '')])
+    def test_id(self, title, record_id):
+        assert FastaRecord(title, bytearray()).id == record_id
+
+    def test_round_trip(self):
+        record = FastaRecord('seq1', bytearray('ACGT'))
+        assert read_fasta(StringIO(record.to_fasta())).bases == record.bases
+
+
+class TestReadGenbank:
+    @pytest.mark.parametrize('chunk_size', [1, 7, 1024])
+    def test_sequence(self, chunk_size):
+        with open(fixture_file('JX500709.1.gb')) as handle:
+            record = read_genbank(handle, chunk_size)
+        assert (str(record.bases) ==
+                read_fixture_file('JX500709.1.flattened'))
+
+    def test_header_parsed_lazily(self):
+        with patch('cpg_islands.encoding.SeqIO') as mock_seqio:
+            with open(fixture_file('JX500709.1.gb')) as handle:
+                record = read_genbank(handle)
+            assert record.id == 'JX500709.1'
+            assert mock_seqio.mock_calls == []
+            record.header
+        assert len(mock_seqio.mock_calls) == 1
+
+    def test_to_seq_record(self):
+        with open(fixture_file('JX500709.1.gb')) as handle:
+            record = read_genbank(handle)
+        seq_record = record.to_seq_record()
+        expected = SeqIO.read(fixture_file('JX500709.1.gb'), 'genbank')
+        assert seq_record.id == expected.id
+        assert seq_record.description == expected.description
+        assert len(seq_record.features) == len(expected.features)
+        assert str(seq_record.seq) == str(expected.seq)
+
+    @pytest.mark.parametrize('header_text,record_id', [
+        ('LOCUS       SCU49845    5028 bp\nACCESSION   U49845\n'
+         'VERSION     U49845.1  GI:1293613\n', 'U49845.1'),
+        ('LOCUS       SCU49845    5028 bp\nACCESSION   U49845 U49846\n',
+         'U49845'),
+        ('LOCUS       SCU49845    5028 bp\n', 'SCU49845'),
+        ('', '')])
+    def test_id(self, header_text, record_id):
+        assert GenBankRecord(header_text, bytearray()).id == record_id
+
+    def test_skips_text_before_locus(self):
+        record = read_genbank(StringIO(
+            'junk\nLOCUS fake\nORIGIN\n  1 acgt\n//\n\n'))
+        assert record.header_text == 'LOCUS fake\n'
+        assert record.bases == bytearray('ACGT')
+
+    @pytest.mark.parametrize('file_name,message', [
+        ('empty.gb', 'No records found in handle'),
+        ('JX500709.1.no-dna.gb',
+         'Premature end of line during sequence data'),
+        ('U49845.1-and-JX500709.1.gb',
+         'More than one record found in handle')])
+    def test_invalid(self, file_name, message):
+        with open(fixture_file(file_name)) as handle:
+            with pytest.raises(ValueError) as excinfo:
+                read_genbank(handle)
+        assert str(excinfo.value) == message
+
+    def test_unterminated_sequence(self):
+        with pytest.raises(ValueError):
+            read_genbank(StringIO('LOCUS fake\nORIGIN\n  1 acgt\n'))
+
+
+def test_iter_genbank_record_ends():
+    text = 'LOCUS one\n  //not an end\n//\n\nLOCUS two\n//'
+    assert list(iter_genbank_record_ends(text)) == [
+        text.index('LOCUS two'), len(text)]
@@ -0,0 +1,197 @@
+import socket
+
+from mock import call, patch, MagicMock
+import pytest
+
+from cpg_islands.entrez import (RateLimiter, EntrezClient, EntrezError,
+                                split_genbank, create_client,
+                                NCBI_REQUESTS_PER_SECOND,
+                                NCBI_API_KEY_REQUESTS_PER_SECOND)
+from tests.eutils_server import EutilsServer
+from tests.helpers import read_fixture_file
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+        self.sleep = MagicMock(side_effect=self._sleep)
+
+    def __call__(self):
+        return self.now
+
+    def _sleep(self, seconds):
+        self.now += seconds
+
+
+class TestRateLimiter:
+    def test_invalid_rate(self):
+        with pytest.raises(ValueError):
+            RateLimiter(0)
+
+    def test_burst_not_delayed(self):
+        clock = FakeClock()
+        limiter = RateLimiter(3, clock=clock, sleep=clock.sleep)
+        for _ in xrange(3):
+            limiter.acquire()
+        assert clock.sleep.mock_calls == []
+
+    def test_throttled(self):
+        clock = FakeClock()
+        limiter = RateLimiter(2, capacity=1, clock=clock, sleep=clock.sleep)
+        for _ in xrange(3):
+            limiter.acquire()
+        assert clock.sleep.mock_calls == [call(0.5), call(0.5)]
+
+    def test_refills(self):
+        clock = FakeClock()
+        limiter = RateLimiter(2, capacity=1, clock=clock, sleep=clock.sleep)
+        limiter.acquire()
+        clock.now += 10
+        limiter.acquire()
+        assert clock.sleep.mock_calls == []
+
+
+class TestSplitGenbank:
+    def test_empty(self):
+        assert split_genbank('') == []
+
+    def test_one(self):
+        text = read_fixture_file('JX500709.1.gb')
+        assert split_genbank(text) == [text]
+
+    def test_two(self):
+        text = read_fixture_file('U49845.1-and-JX500709.1.gb')
+        records = split_genbank(text)
+        assert len(records) == 2
+        assert ''.join(records) == text
+        assert records[0].startswith('LOCUS       SCU49845')
+        assert records[1].startswith('LOCUS       JX500709')
+
+
+@pytest.fixture
+def server(request):
+    server = EutilsServer()
+    server.start()
+    request.addfinalizer(server.stop)
+    return server
+
+
+class TestEntrezClient:
+    def client(self, server, **kwargs):
+        kwargs.setdefault('rate_limiter', RateLimiter(1000))
+        kwargs.setdefault('sleep', MagicMock())
+        return EntrezClient(server.url, **kwargs)
+
+    def test_request(self, server):
+        client = self.client(server, email='a@b.c', tool='test',
+                             api_key='key')
+        handle = client.esearch(db='nucleotide', term='human')
+        assert handle.read() == '<eSearchResult/>'
+        assert server.requests == [
+            ('/entrez/eutils/esearch.fcgi',
+             dict(db='nucleotide', term='human', email='a@b.c',
+                  tool='test', api_key='key'))]
+
+    def test_connections_reused(self, server):
+        client = self.client(server)
+        for _ in xrange(10):
+            client.efetch(db='nucleotide', id='JX500709.1').read()
+        assert len(server.requests) == 10
+        assert server.connections == 1
+        assert client.connections_opened == 1
+
+    def test_closed_idle_connection_replaced(self, server):
+        client = self.client(server)
+        client.efetch(db='nucleotide', id='JX500709.1').read()
+        client._idle_connections[0].sock.shutdown(socket.SHUT_RDWR)
+        client.efetch(db='nucleotide', id='JX500709.1').read()
+        assert len(server.requests) == 2
+        assert client._sleep.mock_calls == []
+
+    def test_retries_with_backoff(self, server):
+        server.statuses = [429, 503]
+        client = self.client(server, backoff=0.25)
+        handle = client.espell(db='pubmed', term='humna')
+        assert handle.read() == '<eSearchResult/>'
+        assert len(server.requests) == 3
+        assert client._sleep.mock_calls == [call(0.25), call(0.5)]
+
+    def test_retry_after(self, server):
+        server.statuses = [429, 503]
+        server.retry_after = '3'
+        client = self.client(server, backoff=0.25)
+        client.espell(db='pubmed', term='humna').read()
+        assert client._sleep.mock_calls == [call(3), call(3)]
+
+    def test_streamed(self, server):
+        server.body = 'ACGT' * 1000
+        client = self.client(server)
+        handle = client.efetch(db='nucleotide', id='JX500709.1')
+        # The connection stays busy until the body has been read.
+        assert client._idle_connections == []
+        assert handle.read(4) == 'ACGT'
+        assert client._idle_connections == []
+        assert len(handle.read()) == 3996
+        assert handle.closed
+        assert len(client._idle_connections) == 1
+
+    def test_closed_early(self, server):
+        server.body = 'ACGT' * 1000
+        client = self.client(server)
+        with client.efetch(db='nucleotide', id='JX500709.1') as handle:
+            handle.read(4)
+        assert handle.read() == ''
+        # The rest of the body was never read, so the connection can't
+        # be reused.
+        assert client._idle_connections == []
+        client.efetch(db='nucleotide', id='JX500709.1').read()
+        assert client.connections_opened == 2
+
+    def test_gives_up(self, server):
+        server.statuses = [503] * 3
+        client = self.client(server, max_retries=2)
+        with pytest.raises(EntrezError) as excinfo:
+            client.esummary(db='nucleotide', id='JX500709.1')
+        assert excinfo.value.status == 503
+        assert len(server.requests) == 3
+
+    def test_client_error_not_retried(self, server):
+        server.statuses = [400]
+        client = self.client(server)
+        with pytest.raises(EntrezError):
+            client.esearch(db='nucleotide', term='human')
+        assert len(server.requests) == 1
+
+    def test_unreachable(self, server):
+        url = server.url
+        server.stop()
+        client = EntrezClient(url, rate_limiter=RateLimiter(1000),
+                              max_retries=1, sleep=MagicMock())
+        with pytest.raises(socket.error):
+            client.esearch(db='nucleotide', term='human')
+
+    def test_rate_limited(self, server):
+        rate_limiter = MagicMock()
+        client = self.client(server, rate_limiter=rate_limiter)
+        client.esearch(db='nucleotide', term='human')
+        assert rate_limiter.acquire.call_count == 1
+
+    @pytest.mark.parametrize('api_key,rate', [
+        (None, NCBI_REQUESTS_PER_SECOND),
+        ('key', NCBI_API_KEY_REQUESTS_PER_SECOND)])
+    def test_default_rate(self, api_key, rate):
+        assert EntrezClient(api_key=api_key).rate_limiter.rate == rate
+
+
+class TestCreateClient:
+    def test_api_key(self):
+        with patch.dict('os.environ', {'NCBI_API_KEY': 'key'}):
+            client = create_client()
+        assert client.rate_limiter.rate == NCBI_API_KEY_REQUESTS_PER_SECOND
+        assert client._common_params['api_key'] == 'key'
+
+    def test_no_api_key(self):
+        with patch.dict('os.environ', {'NCBI_API_KEY': ''}):
+            client = create_client()
+        assert client.rate_limiter.rate == NCBI_REQUESTS_PER_SECOND
+        assert 'api_key' not in client._common_params
@@ -0,0 +1,443 @@
+from __future__ import division
+
+from Bio.Seq import Seq
+from Bio.Alphabet import IUPAC
+from mock import patch
+import numpy as np
+import os
+import pytest
+import time
+
+import cpg_islands
+from cpg_islands import algorithms
+from cpg_islands.counts import PrefixCounts
+from cpg_islands.islands import (CachedIslandFinder, find_islands,
+                                 find_islands_multiscale,
+                                 iter_islands, as_seq_str, get_engine,
+                                 submit_islands, submit_update,
+                                 update_islands, IslandArrays, merge_islands)
+from cpg_islands.shared import SharedSequence
+from cpg_islands.tasks import (CancelledError, ImmediateExecutor,
+                               ThreadExecutor, ProcessExecutor)
+from tests.helpers import make_random_seq_str
+
+SEQ_STR = 'GCATAACGGTAATCTATCGTATCATATT'
+ISLANDS = [(6, 12, 0.5, 3), (17, 21, 0.5, 4)]
+
+
+class TestFindIslands:
+    @pytest.mark.parametrize('engine', [algo.id for algo
+                                        in algorithms.registry if algo.exact])
+    def test_engines(self, engine):
+        islands = find_islands(SEQ_STR, 2, 0.5, 0.6, engine=engine)
+        assert list(islands) == ISLANDS
+
+    def test_columns(self):
+        islands = find_islands(SEQ_STR, 2, 0.5, 0.6)
+        assert len(islands) == 2
+        assert islands.starts.tolist() == [6, 17]
+        assert islands.ends.tolist() == [12, 21]
+        assert islands.gc_ratios.dtype == np.float64
+        assert islands.obs_exp_cpg_ratios.tolist() == [3, 4]
+
+    def test_none_found(self):
+        islands = find_islands('ATATATAT', 2, 0.5, 0.6)
+        assert len(islands) == 0
+        assert islands.starts.dtype == np.intp
+
+    def test_does_not_build_features(self, monkeypatch):
+        def fail(*args):
+            raise AssertionError('Feature built')
+        monkeypatch.setattr(algorithms, '_make_feature', fail)
+        find_islands(SEQ_STR, 2, 0.5, 0.6)
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            find_islands(SEQ_STR, 0, 0.5, 0.6)
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            find_islands(SEQ_STR, 2, 0.5, 0.6, engine='nonexistent')
+
+    def test_package_level(self):
+        assert cpg_islands.find_islands(SEQ_STR, 2, 0.5, 0.6) == ISLANDS
+
+
+class TestIterIslands:
+    @pytest.mark.parametrize('engine', [algo.id for algo
+                                        in algorithms.registry if algo.exact])
+    def test_engines(self, engine):
+        assert list(iter_islands(SEQ_STR, 2, 0.5, 0.6, engine)) == ISLANDS
+
+    def test_yields_before_scan_finishes(self, monkeypatch):
+        windows = []
+        compute_ratios = algorithms._compute_ratios
+
+        def counting_compute_ratios(*args):
+            windows.append(args)
+            return compute_ratios(*args)
+        monkeypatch.setattr(algorithms, '_compute_ratios',
+                            counting_compute_ratios)
+        islands = iter_islands(SEQ_STR, 2, 0.5, 0.6)
+        assert next(islands) == ISLANDS[0]
+        windows_for_first = len(windows)
+        assert list(islands) == ISLANDS[1:]
+        assert windows_for_first < len(windows)
+
+    def test_invalid_parameters_checked_eagerly(self):
+        with pytest.raises(ValueError):
+            iter_islands(SEQ_STR, 0, 0.5, 0.6)
+
+    def test_package_level(self):
+        assert list(cpg_islands.iter_islands(SEQ_STR, 2, 0.5, 0.6)) == \
+            ISLANDS
+
+
+EXACT_ENGINES = [algo for algo in algorithms.registry if algo.exact]
+
+
+class TestUpdateIslands:
+    @pytest.fixture
+    def seq_str(self):
+        return make_random_seq_str(2000, 0.4)
+
+    def edits(self, seq_str):
+        return [
+            seq_str,
+            'CG' + seq_str,
+            seq_str[10:],
+            seq_str[:1000] + 'C' + seq_str[1001:],
+            seq_str[:1000] + 'CGCGCGCGCG' * 5 + seq_str[1000:],
+            seq_str[:500] + seq_str[1500:],
+            seq_str + 'CGCG',
+            seq_str[:-50],
+            'ATATATATAT',
+        ]
+
+    @pytest.mark.parametrize('engine', EXACT_ENGINES,
+                             ids=[algo.id for algo in EXACT_ENGINES])
+    def test_same_as_rescan(self, seq_str, engine):
+        old_islands = find_islands(seq_str, 10, 0.5, 0.6, engine)
+        assert len(old_islands)
+        for edited in self.edits(seq_str):
+            assert (update_islands(seq_str, old_islands, edited, 10, 0.5,
+                                   0.6, engine) ==
+                    find_islands(edited, 10, 0.5, 0.6, engine))
+
+    def test_scans_neighbourhood(self, seq_str):
+        engine = get_engine('accumulating_sliding_window')
+        old_islands = find_islands(seq_str, 10, 0.5, 0.6, engine)
+        edited = seq_str[:1000] + 'C' + seq_str[1001:]
+        with patch.object(engine, 'scan', wraps=engine.scan) as mock_scan:
+            update_islands(seq_str, old_islands, edited, 10, 0.5, 0.6,
+                           engine)
+        assert 0 < sum(len(mock_call[1][0])
+                       for mock_call in mock_scan.mock_calls) < 500
+
+    def test_unchanged(self, seq_str):
+        old_islands = find_islands(seq_str, 10, 0.5, 0.6)
+        assert (update_islands(seq_str, old_islands, seq_str, 10, 0.5, 0.6)
+                is old_islands)
+
+    def test_inexact_engine_rescanned(self, seq_str):
+        edited = seq_str[:1000] + 'C' + seq_str[1001:]
+        old_islands = find_islands(seq_str, 10, 0.5, 0.6, 'cpg_clusters')
+        assert (update_islands(seq_str, old_islands, edited, 10, 0.5, 0.6,
+                               'cpg_clusters') ==
+                find_islands(edited, 10, 0.5, 0.6, 'cpg_clusters'))
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            update_islands('ACGT', IslandArrays.from_tuples([]), 'AC', 4,
+                           0.5, 0.6)
+
+
+class TestFindIslandsMultiscale:
+    def test_same_as_separate(self):
+        seq_str = make_random_seq_str(3000, 0.6)
+        island_sizes = [10, 50, 200]
+        results = find_islands_multiscale(seq_str, island_sizes, 0.5, 0.6)
+        assert len(results) == 3
+        for island_size, islands in zip(island_sizes, results):
+            assert len(islands)
+            assert islands == find_islands(seq_str, island_size, 0.5, 0.6)
+
+    def test_island_at_end(self):
+        assert (find_islands_multiscale('ATATCGCG', [2, 4], 0.5, 0.6) ==
+                [find_islands('ATATCGCG', 2, 0.5, 0.6),
+                 find_islands('ATATCGCG', 4, 0.5, 0.6)])
+
+    def test_windows_without_c_or_g(self):
+        islands = find_islands_multiscale('AAAACGAAAA', [2], 0, 0)[0]
+        assert list(islands) == [(4, 10, 2 / 6, 6)]
+        assert islands == find_islands('AAAACGAAAA', 2, 0, 0)
+
+    def test_chunks(self):
+        seq_str = 'AT' * 10 + 'CG' * 10 + 'AT' * 10
+        with patch('cpg_islands.islands._MULTISCALE_CHUNK_LEN', 7):
+            assert (find_islands_multiscale(seq_str, [4, 30], 0.5, 0.6) ==
+                    [find_islands(seq_str, 4, 0.5, 0.6),
+                     find_islands(seq_str, 30, 0.5, 0.6)])
+
+    def test_invalid_size(self):
+        with pytest.raises(ValueError):
+            find_islands_multiscale('ACGT', [2, 5], 0.5, 0.6)
+
+
+class TestCachedIslandFinder:
+    def test_same_as_find_islands(self):
+        seq_str = make_random_seq_str(3000, 0.6)
+        finder = CachedIslandFinder(seq_str)
+        for island_size in [10, 50]:
+            for min_gc_ratio in [0.4, 0.6]:
+                for min_obs_exp_cpg_ratio in [0, 0.6, 1]:
+                    assert (finder.find(island_size, min_gc_ratio,
+                                        min_obs_exp_cpg_ratio) ==
+                            find_islands(seq_str, island_size, min_gc_ratio,
+                                         min_obs_exp_cpg_ratio))
+
+    def test_windows_without_c_or_g(self):
+        finder = CachedIslandFinder('AAAACGAAAA')
+        assert finder.find(2, 0, 0) == find_islands('AAAACGAAAA', 2, 0, 0)
+
+    def test_ratios_kept(self):
+        finder = CachedIslandFinder(SEQ_STR)
+        assert finder.find(2, 0.5, 0.6) == ISLANDS
+        window_ratios = finder._window_ratios
+        finder.find(2, 0.4, 0.8)
+        assert finder._window_ratios is window_ratios
+        finder.find(3, 0.4, 0.8)
+        assert finder._window_ratios is not window_ratios
+
+    def test_invalid_parameters(self):
+        with pytest.raises(ValueError):
+            CachedIslandFinder(SEQ_STR).find(0, 0.5, 0.6)
+
+
+class TestMaskedIntervals:
+    def test_find_islands(self):
+        assert find_islands(SEQ_STR, 2, 0.5, 0.6,
+                            masked_intervals=[(0, 15)]) == ISLANDS[1:]
+
+    def test_submit_islands(self):
+        task = submit_islands(ImmediateExecutor(), SEQ_STR, 2, 0.5, 0.6,
+                              masked_intervals=[(15, 28)])
+        assert task.result() == ISLANDS[:1]
+
+
+class TestMergeIslands:
+    def merged_island(self, start, end):
+        seq_str = SEQ_STR[start:end]
+        return (start, end) + algorithms._compute_ratios(
+            *(algorithms._compute_counts(seq_str) + (len(seq_str),)))
+
+    def test_gap_below_threshold_merged(self):
+        assert (find_islands(SEQ_STR, 4, 0.35, 0.6, merge_gap=6) ==
+                [self.merged_island(4, 20)])
+
+    def test_gap_at_threshold_kept(self):
+        assert find_islands(SEQ_STR, 2, 0.5, 0.6, merge_gap=5) == ISLANDS
+
+    def test_min_length(self):
+        assert (find_islands(SEQ_STR, 2, 0.5, 0.6, min_length=5) ==
+                ISLANDS[:1])
+
+    def test_abutting(self):
+        islands = IslandArrays.from_tuples(
+            [(0, 4, 0.5, 1), (4, 8, 0.5, 1), (8, 10, 0.5, 1),
+             (12, 14, 1, 2)])
+        counts = PrefixCounts.from_seq(SEQ_STR)
+        merged = merge_islands(islands, counts, 0.5, 0.6, 1)
+        assert merged == [self.merged_island(0, 10), (12, 14, 1, 2)]
+        # The input is left alone.
+        assert len(islands) == 4
+
+    def test_below_threshold_dropped(self):
+        seq_str = 'CGCGCGCGCG' + 'A' * 40 + 'CGCGCGCGCG'
+        assert len(find_islands(seq_str, 10, 0.5, 0.6)) == 2
+        # Merged, the islands are only a third GC.
+        assert find_islands(seq_str, 10, 0.5, 0.6, merge_gap=50) == []
+        assert len(find_islands(seq_str, 10, 0.3, 0.6, merge_gap=50)) == 1
+
+    def test_empty(self):
+        counts = PrefixCounts.from_seq(SEQ_STR)
+        assert merge_islands(IslandArrays.from_tuples([]), counts, 0.5,
+                             0.6, 10, 10) == []
+
+    def test_many(self):
+        seq_str = 'CGTA' * 250000
+        starts = np.arange(0, len(seq_str), 4)
+        islands = IslandArrays(starts, starts + 2,
+                               np.ones(len(starts)), np.full(len(starts), 2.))
+        # Each island is two bases from the next.
+        merged = merge_islands(islands, PrefixCounts.from_seq(seq_str),
+                               0.5, 0.6, 3)
+        end = len(seq_str) - 2
+        assert merged == [(0, end) + algorithms._compute_ratios(
+            250000, 250000, 250000, end)]
+
+    @pytest.mark.parametrize('merge_gap,min_length', [(-1, 0), (0, -1)])
+    def test_invalid_parameters(self, merge_gap, min_length):
+        with pytest.raises(ValueError):
+            find_islands(SEQ_STR, 2, 0.5, 0.6, merge_gap=merge_gap,
+                         min_length=min_length)
+        with pytest.raises(ValueError):
+            submit_islands(ImmediateExecutor(), SEQ_STR, 2, 0.5, 0.6,
+                           merge_gap=merge_gap, min_length=min_length)
+
+    def test_submit_islands(self):
+        task = submit_islands(ImmediateExecutor(), SEQ_STR, 4, 0.35, 0.6,
+                              merge_gap=6)
+        assert task.result() == [self.merged_island(4, 20)]
+
+    def test_shared_sequence(self):
+        shared = SharedSequence.publish(SEQ_STR)
+        try:
+            assert (find_islands(shared, 4, 0.35, 0.6, merge_gap=6) ==
+                    [self.merged_island(4, 20)])
+        finally:
+            shared.unlink()
+
+
+class RecordingProcessExecutor(ProcessExecutor):
+    def submit(self, func, *args, **kwargs):
+        self.args = args
+        return super(RecordingProcessExecutor, self).submit(
+            func, *args, **kwargs)
+
+
+class TestSubmitIslands:
+    def test_result(self):
+        task = submit_islands(ImmediateExecutor(), memoryview(SEQ_STR),
+                              2, 0.5, 0.6)
+        assert task.result() == ISLANDS
+
+    def test_invalid_parameters_checked_eagerly(self):
+        with pytest.raises(ValueError):
+            submit_islands(ImmediateExecutor(), SEQ_STR, 0, 0.5, 0.6)
+
+    @pytest.mark.parametrize('executor_class', [
+        ThreadExecutor, ProcessExecutor])
+    def test_cancel_running(self, executor_class):
+        executor = executor_class(1)
+        # Long enough that the scan is sure to be running.
+        task = submit_islands(executor, 'AT' * 5000000, 200, 0.5, 0.6)
+        while not task.running():
+            time.sleep(0.01)
+        task.cancel()
+        with pytest.raises(CancelledError):
+            task.result(timeout=10)
+        # The executor is still usable.
+        assert (submit_islands(executor, SEQ_STR, 2, 0.5, 0.6).result() ==
+                ISLANDS)
+        executor.shutdown()
+
+    def test_shared_sequence(self):
+        shared = SharedSequence.publish(SEQ_STR)
+        executor = RecordingProcessExecutor(1)
+        try:
+            task = submit_islands(executor, shared, 2, 0.5, 0.6)
+            assert task.result(timeout=10) == ISLANDS
+            assert executor.args[0] is shared
+        finally:
+            executor.shutdown()
+            shared.unlink()
+
+    @patch('cpg_islands.islands.MIN_SHARED_LEN', len(SEQ_STR))
+    def test_long_sequence_published(self):
+        executor = RecordingProcessExecutor(1)
+        try:
+            task = submit_islands(executor, SEQ_STR, 2, 0.5, 0.6)
+            assert task.result(timeout=10) == ISLANDS
+        finally:
+            executor.shutdown()
+        shared = executor.args[0]
+        assert isinstance(shared, SharedSequence)
+        # Unpublished once done.
+        assert not os.path.exists(shared.path)
+
+    @patch('cpg_islands.islands.MIN_SHARED_LEN', len(SEQ_STR))
+    def test_not_published_for_threads(self):
+        executor = ThreadExecutor(1)
+        with patch.object(SharedSequence, 'publish') as mock_publish:
+            assert (submit_islands(executor, SEQ_STR, 2, 0.5, 0.6).result(
+                timeout=10) == ISLANDS)
+        assert mock_publish.mock_calls == []
+        executor.shutdown()
+
+
+class TestSubmitUpdate:
+    EDITED = SEQ_STR[:14] + 'CG' + SEQ_STR[14:]
+
+    def old_islands(self):
+        return find_islands(SEQ_STR, 2, 0.5, 0.6)
+
+    def test_result(self):
+        task = submit_update(ImmediateExecutor(), SEQ_STR, self.old_islands(),
+                             self.EDITED, 2, 0.5, 0.6)
+        assert task.result() == find_islands(self.EDITED, 2, 0.5, 0.6)
+
+    def test_inexact_engine_rescanned(self):
+        old_islands = find_islands(SEQ_STR, 2, 0.5, 0.6, 'cpg_clusters')
+        task = submit_update(ImmediateExecutor(), SEQ_STR, old_islands,
+                             self.EDITED, 2, 0.5, 0.6, 'cpg_clusters')
+        assert task.result() == find_islands(self.EDITED, 2, 0.5, 0.6,
+                                             'cpg_clusters')
+
+    def test_invalid_parameters_checked_eagerly(self):
+        with pytest.raises(ValueError):
+            submit_update(ImmediateExecutor(), SEQ_STR, self.old_islands(),
+                          self.EDITED, 0, 0.5, 0.6)
+
+    @patch('cpg_islands.islands.MIN_SHARED_LEN', len(SEQ_STR))
+    def test_long_sequence_published(self):
+        executor = RecordingProcessExecutor(1)
+        try:
+            task = submit_update(executor, SEQ_STR, self.old_islands(),
+                                 self.EDITED, 2, 0.5, 0.6)
+            assert task.result(timeout=10) == find_islands(
+                self.EDITED, 2, 0.5, 0.6)
+        finally:
+            executor.shutdown()
+        # Only the edited sequence is sent, without its counts.
+        shared = executor.args[0]
+        assert isinstance(shared, SharedSequence)
+        assert not shared.has_counts
+        assert SEQ_STR not in executor.args[1:]
+        assert not os.path.exists(shared.path)
+
+
+class TestAsSeqStr:
+    def test_shared_sequence(self):
+        shared = SharedSequence.publish(SEQ_STR)
+        try:
+            assert as_seq_str(shared)[:] == SEQ_STR
+        finally:
+            shared.unlink()
+
+    @pytest.mark.parametrize('seq', [
+        SEQ_STR,
+        unicode(SEQ_STR),
+        bytearray(SEQ_STR),
+        memoryview(SEQ_STR),
+        Seq(SEQ_STR, IUPAC.unambiguous_dna),
+        Seq(SEQ_STR, IUPAC.unambiguous_dna).tomutable()])
+    def test_supported(self, seq):
+        assert as_seq_str(seq) == SEQ_STR
+
+    def test_str_not_copied(self):
+        assert as_seq_str(SEQ_STR) is SEQ_STR
+
+    def test_unsupported(self):
+        with pytest.raises(TypeError):
+            as_seq_str(['A', 'C'])
+
+
+def test_get_engine_instance():
+    algo = algorithms.registry[0]
+    assert get_engine(algo) is algo
+
+
+def test_island_arrays_from_tuples():
+    islands = IslandArrays.from_tuples(iter(ISLANDS))
+    assert list(islands) == ISLANDS
@@ -0,0 +1,151 @@
+import mmap
+import pickle
+import random
+
+from Bio import SeqIO
+from mock import patch
+import pytest
+
+from cpg_islands.entrez import split_genbank
+from cpg_islands.islands import find_islands
+from cpg_islands.loader import (RecordRanges, RecordError, read_record,
+                                find_record_islands)
+from cpg_islands.tasks import ProcessExecutor
+from tests.helpers import fixture_file, read_fixture_file
+
+SEQ_STR = 'GCATAACGGTAATCTATCGTATCATATT'
+
+
+def _random_seq(length):
+    rng = random.Random(length)
+    return ''.join(rng.choice('ACGT') for _ in xrange(length))
+
+
+@pytest.fixture
+def fasta_path(tmpdir):
+    # Long enough that later records start past the first page.
+    seqs = [_random_seq(mmap.ALLOCATIONGRANULARITY + 7), SEQ_STR,
+            _random_seq(100)]
+    path = tmpdir.join('multi.fa')
+    path.write(''.join(
+        '>seq{0} description\n{1}\n'.format(i, seq.lower())
+        for i, seq in enumerate(seqs)))
+    return str(path)
+
+
+class TestRecordRanges:
+    def test_fasta(self, fasta_path):
+        ranges = RecordRanges.scan(fasta_path, 'fasta')
+        text = open(fasta_path).read()
+        assert len(ranges) == 3
+        assert ranges.ranges[0][0] == 0
+        assert ranges.ranges[-1][1] == len(text)
+        for (start, end), (next_start, _) in zip(ranges, ranges.ranges[1:]):
+            assert end == next_start
+        assert all(text[start] == '>' for start, end in ranges)
+
+    def test_fasta_leading_text(self, tmpdir):
+        path = tmpdir.join('leading.fa')
+        path.write('comment\n>one\nACGT\n>two\nGG')
+        ranges = RecordRanges.scan(str(path), 'fasta')
+        assert ranges.ranges == [(8, 18), (18, 25)]
+
+    def test_genbank(self):
+        path = fixture_file('U49845.1-and-JX500709.1.gb')
+        ranges = RecordRanges.scan(path, 'genbank')
+        text = read_fixture_file('U49845.1-and-JX500709.1.gb')
+        assert ([text[start:end] for start, end in ranges] ==
+                split_genbank(text))
+
+    def test_genbank_truncated(self, tmpdir):
+        text = read_fixture_file('JX500709.1.gb')
+        path = tmpdir.join('truncated.gb')
+        path.write(text + text[:200])
+        ranges = RecordRanges.scan(str(path), 'genbank')
+        assert ranges.ranges == [(0, len(text)), (len(text), len(text) + 200)]
+
+    def test_empty(self, tmpdir):
+        path = tmpdir.join('empty.fa')
+        path.write('')
+        assert len(RecordRanges.scan(str(path), 'fasta')) == 0
+
+    def test_unsplittable_format(self):
+        with pytest.raises(ValueError):
+            RecordRanges.scan(fixture_file('JX500709.1.gb'), 'embl')
+
+    def test_nonexistent(self):
+        with pytest.raises(IOError):
+            RecordRanges.scan('nonexistent.fa', 'fasta')
+
+
+class TestReadRecord:
+    def test_fasta(self, fasta_path):
+        ranges = RecordRanges.scan(fasta_path, 'fasta')
+        records = [read_record(fasta_path, 'fasta', start, end)
+                   for start, end in ranges]
+        expected = [(record.id, str(record.seq).upper())
+                    for record in SeqIO.parse(fasta_path, 'fasta')]
+        assert [(record_id, str(bases))
+                for record_id, bases in records] == expected
+
+    def test_genbank(self):
+        path = fixture_file('U49845.1-and-JX500709.1.gb')
+        ranges = RecordRanges.scan(path, 'genbank')
+        records = [read_record(path, 'genbank', start, end)
+                   for start, end in ranges]
+        expected = [(record.id, str(record.seq).upper())
+                    for record in SeqIO.parse(path, 'genbank')]
+        assert [(record_id, str(bases))
+                for record_id, bases in records] == expected
+
+    def test_genbank_header_not_parsed(self):
+        path = fixture_file('JX500709.1.gb')
+        [(start, end)] = RecordRanges.scan(path, 'genbank')
+        with patch('cpg_islands.encoding.SeqIO') as mock_seqio:
+            record_id, bases = read_record(path, 'genbank', start, end)
+        assert record_id == 'JX500709.1'
+        assert mock_seqio.mock_calls == []
+
+    def test_genbank_truncated(self, tmpdir):
+        text = read_fixture_file('JX500709.1.gb')
+        path = tmpdir.join('truncated.gb')
+        path.write(text + text[:200])
+        with pytest.raises(ValueError):
+            read_record(str(path), 'genbank', len(text), len(text) + 200)
+
+
+class TestFindRecordIslands:
+    def test_islands(self, fasta_path):
+        start, end = RecordRanges.scan(fasta_path, 'fasta').ranges[1]
+        record_id, islands = find_record_islands(
+            fasta_path, 'fasta', start, end, 2, 0.5, 0.6,
+            'accumulating_sliding_window')
+        assert record_id == 'seq1'
+        assert islands == find_islands(SEQ_STR, 2, 0.5, 0.6)
+
+    def test_record_error(self, fasta_path):
+        start, end = RecordRanges.scan(fasta_path, 'fasta').ranges[1]
+        with pytest.raises(RecordError) as excinfo:
+            find_record_islands(fasta_path, 'fasta', start, end, 10 ** 9,
+                                0.5, 0.6, 'accumulating_sliding_window')
+        assert excinfo.value.record_id == 'seq1'
+        assert 'must be less than or equal' in str(excinfo.value)
+
+    def test_record_error_pickles(self):
+        error = pickle.loads(pickle.dumps(RecordError('seq1', 'Too short')))
+        assert error.record_id == 'seq1'
+        assert str(error) == 'Too short'
+
+    def test_in_workers(self, fasta_path):
+        ranges = RecordRanges.scan(fasta_path, 'fasta')
+        executor = ProcessExecutor(2)
+        try:
+            tasks = [executor.submit(find_record_islands, fasta_path,
+                                     'fasta', start, end, 20, 0.5, 0.6,
+                                     'accumulating_sliding_window')
+                     for start, end in ranges]
+            results = [task.result(timeout=30) for task in tasks]
+        finally:
+            executor.shutdown()
+        assert [record_id for record_id, islands in results] == [
+            'seq0', 'seq1', 'seq2']
@@ -0,0 +1,195 @@
+import httplib
+import json
+import threading
+
+import pytest
+
+from cpg_islands.server import IslandServer, Job, iter_island_lines
+from cpg_islands.tasks import ImmediateExecutor, ThreadExecutor, Task
+from tests.helpers import fixture_file, read_fixture_file
+
+SEQ_STR = 'GCATAACGGTAATCTATCGTATCATATT'
+
+
+@pytest.fixture
+def server(request):
+    server = IslandServer(('127.0.0.1', 0), ThreadExecutor(2))
+    thread = threading.Thread(target=server.serve_forever,
+                              kwargs=dict(poll_interval=0.01))
+    thread.daemon = True
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+        server.executor.shutdown()
+    request.addfinalizer(stop)
+    return server
+
+
+def post(server, obj, path='/islands'):
+    connection = httplib.HTTPConnection(*server.server_address)
+    connection.request('POST', path, json.dumps(obj))
+    response = connection.getresponse()
+    return response, response.read()
+
+
+def read_lines(body):
+    return [json.loads(line) for line in body.splitlines()]
+
+
+class TestIslandServer:
+    def test_seq(self, server):
+        response, body = post(server, {
+            'seq': SEQ_STR, 'id': 'fake', 'island_size': 2,
+            'min_gc_ratio': 0.5, 'min_obs_exp_cpg_ratio': 0.6})
+        assert response.status == 200
+        assert response.getheader('Content-Type') == 'application/x-ndjson'
+        assert read_lines(body) == [
+            dict(record='fake', start=6, end=12, gc_ratio=0.5,
+                 obs_exp_cpg_ratio=3),
+            dict(record='fake', start=17, end=21, gc_ratio=0.5,
+                 obs_exp_cpg_ratio=4)]
+
+    def test_lowercase(self, server, tmpdir):
+        seq_str = 'cgcgcgcgcgcgcgcgcgcgatatatatat'
+        response, body = post(server, {'seq': seq_str, 'island_size': 10})
+        assert [(line['start'], line['end'])
+                for line in read_lines(body)] == [(0, 30)]
+        # Files give the same answer as sequences sent inline.
+        for file_format in ['fasta', 'tab']:
+            path = tmpdir.join('lower.' + file_format)
+            path.write('>lower\n{0}\n'.format(seq_str) if file_format ==
+                       'fasta' else 'lower\t{0}\n'.format(seq_str))
+            response, file_body = post(server, {
+                'path': str(path), 'format': file_format,
+                'island_size': 10})
+            assert ([(line['start'], line['end'])
+                     for line in read_lines(file_body)] == [(0, 30)])
+
+    def test_merge(self, server):
+        response, body = post(server, {
+            'seq': SEQ_STR, 'island_size': 4, 'min_gc_ratio': 0.35,
+            'merge_gap': 6, 'min_length': 10})
+        assert [(line['start'], line['end'])
+                for line in read_lines(body)] == [(4, 20)]
+
+    def test_file(self, server):
+        response, body = post(server, {
+            'path': fixture_file('U49845.1-and-JX500709.1.gb'),
+            'island_size': 100})
+        assert response.status == 200
+        records = [line['record'] for line in read_lines(body)]
+        assert set(records) == set(['U49845.1', 'JX500709.1'])
+        # Output stays in record order.
+        assert records == sorted(records, key=records.index)
+        assert records[0] == 'U49845.1'
+
+    def test_record_error(self, server):
+        response, body = post(server, {
+            'path': fixture_file('JX500709.1.gb'),
+            'island_size': 10 ** 9})
+        assert response.status == 200
+        lines = read_lines(body)
+        assert len(lines) == 1
+        assert lines[0]['record'] == 'JX500709.1'
+        assert 'must be less than or equal' in lines[0]['error']
+
+    def test_fasta_file(self, server, tmpdir):
+        path = tmpdir.join('multi.fa')
+        path.write('>one\n{0}\n>two\nATAT\n>three\n{0}\n'.format(SEQ_STR))
+        response, body = post(server, {'path': str(path), 'island_size': 2,
+                                       'min_gc_ratio': 0.5,
+                                       'min_obs_exp_cpg_ratio': 0.6})
+        lines = read_lines(body)
+        assert [line['record'] for line in lines] == [
+            'one', 'one', 'three', 'three']
+        assert [(line['start'], line['end']) for line in lines[:2]] == [
+            (6, 12), (17, 21)]
+
+    def test_truncated_file(self, server, tmpdir):
+        text = read_fixture_file('JX500709.1.gb')
+        path = tmpdir.join('truncated.gb')
+        path.write(text + text[:200])
+        response, body = post(server, {'path': str(path),
+                                       'island_size': 100})
+        lines = read_lines(body)
+        assert lines[0]['record'] == 'JX500709.1'
+        assert lines[-1]['record'] is None
+        assert 'error' in lines[-1]
+
+    def test_connection_reused(self, server):
+        connection = httplib.HTTPConnection(*server.server_address)
+        for _ in xrange(3):
+            connection.request('POST', '/islands',
+                               json.dumps({'seq': SEQ_STR, 'island_size': 2}))
+            response = connection.getresponse()
+            assert len(read_lines(response.read())) == 2
+
+    @pytest.mark.parametrize('request_body', [
+        'not json',
+        [],
+        {},
+        {'seq': SEQ_STR, 'path': 'also.fa'},
+        {'seq': 5},
+        {'seq': SEQ_STR, 'island_size': None},
+        {'seq': SEQ_STR, 'island_size': 0},
+        {'seq': SEQ_STR, 'engine': 'nonexistent'},
+        {'seq': SEQ_STR, 'merge_gap': -1},
+        {'path': 'nonexistent.fa'},
+        {'path': fixture_file('JX500709.1.gb'), 'format': 'nonexistent'}])
+    def test_bad_request(self, server, request_body):
+        connection = httplib.HTTPConnection(*server.server_address)
+        connection.request('POST', '/islands',
+                           request_body if isinstance(request_body, str)
+                           else json.dumps(request_body))
+        response = connection.getresponse()
+        assert response.status == 400
+        assert 'error' in json.loads(response.read())
+
+    def test_not_found(self, server):
+        response, body = post(server, {}, '/nonexistent')
+        assert response.status == 404
+
+    def test_engines(self, server):
+        connection = httplib.HTTPConnection(*server.server_address)
+        connection.request('GET', '/engines')
+        response = connection.getresponse()
+        assert 'accumulating_sliding_window' in json.loads(response.read())
+
+
+class TestIterIslandLines:
+    def test_stopping_cancels_pending(self):
+        queued = []
+
+        class QueueingExecutor(object):
+            """Queues tasks without running them, except the first."""
+            def submit(self, func, *args, **kwargs):
+                task = Task(func, args, kwargs)
+                if not queued:
+                    task.run()
+                queued.append(task)
+                return task
+
+        records = [(str(i), SEQ_STR) for i in xrange(4)]
+        lines = iter_island_lines(QueueingExecutor(), Job(records, 2), 3)
+        assert json.loads(next(lines))['record'] == '0'
+        lines.close()
+        assert len(queued) == 3
+        assert not queued[0].cancelled()
+        assert all(task.cancelled() for task in queued[1:])
+
+    def test_bounded_in_flight(self):
+        submitted = []
+
+        class RecordingExecutor(ImmediateExecutor):
+            def submit(self, func, *args, **kwargs):
+                submitted.append(args[0])
+                return super(RecordingExecutor, self).submit(
+                    func, *args, **kwargs)
+
+        records = ((str(i), SEQ_STR) for i in xrange(5))
+        lines = iter_island_lines(RecordingExecutor(), Job(records, 2), 2)
+        next(lines)
+        # Only the records needed so far have been submitted.
+        assert len(submitted) == 2
@@ -0,0 +1,86 @@
+import os
+import pickle
+
+import pytest
+
+from cpg_islands.counts import PrefixCounts
+from cpg_islands.shared import SharedSequence
+from cpg_islands.tasks import ProcessExecutor
+
+SEQ_STR = 'GCATAACGGTAATCTATCGTATCATATT'
+
+
+def _window_counts(shared, start, end):
+    return shared.bases[start:end], shared.counts.counts(start, end)
+
+
+@pytest.fixture(params=[SEQ_STR, SEQ_STR + 'CGA', ''])
+def seq_str(request):
+    return request.param
+
+
+@pytest.fixture
+def shared(request, seq_str):
+    shared = SharedSequence.publish(seq_str)
+    request.addfinalizer(shared.unlink)
+    return shared
+
+
+class TestSharedSequence:
+    def test_bases(self, shared, seq_str):
+        assert len(shared.bases) == len(seq_str)
+        assert shared.bases[:] == seq_str
+        if seq_str:
+            assert shared.bases[6] == 'C'
+
+    def test_counts(self, shared, seq_str):
+        expected = PrefixCounts.from_seq(seq_str)
+        for name in ['c_counts', 'g_counts', 'cpg_counts']:
+            array = getattr(shared.counts, name)
+            assert array.tolist() == getattr(expected, name).tolist()
+            # Viewed in place, not copied.
+            assert not array.flags.writeable
+            assert not array.flags.owndata
+
+    def test_pickle(self, shared, seq_str):
+        shared.counts
+        data = pickle.dumps(shared, pickle.HIGHEST_PROTOCOL)
+        # Only the handle is pickled.
+        assert len(data) < 200
+        copy = pickle.loads(data)
+        assert copy.bases[:] == seq_str
+
+    def test_without_counts(self, seq_str):
+        shared = SharedSequence.publish(seq_str, with_counts=False)
+        try:
+            copy = pickle.loads(pickle.dumps(shared))
+            assert copy.bases[:] == seq_str
+            # Counted on demand instead.
+            assert (copy.counts.cpg_counts.tolist() ==
+                    PrefixCounts.from_seq(seq_str).cpg_counts.tolist())
+        finally:
+            shared.unlink()
+
+    def test_unlink(self):
+        shared = SharedSequence.publish(SEQ_STR)
+        bases = shared.bases
+        shared.unlink()
+        assert not os.path.exists(shared.path)
+        # Views handed out remain usable.
+        assert bases[:] == SEQ_STR
+        shared.unlink()
+
+
+def test_attached_by_workers():
+    shared = SharedSequence.publish(SEQ_STR)
+    executor = ProcessExecutor(2)
+    try:
+        tasks = [executor.submit(_window_counts, shared, start, start + 6)
+                 for start in xrange(0, 20, 2)]
+        for start, task in zip(xrange(0, 20, 2), tasks):
+            subseq, counts = task.result(timeout=10)
+            assert subseq == SEQ_STR[start:start + 6]
+            assert counts == shared.counts.counts(start, start + 6)
+    finally:
+        executor.shutdown()
+        shared.unlink()
@@ -0,0 +1,215 @@
+import operator
+import os
+import threading
+import time
+
+import pytest
+from mock import MagicMock, call
+
+from cpg_islands.tasks import (Task, CancelledError, ImmediateExecutor,
+                               ThreadExecutor, ProcessExecutor,
+                               checkpoint, current_task)
+
+
+class TestTask:
+    def test_result(self):
+        task = Task(lambda x, y: x + y, (1,), {'y': 2})
+        task.run()
+        assert task.done()
+        assert task.result() == 3
+        assert task.exception() is None
+
+    def test_exception(self):
+        def fail():
+            raise ValueError('fake error')
+        task = Task(fail)
+        task.run()
+        assert str(task.exception()) == 'fake error'
+        with pytest.raises(ValueError):
+            task.result()
+
+    def test_cancel_pending(self):
+        func = MagicMock()
+        task = Task(func)
+        assert task.cancel()
+        task.run()
+        assert task.cancelled()
+        assert func.mock_calls == []
+        with pytest.raises(CancelledError):
+            task.result()
+
+    def test_cannot_cancel_finished(self):
+        task = Task(lambda: None)
+        task.run()
+        assert not task.cancel()
+        assert not task.cancelled()
+
+    def test_done_callback(self):
+        callback = MagicMock()
+        task = Task(lambda: None)
+        task.add_done_callback(callback)
+        assert callback.mock_calls == []
+        task.run()
+        assert callback.mock_calls == [call(task)]
+
+    def test_done_callback_when_done(self):
+        callback = MagicMock()
+        task = Task(lambda: None)
+        task.run()
+        task.add_done_callback(callback)
+        assert callback.mock_calls == [call(task)]
+
+    def test_done_callback_on_cancel(self):
+        callback = MagicMock()
+        task = Task(lambda: None)
+        task.add_done_callback(callback)
+        task.cancel()
+        assert callback.mock_calls == [call(task)]
+
+    def test_timeout(self):
+        with pytest.raises(RuntimeError):
+            Task(lambda: None).result(timeout=0.01)
+
+    def test_current_task(self):
+        task = Task(current_task)
+        task.run()
+        assert task.result() is task
+        assert current_task() is None
+
+    def test_cancel_running(self):
+        def func():
+            assert not task.cancel()
+            checkpoint()
+            return 'not cancelled'
+        callback = MagicMock()
+        task = Task(func)
+        task.add_done_callback(callback)
+        task.run()
+        assert task.cancelled()
+        assert callback.mock_calls == [call(task)]
+        with pytest.raises(CancelledError):
+            task.result()
+
+    def test_checkpoint_without_request(self):
+        def func():
+            checkpoint()
+            return 'not cancelled'
+        task = Task(func)
+        task.run()
+        assert task.result() == 'not cancelled'
+
+    def test_checkpoint_outside_task(self):
+        checkpoint()
+
+
+class TestImmediateExecutor:
+    def test_submit(self):
+        task = ImmediateExecutor().submit(lambda x: x * 2, 21)
+        assert task.result() == 42
+
+
+class TestThreadExecutor:
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError):
+            ThreadExecutor(0)
+
+    def test_submit(self):
+        executor = ThreadExecutor(2)
+        tasks = [executor.submit(lambda x: x * 2, i) for i in xrange(10)]
+        assert [task.result(timeout=5) for task in tasks] == range(0, 20, 2)
+        executor.shutdown()
+
+    def test_runs_off_calling_thread(self):
+        executor = ThreadExecutor(1)
+        task = executor.submit(threading.current_thread)
+        assert task.result(timeout=5) is not threading.current_thread()
+        executor.shutdown()
+
+    def test_bounded(self):
+        executor = ThreadExecutor(2)
+        for _ in xrange(5):
+            executor.submit(lambda: None)
+        assert len(executor._threads) == 2
+        executor.shutdown()
+
+    def test_shutdown_runs_queued(self):
+        executor = ThreadExecutor(1)
+        tasks = [executor.submit(lambda: None) for _ in xrange(5)]
+        executor.shutdown()
+        assert all(task.done() for task in tasks)
+        with pytest.raises(RuntimeError):
+            executor.submit(lambda: None)
+
+
+def _fail():
+    raise ValueError('fake error')
+
+
+def _setenv(name, value):
+    os.environ[name] = value
+
+
+def _getenv(name):
+    return os.environ.get(name)
+
+
+class TestProcessExecutor:
+    def test_submit(self):
+        executor = ProcessExecutor(2)
+        tasks = [executor.submit(operator.mul, i, 2) for i in xrange(10)]
+        assert [task.result(timeout=10) for task in tasks] == range(0, 20, 2)
+        executor.shutdown()
+
+    def test_runs_in_other_process(self):
+        executor = ProcessExecutor(1)
+        assert executor.submit(os.getpid).result(timeout=10) != os.getpid()
+        executor.shutdown()
+
+    def test_workers_reused(self):
+        executor = ProcessExecutor(1)
+        pids = set(executor.submit(os.getpid).result(timeout=10)
+                   for _ in xrange(3))
+        assert len(pids) == 1
+        executor.shutdown()
+
+    def test_initializer(self):
+        executor = ProcessExecutor(
+            1, initializer=_setenv,
+            initargs=('CPG_ISLANDS_TEST', 'initialized'))
+        task = executor.submit(_getenv, 'CPG_ISLANDS_TEST')
+        assert task.result(timeout=10) == 'initialized'
+        executor.shutdown()
+
+    def test_exception(self):
+        executor = ProcessExecutor(1)
+        with pytest.raises(ValueError):
+            executor.submit(_fail).result(timeout=10)
+        executor.shutdown()
+
+    def test_unpicklable(self):
+        executor = ProcessExecutor(1)
+        with pytest.raises(Exception):
+            executor.submit(lambda: None).result(timeout=10)
+        assert executor.submit(operator.neg, 1).result(timeout=10) == -1
+        executor.shutdown()
+
+    def test_cancel_running(self):
+        executor = ProcessExecutor(1)
+        pid = executor.submit(os.getpid).result(timeout=10)
+        task = executor.submit(time.sleep, 60)
+        while not task.running():
+            time.sleep(0.01)
+        task.cancel()
+        with pytest.raises(CancelledError):
+            task.result(timeout=10)
+        # The worker was replaced.
+        assert executor.submit(os.getpid).result(timeout=10) != pid
+        executor.shutdown()
+
+    def test_worker_died(self):
+        executor = ProcessExecutor(1)
+        with pytest.raises(RuntimeError) as exc_info:
+            executor.submit(os._exit, 1).result(timeout=10)
+        assert str(exc_info.value) == 'Worker process died'
+        assert executor.submit(operator.neg, 1).result(timeout=10) == -1
+        executor.shutdown()
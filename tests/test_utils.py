@@ -0,0 +1,64 @@
+from cStringIO import StringIO
+
+from mock import MagicMock, call
+import pytest
+
+from cpg_islands.utils import LRUCache, ProgressFile, call_directly
+
+
+def test_call_directly():
+    func = MagicMock()
+    call_directly(func, 1, 2)
+    assert func.mock_calls == [call(1, 2)]
+
+
+class TestLRUCache:
+    def test_miss(self):
+        cache = LRUCache(2)
+        assert cache.get('a') is None
+        assert cache.get('a', 'default') == 'default'
+
+    def test_put_get(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        assert cache.get('a') == 1
+        assert 'a' in cache
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert 'c' in cache
+
+    def test_clear(self):
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestProgressFile:
+    def test_lines(self):
+        callback = MagicMock()
+        progress_file = ProgressFile(StringIO('ab\ncd\nef\n'), callback, 4)
+        assert list(progress_file) == ['ab\n', 'cd\n', 'ef\n']
+        assert callback.mock_calls == [call(3), call(9)]
+        assert progress_file.bytes_read == 9
+
+    def test_read(self):
+        callback = MagicMock()
+        progress_file = ProgressFile(StringIO('abcdef'), callback, 2)
+        assert progress_file.read(3) == 'abc'
+        assert progress_file.read() == 'def'
+        assert callback.mock_calls == [call(3), call(6)]
+
+    def test_callback_abandons_reading(self):
+        callback = MagicMock(side_effect=RuntimeError)
+        progress_file = ProgressFile(StringIO('ab\ncd\n'), callback)
+        with pytest.raises(RuntimeError):
+            list(progress_file)